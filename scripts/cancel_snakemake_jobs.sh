@@ -3,6 +3,7 @@
 ##
 ##  This script will find all Slurm IDs in a snakemake log file
 ##   and issue 'scancel' to cancel them
+##  Slurm IDs are extracted with `logscan` from ccbr_tools when it is available.
 
 
 if [ $# -eq 0 ]
@@ -12,7 +13,12 @@ else
    snakeout_file=$1
 fi
 
-JOB_IDS=( $(grep "external jobid" $snakeout_file | sed "s/^.*jobid '\(.*\)'.$/\1/") )
+if command -v logscan > /dev/null
+then
+   JOB_IDS=( $(logscan --jobids $snakeout_file) )
+else
+   JOB_IDS=( $(grep "external jobid" $snakeout_file | sed "s/^.*jobid '\(.*\)'.$/\1/") )
+fi
 
 echo “Found ${#JOB_IDS[@]} SLURM IDs… Cancelling them…”
 for id in ${JOB_IDS[@]}
@@ -13,6 +13,8 @@
 ## 4. Find the slurm output file with that ID
 ##
 ## The analyst can then go through the slurm file to find/evaluate the error
+##
+## Steps 1-3 use `logscan` from ccbr_tools when it is available.
 
 ## One liner version:
 ## grep -B 5 -m1 "Job failed" Reports/snakemake.log | grep "jobid: " | grep "job $(sed 's/^.*jobid: \(.*\)$/\1/')" Reports/snakemake.log |  slurm-$(sed "s/^.*jobid '\(.*\)'\.$/\1/").out
@@ -24,8 +26,16 @@ else
    SNAKEMAKE_LOG=$1
 fi
 
-jobid=$(grep -B 5 -m1 "Job failed" $SNAKEMAKE_LOG | grep "jobid: " | sed 's/^.*jobid: \(.*\)$/\1/')
-rulename=$(grep -B 5 -m1 "Job failed" $SNAKEMAKE_LOG | grep "Error in rule " | sed 's/^.*Error in rule \(.*\):$/\1/')
+if command -v logscan > /dev/null
+then
+   ## logscan --failed prints: kind, slurm id, rule name, snakemake jobid, time, offset
+   failed=$(logscan --failed $SNAKEMAKE_LOG)
+   jobid=$(echo "$failed" | head -n 1 | cut -f 4)
+   rulename=$(echo "$failed" | head -n 1 | cut -f 3)
+else
+   jobid=$(grep -B 5 -m1 "Job failed" $SNAKEMAKE_LOG | grep "jobid: " | sed 's/^.*jobid: \(.*\)$/\1/')
+   rulename=$(grep -B 5 -m1 "Job failed" $SNAKEMAKE_LOG | grep "Error in rule " | sed 's/^.*Error in rule \(.*\):$/\1/')
+fi
 
 if [ "$jobid" = "" ]
 then
@@ -34,7 +44,12 @@ then
    echo ""
 else
 
-   slurmids=($(grep "job $jobid " $SNAKEMAKE_LOG | sed "s/^.*jobid '\(.*\)'\.$/\1/"))
+   if command -v logscan > /dev/null
+   then
+      slurmids=($(logscan $SNAKEMAKE_LOG | awk -F '\t' -v jobid="$jobid" '$1 == "submit" && $4 == jobid { print $2 }'))
+   else
+      slurmids=($(grep "job $jobid " $SNAKEMAKE_LOG | sed "s/^.*jobid '\(.*\)'\.$/\1/"))
+   fi
    echo -e 'Rule Name\tSlurm ID(s)'
    echo -e $rulename'\t'$(IFS=, ; echo "${slurmids[*]}")
    echo ""
@@ -0,0 +1,367 @@
+"""
+Pluggable SLURM accounting backends and the parsing shared by `jobby` and `jobinfo`.
+
+ABOUT:
+    `jobby` gets job records from `sacct`, and `jobinfo` from the biowulf `dashboard_cli` utility.
+    Both collect job IDs from a Snakemake or Nextflow log, split them into chunks that fit on one
+    command line, and normalize SLURM time and memory strings. This module holds those shared pieces:
+
+    - Backends that fetch the raw accounting output for a chunk of job IDs:
+        - [](`~ccbr_tools.accounting.SacctBackend`) runs `sacct --parsable2`.
+        - [](`~ccbr_tools.accounting.DashboardBackend`) runs `dashboard_cli jobs --json`.
+        - [](`~ccbr_tools.accounting.ReplayBackend`) reads output recorded earlier from either command,
+          e.g. to re-run a report away from the cluster or to test the whole pipeline without SLURM.
+    - [](`~ccbr_tools.accounting.extract_jobids`) to find the job IDs submitted in a log.
+    - [](`~ccbr_tools.accounting.chunk_job_ids`) to batch job IDs within the argument length limit.
+    - [](`~ccbr_tools.accounting.parse_times_to_seconds`) and [](`~ccbr_tools.accounting.parse_mems_to_gb`)
+      to convert whole columns of SLURM times and memory sizes.
+
+    All backends have the same `fetch(job_ids, fields)` method, and raise `subprocess.CalledProcessError`
+    when the accounting command fails, so callers handle live and replayed output the same way.
+
+USAGE:
+    ```
+    # record accounting output once, e.g. on biowulf
+    sacct -j 123,456 --format=ALL --parsable2 > sacct.txt
+    dashboard_cli jobs --joblist 123,456 --archive --json > jobs.json
+    # replay it later
+    jobby 123 456 --replay sacct.txt
+    jobinfo -j 123,456 --replay jobs.json
+    ```
+
+EXAMPLES:
+    ```python
+    from ccbr_tools.accounting import ReplayBackend
+    lines = ReplayBackend("sacct.txt").fetch(["123"], ["JobID", "State", "Elapsed"])
+    ```
+"""
+
+import json
+import os
+import subprocess
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from .logscan import scan_log
+
+MAX_ARG_STRLEN = 131072  # Linux limit on the length of a single argument
+ARG_MARGIN = 4096  # room for the rest of the command line
+MIN_ARG_LEN = 1024
+MAX_JOBS_PER_CALL = 1000
+
+SLURM_NUMBER = r"(?:\d+(?:\.\d*)?|\.\d+)"
+SLURM_TIME_PATTERN = (
+    r"^(?:(?P<days>\d+)-)?"
+    rf"(?:(?:(?P<hours>{SLURM_NUMBER}):)?(?P<minutes>{SLURM_NUMBER}):)?"
+    rf"(?P<seconds>{SLURM_NUMBER})$"
+)
+# sacct writes e.g. 4000M or 4G, dashboard_cli writes e.g. "4000 MB" or "4 GB"
+SLURM_MEM_PATTERN = rf"^(?P<value>{SLURM_NUMBER})\s*(?P<unit>[KMGT]?)B?$"
+MEM_UNITS_TO_GB = {
+    "K": 1 / (1024 * 1024),
+    "M": 1 / 1024,
+    "G": 1.0,
+    "T": 1024.0,
+    "": 1 / (1024 * 1024),  # no unit
+}
+
+
+class AccountingBackend:
+    """
+    Base class of accounting backends.
+
+    Subclasses implement [](`~ccbr_tools.accounting.AccountingBackend.fetch`).
+    """
+
+    name = None
+
+    def fetch(self, job_ids, fields):
+        """
+        Fetch the accounting output for one chunk of job IDs.
+
+        Args:
+            job_ids (list): Job IDs to query with a single call.
+            fields (list): Names of the fields to request.
+
+        Returns:
+            list: The output of the backend (see the subclasses).
+
+        Raises:
+            subprocess.CalledProcessError: If the accounting command fails.
+        """
+        raise NotImplementedError
+
+
+class SacctBackend(AccountingBackend):
+    """Query SLURM accounting with `sacct`."""
+
+    name = "sacct"
+
+    def fetch(self, job_ids, fields):
+        """
+        Run `sacct --parsable2` for one chunk of job IDs.
+
+        Args:
+            job_ids (list): Job IDs to query with a single `sacct` call.
+            fields (list): sacct fields to request, e.g. `["JobID", "State"]`.
+
+        Returns:
+            list: The lines of `sacct --parsable2` output, starting with the header.
+                Steps of a job (e.g. `123.batch`) are separate lines.
+
+        Raises:
+            subprocess.CalledProcessError: If `sacct` fails.
+            FileNotFoundError: If `sacct` is not installed.
+        """
+        sacct_cmd = [
+            "sacct",
+            "-j",
+            ",".join(str(jobid) for jobid in job_ids),
+            f"--format={','.join(fields)}",
+            "-P",
+            "--parsable2",
+        ]
+        return subprocess.check_output(sacct_cmd, text=True).strip().split("\n")
+
+
+class DashboardBackend(AccountingBackend):
+    """Query the biowulf job dashboard with `dashboard_cli`."""
+
+    name = "dashboard_cli"
+    command = "/usr/local/bin/dashboard_cli"  # abs-path:ignore
+
+    def fetch(self, job_ids, fields):
+        """
+        Run `dashboard_cli jobs --json` for one chunk of job IDs.
+
+        Args:
+            job_ids (list): Job IDs to query with a single `dashboard_cli` call.
+            fields (list): dashboard_cli fields to request, e.g. `["jobid", "state"]`.
+
+        Returns:
+            list: The job records as dictionaries.
+
+        Raises:
+            subprocess.CalledProcessError: If `dashboard_cli` fails.
+            FileNotFoundError: If `dashboard_cli` is not installed.
+            json.JSONDecodeError: If the output is not valid JSON.
+        """
+        cmd = [
+            self.command,
+            "jobs",
+            "--joblist",
+            ",".join(str(jobid) for jobid in job_ids),
+            "--archive",
+            "--json",
+            "--fields",
+            ",".join(fields),
+        ]
+        proc = subprocess.run(cmd, capture_output=True, text=True, check=False)
+        if proc.returncode != 0:
+            raise subprocess.CalledProcessError(
+                proc.returncode, cmd, output=proc.stdout, stderr=proc.stderr
+            )
+        return json.loads(proc.stdout)
+
+
+class ReplayBackend(AccountingBackend):
+    """
+    Replay accounting output recorded from `sacct` or `dashboard_cli`.
+
+    The recording is read once. Each [](`~ccbr_tools.accounting.ReplayBackend.fetch`) returns the same kind
+    of output as the live backend would for the requested job IDs and fields: job IDs that are not in the
+    recording are missing from the output, and fields that were not recorded are empty.
+
+    Args:
+        path (str or pathlib.Path): Path to the recording: `sacct --parsable2` output (with a header line),
+            or a JSON list of `dashboard_cli` job records.
+        output_format (str, optional): `sacct` or `json`. Defaults to `json` for `.json` files and `sacct` otherwise.
+    """
+
+    name = "replay"
+
+    def __init__(self, path, output_format=None):
+        self.path = path
+        self.output_format = output_format or (
+            "json" if str(path).endswith(".json") else "sacct"
+        )
+        with open(path) as infile:
+            if self.output_format == "json":
+                self._records = json.load(infile)
+            else:
+                header, *lines = infile.read().strip().split("\n")
+                fields = header.split("|")
+                self._records = [dict(zip(fields, line.split("|"))) for line in lines]
+
+    def fetch(self, job_ids, fields):
+        """
+        Get the recorded output for one chunk of job IDs.
+
+        Args:
+            job_ids (list): Job IDs to look up. Job steps (e.g. `123.batch`) are included with their job.
+            fields (list): Fields to return, in order.
+
+        Returns:
+            list: Lines of `sacct --parsable2` output starting with the header, or job records as dictionaries.
+        """
+        job_ids = {str(jobid) for jobid in job_ids}
+        if self.output_format == "json":
+            output = [
+                {field: record.get(field) for field in fields if field in record}
+                for record in self._records
+                if str(record.get("jobid")) in job_ids
+            ]
+        else:
+            output = ["|".join(fields)] + [
+                "|".join(record.get(field, "") for field in fields)
+                for record in self._records
+                if record.get("JobID", "").split(".")[0] in job_ids
+            ]
+        return output
+
+
+def extract_jobids(logfile):
+    """
+    Get the unique SLURM job IDs submitted in a Snakemake or Nextflow log.
+
+    See [](`~ccbr_tools.logscan.scan_log`) for the log formats that are supported.
+
+    Args:
+        logfile (str or pathlib.Path): Path to the log file.
+
+    Returns:
+        list: Sorted job IDs.
+    """
+    return sorted(
+        {
+            event.jobid
+            for event in scan_log(logfile)
+            if event.kind == "submit" and event.jobid
+        }
+    )
+
+
+def get_arg_limit():
+    """
+    Get the number of characters available for the job list of a single accounting command.
+
+    The job list is passed as one argument (e.g. `sacct -j a,b,c`), so it must fit within
+    both the total argv/environment budget (`ARG_MAX`) and the per-argument limit
+    (`MAX_ARG_STRLEN` on Linux).
+
+    Returns:
+        int: The maximum length of the comma-separated job list.
+    """
+    try:
+        arg_max = os.sysconf("SC_ARG_MAX")
+    except (AttributeError, ValueError, OSError):
+        arg_max = MAX_ARG_STRLEN
+    env_size = sum(len(key) + len(value) + 2 for key, value in os.environ.items())
+    return max(
+        min(arg_max - env_size, MAX_ARG_STRLEN) - ARG_MARGIN,
+        MIN_ARG_LEN,
+    )
+
+
+def chunk_job_ids(job_ids, max_chars=None, max_jobs=MAX_JOBS_PER_CALL):
+    """
+    Split job IDs into chunks whose comma-separated length fits on one command line.
+
+    Args:
+        job_ids (list): Job IDs to split.
+        max_chars (int, optional): Maximum length of each comma-separated chunk.
+            Defaults to the limit from [](`~ccbr_tools.accounting.get_arg_limit`).
+        max_jobs (int, optional): Maximum number of job IDs per chunk. Defaults to `MAX_JOBS_PER_CALL`.
+
+    Returns:
+        list: A list of job ID lists, in the original order.
+    """
+    if max_chars is None:
+        max_chars = get_arg_limit()
+    chunks = []
+    chunk = []
+    chunk_len = 0
+    for jobid in map(str, job_ids):
+        if chunk and (chunk_len + len(jobid) + 1 > max_chars or len(chunk) >= max_jobs):
+            chunks.append(chunk)
+            chunk = []
+            chunk_len = 0
+        chunk_len += len(jobid) + (1 if chunk else 0)
+        chunk.append(jobid)
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def parse_times_to_seconds(times, warn=True):
+    """
+    Convert a whole column of SLURM times like '1-02:03:04', '02:03:04', '37:55.869', or '55.869' to seconds.
+
+    Each distinct value is parsed once. Empty or missing values become NaN. Invalid values
+    (e.g. `UNLIMITED`) also become NaN and, with `warn`, are reported together in a single warning.
+
+    Args:
+        times (pandas.Series or list): SLURM time strings.
+        warn (bool, optional): Whether to warn about invalid values. Defaults to True.
+
+    Returns:
+        numpy.ndarray: Times in seconds as floats.
+    """
+    codes, uniques = pd.factorize(
+        pd.Series(times, dtype="object").fillna("").astype(str).str.strip()
+    )
+    uniques = pd.Series(uniques, dtype="object")
+    parts = uniques.str.extract(SLURM_TIME_PATTERN).astype(float)
+    seconds = np.round(
+        parts["days"].fillna(0).to_numpy() * 86400
+        + np.trunc(parts["hours"].fillna(0).to_numpy()) * 3600
+        + np.trunc(parts["minutes"].fillna(0).to_numpy()) * 60
+        + parts["seconds"].to_numpy()
+    )
+    if warn:
+        invalid = (parts["seconds"].isna() & (uniques != "")).to_numpy()
+        warn_invalid_values(uniques.to_numpy()[codes][invalid[codes]], "time")
+    return seconds[codes]
+
+
+def parse_mems_to_gb(mems, unitless_to_gb=MEM_UNITS_TO_GB[""], warn=True):
+    """
+    Convert a whole column of SLURM memory sizes like '4000M', '4G', '102400K' or '4 GB' to GB.
+
+    Each distinct value is parsed once. Empty or missing values become NaN. Invalid values
+    (e.g. `-`) also become NaN and, with `warn`, are reported together in a single warning.
+
+    Args:
+        mems (pandas.Series or list): SLURM memory strings.
+        unitless_to_gb (float, optional): GB per unit of values without a unit suffix.
+            Defaults to kilobytes; use e.g. `1 / 1024**3` for values in bytes.
+        warn (bool, optional): Whether to warn about invalid values. Defaults to True.
+
+    Returns:
+        numpy.ndarray: Memory in GB as floats.
+    """
+    codes, uniques = pd.factorize(
+        pd.Series(mems, dtype="object").fillna("").astype(str).str.strip()
+    )
+    uniques = pd.Series(uniques, dtype="object")
+    parts = uniques.str.extract(SLURM_MEM_PATTERN)
+    units_to_gb = {**MEM_UNITS_TO_GB, "": unitless_to_gb}
+    gigabytes = (
+        parts["value"].astype(float).to_numpy()
+        * parts["unit"].map(units_to_gb).astype(float).to_numpy()
+    )
+    if warn:
+        invalid = (parts["value"].isna() & (uniques != "")).to_numpy()
+        warn_invalid_values(uniques.to_numpy()[codes][invalid[codes]], "memory")
+    return gigabytes[codes]
+
+
+def warn_invalid_values(invalid_values, value_type):
+    """Emit one warning summarizing all invalid values of a column, if there are any."""
+    if len(invalid_values) > 0:
+        examples = ", ".join(pd.unique(pd.Series(invalid_values, dtype="object"))[:5])
+        warnings.warn(
+            f"❌ Invalid {value_type} format in {len(invalid_values)} value(s), e.g. {examples}. These will be set to NaN."
+        )
@@ -0,0 +1,306 @@
+"""
+Benchmark the `jobby` hot path on synthetic pipeline runs, without a cluster.
+
+ABOUT:
+    Each run size gets a synthetic Snakemake or Nextflow log and accounting data from
+    [](`~ccbr_tools.sacct_fixtures`). `jobby` is then driven through its stages, and each stage is timed:
+
+    - `log_scan`: find the submitted job IDs in the log ([](`~ccbr_tools.jobby.extract_jobids_from_file`)).
+    - `sacct`: query and parse the accounting records ([](`~ccbr_tools.jobby.list_records`)), either through a
+      local stand-in for the `sacct` executable (`exec`, the real subprocess path) or by replaying a recorded
+      `sacct --parsable2` file in-process (`replay`, see [](`~ccbr_tools.accounting.ReplayBackend`)).
+    - `normalize`: convert the records to a table ([](`~ccbr_tools.jobby.records_to_df`)).
+    - `format`: format the table for output ([](`~ccbr_tools.jobby.format_df`)).
+
+    Each run size is benchmarked in a fresh process, so the reported peak RSS (resident memory) is that of the
+    run alone. The sacct cache is not used. Results can be saved as JSON and compared with a later benchmark
+    (`--baseline`) to catch regressions before a release.
+
+USAGE:
+    ```
+    python -m ccbr_tools.job_benchmark [--sizes 1000,10000,100000] [--log snakemake|nextflow] [--backend exec|replay]
+    python -m ccbr_tools.job_benchmark --json > baseline.json
+    python -m ccbr_tools.job_benchmark --baseline baseline.json [--tolerance 1.5]
+    ```
+
+EXAMPLES:
+    ```python
+    from ccbr_tools.job_benchmark import run_benchmark
+    result = run_benchmark(1000, "/tmp/jobby_benchmark", log_format="nextflow")
+    ```
+"""
+
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import pathlib
+import resource
+import sys
+import tempfile
+import time
+
+import click
+import pandas as pd
+
+from .accounting import ReplayBackend
+from .jobby import extract_jobids_from_file, format_df, list_records, records_to_df
+from .sacct_fixtures import (
+    generate_job_ids,
+    write_nextflow_log,
+    write_sacct_fixture,
+    write_sacct_stand_in,
+    write_snakemake_log,
+)
+
+BENCHMARK_SIZES = (1000, 10000, 100000)
+BENCHMARK_STAGES = ("log_scan", "sacct", "normalize", "format")
+# slowdown relative to the baseline that counts as a regression
+BENCHMARK_TOLERANCE = 1.5
+# stages faster than this in the baseline are too noisy to compare
+BENCHMARK_MIN_SECONDS = 0.05
+LOG_WRITERS = {"snakemake": write_snakemake_log, "nextflow": write_nextflow_log}
+
+
+def get_peak_rss_mb():
+    """Get the peak resident memory of the current process in MB."""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes on Linux
+    return max_rss / 1024**2 if sys.platform == "darwin" else max_rss / 1024
+
+
+def run_benchmark(
+    n_jobs,
+    workdir,
+    log_format="snakemake",
+    backend="exec",
+    workers=1,
+    output_format="tsv",
+    extended=False,
+    seed=0,
+):
+    """
+    Benchmark the stages of `jobby` on one synthetic pipeline run.
+
+    Args:
+        n_jobs (int): Number of jobs in the run.
+        workdir (str or pathlib.Path): Directory for the log, the sacct fixture and the stand-in executable.
+        log_format (str, optional): `snakemake` or `nextflow`. Defaults to "snakemake".
+        backend (str, optional): `exec` to call the `sacct` stand-in, or `replay` to read the sacct fixture
+            in-process. Defaults to "exec".
+        workers (int, optional): Number of concurrent `sacct` workers. Defaults to 1.
+        output_format (str, optional): Output format to time, see [](`~ccbr_tools.jobby.format_df`). Defaults to "tsv".
+        extended (bool, optional): Also query the extended sacct fields. Defaults to False.
+        seed (int, optional): Seed for the synthetic jobs. Defaults to 0.
+
+    Returns:
+        dict: The run parameters, the number of jobs found and records reported, the seconds of each of
+            `BENCHMARK_STAGES` (e.g. `sacct_sec`), `total_sec`, and the peak RSS of the process in MB.
+    """
+    workdir = pathlib.Path(workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    job_ids = generate_job_ids(n_jobs)
+    logfile = workdir / (
+        "snakemake.log" if log_format == "snakemake" else ".nextflow.log"
+    )
+    LOG_WRITERS[log_format](logfile, job_ids, seed=seed)
+    sacct_backend = None
+    path = os.environ.get("PATH", "")
+    if backend == "replay":
+        write_sacct_fixture(workdir / "sacct.txt", job_ids, seed=seed)
+        sacct_backend = ReplayBackend(workdir / "sacct.txt", output_format="sacct")
+    else:
+        bin_dir = write_sacct_stand_in(workdir / "bin", seed=seed).parent
+        os.environ["PATH"] = f"{bin_dir}{os.pathsep}{path}"
+    seconds = {}
+    try:
+        start = time.perf_counter()
+        found_ids = extract_jobids_from_file(logfile)
+        seconds["log_scan"] = time.perf_counter() - start
+        start = time.perf_counter()
+        records = list_records(
+            found_ids,
+            workers=workers,
+            sacct_rate=0,
+            extended=extended,
+            backend=sacct_backend,
+        )
+        seconds["sacct"] = time.perf_counter() - start
+        start = time.perf_counter()
+        df = records_to_df(records)
+        seconds["normalize"] = time.perf_counter() - start
+        start = time.perf_counter()
+        format_df(df, output_format)
+        seconds["format"] = time.perf_counter() - start
+    finally:
+        os.environ["PATH"] = path
+    return {
+        "n_jobs": n_jobs,
+        "log_format": log_format,
+        "backend": backend,
+        "workers": workers,
+        "n_found": len(found_ids),
+        "n_records": len(records),
+        **{f"{stage}_sec": round(seconds[stage], 3) for stage in BENCHMARK_STAGES},
+        "total_sec": round(sum(seconds.values()), 3),
+        "peak_rss_mb": round(get_peak_rss_mb(), 1),
+    }
+
+
+def run_benchmark_in_tmpdir(n_jobs, **kwargs):
+    """Run [](`~ccbr_tools.job_benchmark.run_benchmark`) in a temporary directory that is removed afterwards."""
+    with tempfile.TemporaryDirectory(prefix="jobby_benchmark_") as workdir:
+        result = run_benchmark(n_jobs, workdir, **kwargs)
+    return result
+
+
+def benchmark(sizes=BENCHMARK_SIZES, **kwargs):
+    """
+    Benchmark `jobby` on synthetic runs of several sizes, each in a fresh process.
+
+    Args:
+        sizes (list, optional): Numbers of jobs per run. Defaults to `BENCHMARK_SIZES`.
+        **kwargs: Passed on to [](`~ccbr_tools.job_benchmark.run_benchmark`).
+
+    Returns:
+        pandas.DataFrame: One row per run size.
+    """
+    results = []
+    for n_jobs in sizes:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            results.append(
+                pool.submit(run_benchmark_in_tmpdir, n_jobs, **kwargs).result()
+            )
+    return pd.DataFrame(results)
+
+
+def compare_to_baseline(
+    results, baseline, tolerance=BENCHMARK_TOLERANCE, min_seconds=BENCHMARK_MIN_SECONDS
+):
+    """
+    Find the stages that got slower than a baseline benchmark.
+
+    Runs are matched by number of jobs, log format, backend and workers.
+
+    Args:
+        results (pandas.DataFrame): New results from [](`~ccbr_tools.job_benchmark.benchmark`).
+        baseline (pandas.DataFrame): Earlier results to compare with.
+        tolerance (float, optional): Largest acceptable ratio of new to baseline time. Defaults to `BENCHMARK_TOLERANCE`.
+        min_seconds (float, optional): Ignore stages that took less than this in the baseline. Defaults to `BENCHMARK_MIN_SECONDS`.
+
+    Returns:
+        list: A message for each regression, e.g. `10000 jobs: sacct 2.10s -> 4.30s (2.05x)`.
+    """
+    keys = ["n_jobs", "log_format", "backend", "workers"]
+    merged = results.merge(baseline, on=keys, suffixes=("", "_baseline"))
+    regressions = []
+    for row in merged.to_dict(orient="records"):
+        for stage in (*BENCHMARK_STAGES, "total"):
+            new, old = row[f"{stage}_sec"], row[f"{stage}_sec_baseline"]
+            if old >= min_seconds and new > old * tolerance:
+                regressions.append(
+                    f"{row['n_jobs']} jobs: {stage} {old:.2f}s -> {new:.2f}s ({new / old:.2f}x)"
+                )
+    return regressions
+
+
+@click.command(context_settings={"help_option_names": ["-h", "--help"]})
+@click.option(
+    "--sizes",
+    default=",".join(str(size) for size in BENCHMARK_SIZES),
+    show_default=True,
+    help="Comma-separated numbers of jobs to benchmark.",
+)
+@click.option(
+    "--log",
+    "log_format",
+    type=click.Choice(list(LOG_WRITERS)),
+    default="snakemake",
+    show_default=True,
+    help="Format of the synthetic pipeline log.",
+)
+@click.option(
+    "--backend",
+    type=click.Choice(["exec", "replay"]),
+    default="exec",
+    show_default=True,
+    help="Call a stand-in sacct executable, or replay a sacct fixture in-process.",
+)
+@click.option(
+    "--workers", default=1, show_default=True, help="Concurrent sacct workers."
+)
+@click.option(
+    "--format",
+    "output_format",
+    default="tsv",
+    show_default=True,
+    help="jobby output format to time.",
+)
+@click.option("--extended", is_flag=True, help="Also query the extended sacct fields.")
+@click.option(
+    "--seed", default=0, show_default=True, help="Seed for the synthetic jobs."
+)
+@click.option("--json", "as_json", is_flag=True, help="Print the results as JSON.")
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False),
+    help="JSON results of an earlier benchmark. Exit with an error if any stage got slower.",
+)
+@click.option(
+    "--tolerance",
+    default=BENCHMARK_TOLERANCE,
+    show_default=True,
+    help="With --baseline, largest acceptable slowdown factor.",
+)
+def cli(
+    sizes,
+    log_format,
+    backend,
+    workers,
+    output_format,
+    extended,
+    seed,
+    as_json,
+    baseline,
+    tolerance,
+):
+    """
+    Benchmark jobby on synthetic Snakemake or Nextflow runs.
+
+    Reports the seconds spent in each stage (log scan, sacct, normalization, formatting)
+    and the peak resident memory of each run size.
+    """
+    results = benchmark(
+        sizes=[int(size) for size in sizes.split(",")],
+        log_format=log_format,
+        backend=backend,
+        workers=workers,
+        output_format=output_format,
+        extended=extended,
+        seed=seed,
+    )
+    click.echo(
+        results.to_json(orient="records", indent=2)
+        if as_json
+        else results.to_markdown(index=False)
+    )
+    if baseline:
+        with open(baseline) as infile:
+            regressions = compare_to_baseline(
+                results, pd.DataFrame(json.load(infile)), tolerance=tolerance
+            )
+        if regressions:
+            raise click.ClickException(
+                "Performance regressions:\n" + "\n".join(regressions)
+            )
+
+
+def main():
+    """Run the CLI."""
+    cli()
+
+
+if __name__ == "__main__":
+    main()
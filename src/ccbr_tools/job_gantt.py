@@ -0,0 +1,369 @@
+"""
+Render a Gantt chart of the jobs of a pipeline run as a self-contained SVG or HTML report.
+
+ABOUT:
+    Jobs are grouped by rule (or Nextflow process) and colored by state, so stragglers and idle gaps
+    stand out at a glance. Within each rule, jobs are packed into lanes so that jobs in the same lane
+    do not overlap in time.
+
+    The chart stays small and responsive for runs with 50k+ jobs: instead of one SVG element per job,
+    lanes are downsampled onto a grid of `width` time columns and at most about `max_rows` rows.
+    When several jobs fall into the same cell, the cell takes the color of the most severe state
+    (see `STATE_COLORS`), so a single failed job is never hidden by thousands of completed ones.
+    Each state is then drawn as a single SVG path, so the document has a handful of elements
+    regardless of the number of jobs. No JavaScript is needed, so the report can be e-mailed
+    with `send_email --attach-html`.
+
+    The HTML report adds a legend with job counts per state, the timeline summary from
+    [](`~ccbr_tools.job_timeline.summarize_timeline`) and a table of the longest-running jobs.
+
+USAGE:
+    ```
+    jobby gantt snakemake.log > timeline.html
+    jobby gantt .nextflow.log --svg [--width 1200] [--max-rows 400] > timeline.svg
+    ccbr_tools send-email --attach-html timeline.html
+    ```
+
+EXAMPLES:
+    ```python
+    from ccbr_tools.jobby import list_records, records_to_df
+    from ccbr_tools.job_gantt import render_gantt_html
+    html = render_gantt_html(records_to_df(list_records(job_ids)))
+    ```
+"""
+
+import heapq
+import html
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from .job_timeline import get_timeline_arrays, summarize_timeline
+
+# Colors of job states, from the most to the least severe.
+# When jobs overlap in a downsampled cell, the most severe state is drawn.
+STATE_COLORS = {
+    "FAILED": "#d62728",
+    "OUT_OF_MEMORY": "#9467bd",
+    "TIMEOUT": "#ff7f0e",
+    "NODE_FAIL": "#8c564b",
+    "CANCELLED": "#7f7f7f",
+    "OTHER": "#bcbd22",
+    "RUNNING": "#1f77b4",
+    "COMPLETED": "#2ca02c",
+}
+GANTT_WIDTH = 1200  # time columns (pixels) of the chart
+GANTT_MAX_ROWS = 400  # rows of the chart before lanes are downsampled
+GANTT_MAX_HEIGHT = 1600  # pixels
+GANTT_ROW_HEIGHT = (2, 12)  # min and max pixels per row
+GANTT_LABEL_WIDTH = 180  # pixels for rule names
+GANTT_AXIS_HEIGHT = 24  # pixels for the time axis
+GANTT_TICK_SECONDS = (60, 300, 900, 1800, 3600, 7200, 21600, 43200, 86400, 604800)
+GANTT_MAX_TICKS = 12
+GANTT_LONGEST_JOBS = 10  # rows in the table of longest-running jobs
+
+
+def get_state_keys(states):
+    """
+    Map job states to the keys of `STATE_COLORS`.
+
+    Args:
+        states (pandas.Series): Job states, e.g. `COMPLETED` or `CANCELLED by 12345`.
+
+    Returns:
+        pandas.Series: The first word of each state if it is in `STATE_COLORS`, or `OTHER`.
+    """
+    keys = states.fillna("").astype(str).str.split(" ").str[0]
+    return keys.where(keys.isin(list(STATE_COLORS)), "OTHER")
+
+
+def assign_lanes(start, end, groups):
+    """
+    Pack jobs into lanes within each group, so that jobs in the same lane do not overlap in time.
+
+    Jobs are placed in order of start time into the lane that became free first,
+    which uses as few lanes as the most jobs running at once in the group.
+
+    Args:
+        start (numpy.ndarray): Start times of jobs in epoch seconds.
+        end (numpy.ndarray): End times of jobs in epoch seconds.
+        groups (numpy.ndarray): Group (e.g. rule) of each job.
+
+    Returns:
+        tuple: The lane of each job within its group, and a dict of the number of lanes per group.
+    """
+    lanes = np.zeros(len(start), dtype=int)
+    n_lanes = {}
+    free = {}  # group -> heap of (end time, lane)
+    for idx in np.lexsort((start, groups)).tolist():
+        group = groups[idx]
+        heap = free.setdefault(group, [])
+        if heap and heap[0][0] <= start[idx]:
+            lane = heapq.heappop(heap)[1]
+        else:
+            lane = n_lanes.get(group, 0)
+            n_lanes[group] = lane + 1
+        lanes[idx] = lane
+        heapq.heappush(heap, (end[idx], lane))
+    return lanes, n_lanes
+
+
+def get_gantt_grid(df, width=GANTT_WIDTH, max_rows=GANTT_MAX_ROWS):
+    """
+    Downsample the jobs of a run onto a grid of rows (lanes grouped by rule) and time columns.
+
+    Jobs that have not started are left out. Jobs that are still running are drawn up to the latest
+    time in the run. If there are more lanes than `max_rows`, each rule gets a share of `max_rows`
+    proportional to its number of lanes (at least one row), and lanes are merged into those rows.
+
+    Args:
+        df (pandas.DataFrame): Job records with `JobState`, `QueuedTime`, `StartTime` and `EndTime`
+            columns, and optionally a `rule` column (defaults to `JobName`).
+        width (int, optional): Number of time columns. Defaults to `GANTT_WIDTH`.
+        max_rows (int, optional): Approximate maximum number of rows. Defaults to `GANTT_MAX_ROWS`.
+
+    Returns:
+        dict: `grid`, an array of rows by columns holding the index of the state in `STATE_COLORS`
+            (or -1 for empty cells); `rules`, a list of (rule, first row, number of rows, number of started jobs);
+            and the `start` and `end` of the time axis in epoch seconds.
+    """
+    times = get_timeline_arrays(df)
+    started = ~np.isnan(times["start"])
+    start = times["start"][started]
+    end = times["end"][started]
+    t_start = np.nanmin(start) if len(start) else 0.0
+    t_end = np.nanmax(np.concatenate([start, end])) if len(start) else 0.0
+    end = np.where(np.isnan(end), t_end, end)
+    rule_col = df["rule"] if "rule" in df.columns else df["JobName"]
+    rules = rule_col.fillna("").astype(str).to_numpy()[started]
+    priority = (
+        get_state_keys(df["JobState"])
+        .map({state: idx for idx, state in enumerate(STATE_COLORS)})
+        .to_numpy()[started]
+    )
+    lanes, n_lanes = assign_lanes(start, end, rules)
+    total_lanes = sum(n_lanes.values())
+    rule_rows = {
+        rule: (
+            n_rule_lanes
+            if total_lanes <= max_rows
+            else max(1, math.ceil(n_rule_lanes * max_rows / total_lanes))
+        )
+        for rule, n_rule_lanes in n_lanes.items()
+    }
+    offsets = dict(zip(rule_rows, np.cumsum([0, *rule_rows.values()])[:-1].tolist()))
+    rows = np.array(
+        [
+            offsets[rule] + lane * rule_rows[rule] // n_lanes[rule]
+            for rule, lane in zip(rules.tolist(), lanes.tolist())
+        ],
+        dtype=int,
+    )
+    seconds_per_col = max(t_end - t_start, 1.0) / width
+    col_start = np.clip(
+        ((start - t_start) // seconds_per_col).astype(int), 0, width - 1
+    )
+    col_end = np.maximum(
+        np.ceil((end - t_start) / seconds_per_col).astype(int), col_start + 1
+    )
+    grid = np.full((sum(rule_rows.values()), width), len(STATE_COLORS), dtype=int)
+    # where jobs overlap in a cell, keep the most severe state
+    for row, first_col, last_col, state in zip(
+        rows.tolist(), col_start.tolist(), col_end.tolist(), priority.tolist()
+    ):
+        cells = grid[row, first_col:last_col]
+        np.minimum(cells, state, out=cells)
+    grid[grid == len(STATE_COLORS)] = -1
+    n_jobs = pd.Series(rules).value_counts().to_dict()
+    return {
+        "grid": grid,
+        "rules": [
+            (rule, offsets[rule], n_rows, n_jobs[rule])
+            for rule, n_rows in rule_rows.items()
+        ],
+        "start": float(t_start),
+        "end": float(t_end),
+    }
+
+
+def get_time_ticks(duration, max_ticks=GANTT_MAX_TICKS):
+    """
+    Choose evenly spaced ticks for a time axis.
+
+    Args:
+        duration (float): Length of the axis in seconds.
+        max_ticks (int, optional): Maximum number of ticks. Defaults to `GANTT_MAX_TICKS`.
+
+    Returns:
+        list: Tick positions in seconds from the start of the axis, using the smallest of the
+            `GANTT_TICK_SECONDS` intervals that gives at most `max_ticks` ticks.
+    """
+    step = next(
+        (seconds for seconds in GANTT_TICK_SECONDS if duration / seconds < max_ticks),
+        GANTT_TICK_SECONDS[-1]
+        * math.ceil(duration / GANTT_TICK_SECONDS[-1] / max_ticks),
+    )
+    return [tick * step for tick in range(int(duration // step) + 1)]
+
+
+def format_elapsed(seconds):
+    """Format seconds as `[Nd ]HH:MM`, or an empty string if the number of seconds is unknown."""
+    elapsed = ""
+    if math.isfinite(seconds):
+        days, seconds = divmod(int(seconds), 86400)
+        hours, minutes = divmod(seconds // 60, 60)
+        elapsed = f"{f'{days}d ' if days else ''}{hours:02d}:{minutes:02d}"
+    return elapsed
+
+
+def render_gantt_svg(df, width=GANTT_WIDTH, max_rows=GANTT_MAX_ROWS):
+    """
+    Render a Gantt chart of jobs as a standalone SVG document.
+
+    See [](`~ccbr_tools.job_gantt.get_gantt_grid`) for how jobs are grouped and downsampled.
+    Each state is drawn as one SVG path, so the size of the document is bounded by the grid, not the number of jobs.
+
+    Args:
+        df (pandas.DataFrame): Job records, e.g. from [](`~ccbr_tools.jobby.records_to_df`),
+            optionally with a `rule` column.
+        width (int, optional): Width of the plot area in pixels (one time column per pixel). Defaults to `GANTT_WIDTH`.
+        max_rows (int, optional): Approximate maximum number of rows. Defaults to `GANTT_MAX_ROWS`.
+
+    Returns:
+        str: The SVG document.
+    """
+    gantt = get_gantt_grid(df, width=width, max_rows=max_rows)
+    grid = gantt["grid"]
+    n_rows = grid.shape[0]
+    min_height, max_height = GANTT_ROW_HEIGHT
+    row_height = min(max_height, max(min_height, GANTT_MAX_HEIGHT // max(n_rows, 1)))
+    x0, y0 = GANTT_LABEL_WIDTH, GANTT_AXIS_HEIGHT
+    svg_width = x0 + width + 10
+    svg_height = y0 + n_rows * row_height + 10
+    paths = {idx: [] for idx in range(len(STATE_COLORS))}
+    for row, cells in enumerate(grid):
+        changes = np.flatnonzero(np.diff(cells)) + 1
+        run_starts = np.concatenate([[0], changes]).tolist()
+        run_ends = np.concatenate([changes, [len(cells)]]).tolist()
+        states = cells[run_starts].tolist()
+        for run_start, run_end, state in zip(run_starts, run_ends, states):
+            if state >= 0:
+                paths[state].append(
+                    f"M{x0 + run_start},{y0 + row * row_height}"
+                    f"h{run_end - run_start}v{row_height}h{run_start - run_end}z"
+                )
+    duration = gantt["end"] - gantt["start"]
+    scale = width / max(duration, 1.0)
+    ticks = get_time_ticks(duration)
+    elements = [
+        (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{svg_width}" height="{svg_height}" '
+            f'viewBox="0 0 {svg_width} {svg_height}" font-family="sans-serif" font-size="11">'
+        ),
+        f"<title>Jobs from {time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(gantt['start']))}</title>",
+        '<g stroke="#e5e5e5">',
+        *(
+            f'<line x1="{x0 + tick * scale:.1f}" y1="{y0 - 4}" '
+            f'x2="{x0 + tick * scale:.1f}" y2="{svg_height - 10}"/>'
+            for tick in ticks
+        ),
+        *(
+            f'<line x1="0" y1="{y0 + first_row * row_height}" '
+            f'x2="{svg_width}" y2="{y0 + first_row * row_height}"/>'
+            for _, first_row, _, _ in gantt["rules"]
+        ),
+        "</g>",
+        *(
+            f'<text x="{x0 + tick * scale:.1f}" y="{y0 - 8}" text-anchor="middle">'
+            f"{format_elapsed(tick)}</text>"
+            for tick in ticks
+        ),
+        *(
+            f'<text x="{x0 - 6}" y="{y0 + (first_row + n_rule_rows / 2) * row_height + 4:.1f}" '
+            f'text-anchor="end"><title>{html.escape(rule)}: {n_jobs} jobs</title>'
+            f"{html.escape(rule[:28])}</text>"
+            for rule, first_row, n_rule_rows, n_jobs in gantt["rules"]
+            if n_rule_rows * row_height >= 10
+        ),
+        *(
+            f'<path fill="{color}" d="{"".join(paths[idx])}"><title>{state}</title></path>'
+            for idx, (state, color) in enumerate(STATE_COLORS.items())
+            if paths[idx]
+        ),
+        "</svg>",
+    ]
+    return "\n".join(elements)
+
+
+def render_gantt_html(df, width=GANTT_WIDTH, max_rows=GANTT_MAX_ROWS, title=None):
+    """
+    Render a self-contained HTML report with a Gantt chart of jobs.
+
+    The report contains a legend with the number of jobs per state, the chart from
+    [](`~ccbr_tools.job_gantt.render_gantt_svg`), the timeline summary from
+    [](`~ccbr_tools.job_timeline.summarize_timeline`) and the longest-running jobs.
+
+    Args:
+        df (pandas.DataFrame): Job records, e.g. from [](`~ccbr_tools.jobby.records_to_df`),
+            optionally with a `rule` column.
+        width (int, optional): Width of the chart in pixels. Defaults to `GANTT_WIDTH`.
+        max_rows (int, optional): Approximate maximum number of chart rows. Defaults to `GANTT_MAX_ROWS`.
+        title (str, optional): Title of the report. Defaults to "Job timeline".
+
+    Returns:
+        str: The HTML document.
+    """
+    title = html.escape(title or "Job timeline")
+    state_counts = get_state_keys(df["JobState"]).value_counts()
+    legend = " ".join(
+        f'<span class="state"><span class="swatch" style="background:{color}"></span>'
+        f"{state} ({state_counts[state]})</span>"
+        for state, color in STATE_COLORS.items()
+        if state in state_counts
+    )
+    summary = summarize_timeline(df)
+    summary_rows = "\n".join(
+        f"<tr><th>{key}</th><td>{value}</td></tr>" for key, value in summary.items()
+    )
+    times = get_timeline_arrays(df)
+    jobs = df.assign(
+        rule=df["rule"] if "rule" in df.columns else df["JobName"],
+        RuntimeSec=times["end"] - times["start"],
+    )
+    longest = (
+        jobs.dropna(subset=["RuntimeSec"])
+        .nlargest(GANTT_LONGEST_JOBS, "RuntimeSec")
+        .assign(Runtime=lambda x: x["RuntimeSec"].map(format_elapsed))
+        .loc[:, ["JobId", "rule", "JobState", "StartTime", "EndTime", "Runtime"]]
+    )
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 1em; }}
+.chart {{ overflow-x: auto; }}
+.state {{ margin-right: 1em; white-space: nowrap; }}
+.swatch {{ display: inline-block; width: 0.8em; height: 0.8em; margin-right: 0.3em; }}
+table {{ border-collapse: collapse; margin-top: 1em; }}
+th, td {{ text-align: left; padding: 0.15em 0.8em; border-bottom: 1px solid #e5e5e5; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<p>{len(df)} jobs, grouped by rule. {legend}</p>
+<div class="chart">
+{render_gantt_svg(df, width=width, max_rows=max_rows)}
+</div>
+<h2>Summary</h2>
+<table>
+{summary_rows}
+</table>
+<h2>Longest-running jobs</h2>
+{longest.to_html(index=False, border=0, na_rep="")}
+</body>
+</html>
+"""
@@ -0,0 +1,247 @@
+"""
+Timeline analysis of the jobs of a pipeline run: queue waits, concurrency, critical path and makespan.
+
+ABOUT:
+    `jobby` reports when each job was submitted, started and ended. This module turns those times
+    into arrays of epoch seconds and summarizes the run as a whole, to tell whether a slow run was limited by:
+
+    - scheduling: jobs spent a long time waiting in the SLURM queue;
+    - throttling: the pipeline kept a fixed number of jobs running (e.g. Snakemake `-j` or
+      Nextflow `queueSize`), so the number of running jobs sat at its maximum for most of the run;
+    - compute: a chain of jobs that ran one after another took up most of the run.
+
+    The critical path is estimated from the observed times only, as the chain of jobs with the
+    largest total runtime in which each job started after the previous one ended. Any real dependency
+    chain is such a chain, so the estimate is an upper bound on the critical path of the workflow.
+
+USAGE:
+    ```
+    jobby timeline snakemake.log [--tsv|--json|--yaml]
+    jobby timeline .nextflow.log --concurrency
+    ```
+
+EXAMPLES:
+    ```python
+    from ccbr_tools.jobby import list_records, records_to_df
+    from ccbr_tools.job_timeline import summarize_timeline
+    summary = summarize_timeline(records_to_df(list_records(job_ids)))
+    ```
+"""
+
+import numpy as np
+import pandas as pd
+
+# Quantiles of the queue wait reported by summarize_timeline
+QUEUE_WAIT_QUANTILES = (0.5, 0.9, 0.95)
+# Thresholds used by get_bottleneck
+CRITICAL_PATH_FRACTION_COMPUTE = 0.8
+QUEUE_WAIT_FRACTION_SCHEDULING = 0.5
+SATURATION_FRACTION_THROTTLING = 0.5
+
+
+def get_epoch_seconds(times):
+    """
+    Parse job times to seconds since the epoch.
+
+    Args:
+        times (pandas.Series or list): ISO 8601 times from sacct, e.g. `2025-01-01T00:01:00`.
+            Values such as `Unknown` or `None` (e.g. the end time of a running job) become NaN.
+
+    Returns:
+        numpy.ndarray: Seconds since the epoch as floats.
+    """
+    parsed = pd.to_datetime(
+        pd.Series(times, dtype="object"), errors="coerce", format="ISO8601"
+    )
+    seconds = (parsed - pd.Timestamp(0)) / pd.Timedelta(seconds=1)
+    return seconds.to_numpy(dtype=float, na_value=np.nan)
+
+
+def get_timeline_arrays(df):
+    """
+    Get the submit, start and end times of jobs as arrays of epoch seconds.
+
+    Args:
+        df (pandas.DataFrame): Job records with `QueuedTime`, `StartTime` and `EndTime` columns,
+            e.g. from [](`~ccbr_tools.jobby.records_to_df`).
+
+    Returns:
+        dict: Arrays `submit`, `start` and `end`, in the order of the rows of `df`.
+    """
+    return {
+        key: get_epoch_seconds(df[column])
+        for key, column in (
+            ("submit", "QueuedTime"),
+            ("start", "StartTime"),
+            ("end", "EndTime"),
+        )
+    }
+
+
+def get_concurrency(start, end):
+    """
+    Count the jobs running over time.
+
+    Args:
+        start (numpy.ndarray): Start times of jobs in epoch seconds.
+        end (numpy.ndarray): End times of jobs in epoch seconds.
+            Jobs without a start or end time are ignored.
+
+    Returns:
+        pandas.DataFrame: One row per distinct start or end time, with the number of jobs
+            `running` from that time until the next row.
+    """
+    ran = ~(np.isnan(start) | np.isnan(end))
+    times = np.concatenate([start[ran], end[ran]])
+    deltas = np.concatenate([np.ones(ran.sum(), int), -np.ones(ran.sum(), int)])
+    # at equal times, process ends before starts so back-to-back jobs are not counted twice
+    order = np.lexsort((deltas, times))
+    steps = pd.DataFrame({"time": times[order], "running": deltas[order].cumsum()})
+    return steps.groupby("time", sort=True).last().reset_index()
+
+
+def get_critical_path(start, end):
+    """
+    Find the chain of jobs with the largest total runtime in which each job started after the previous one ended.
+
+    This is weighted interval scheduling: jobs are processed in order of end time, and the best chain
+    ending with each job extends the best chain among the jobs that ended before it started.
+
+    Args:
+        start (numpy.ndarray): Start times of jobs in epoch seconds.
+        end (numpy.ndarray): End times of jobs in epoch seconds.
+            Jobs without a start or end time are ignored.
+
+    Returns:
+        tuple: The total runtime of the chain in seconds, and the indices of its jobs in order.
+    """
+    ran = np.flatnonzero(~(np.isnan(start) | np.isnan(end)))
+    ran = ran[np.argsort(end[ran], kind="stable")]
+    # number of jobs (by end time) that ended at or before each job started
+    n_before = np.searchsorted(end[ran], start[ran], side="right").tolist()
+    runtimes = (end[ran] - start[ran]).tolist()
+    best = [0.0]  # best[k]: total runtime of the longest chain among the first k jobs
+    best_last = [-1]  # best_last[k]: position of the last job of that chain
+    previous = []  # position of the job before each job in its longest chain
+    for pos, runtime in enumerate(runtimes):
+        length = best[n_before[pos]] + runtime
+        previous.append(best_last[n_before[pos]])
+        is_better = length > best[pos]
+        best.append(length if is_better else best[pos])
+        best_last.append(pos if is_better else best_last[pos])
+    path = []
+    pos = best_last[-1]
+    while pos >= 0:
+        path.append(int(ran[pos]))
+        pos = previous[pos]
+    return float(best[-1]), path[::-1]
+
+
+def get_bottleneck(summary):
+    """
+    Classify what most likely limited a run, from the metrics of [](`~ccbr_tools.job_timeline.summarize_timeline`).
+
+    Without the dependency graph of the workflow this is a heuristic: a pipeline that runs several
+    equally long branches side by side also keeps a constant number of jobs running.
+
+    Args:
+        summary (dict): Timeline summary with `queue_wait_fraction`, `saturation_fraction`,
+            `max_concurrency` and `critical_path_fraction`.
+
+    Returns:
+        str: `scheduling` if jobs spent most of their time waiting in the queue, `throttling` if more than
+            one job ran at a time and the number of running jobs was at its maximum for most of the run,
+            `compute` if the critical path took up most of the makespan, or `mixed` otherwise.
+    """
+    bottleneck = "mixed"
+    if summary["queue_wait_fraction"] >= QUEUE_WAIT_FRACTION_SCHEDULING:
+        bottleneck = "scheduling"
+    elif (
+        summary["max_concurrency"] > 1
+        and summary["saturation_fraction"] >= SATURATION_FRACTION_THROTTLING
+    ):
+        bottleneck = "throttling"
+    elif summary["critical_path_fraction"] >= CRITICAL_PATH_FRACTION_COMPUTE:
+        bottleneck = "compute"
+    return bottleneck
+
+
+def summarize_timeline(df, quantiles=QUEUE_WAIT_QUANTILES):
+    """
+    Summarize the timeline of the jobs of a pipeline run.
+
+    Reports:
+
+    - `n_jobs`, `n_finished`: number of jobs, and of jobs with both a start and an end time.
+    - `makespan_sec`: time from the first submission to the last end.
+    - `sum_runtime_sec`: total runtime of all finished jobs.
+    - `mean_concurrency`: `sum_runtime_sec / makespan_sec`, the average number of jobs running.
+    - `max_concurrency`: the most jobs running at once.
+    - `saturation_fraction`: fraction of the makespan with `max_concurrency` jobs running.
+    - `queue_wait_*`: mean, quantiles and max of the time between submission and start.
+    - `queue_wait_fraction`: queue wait as a fraction of queue wait plus runtime, summed over jobs.
+    - `critical_path_sec`, `critical_path_jobs`: total runtime and number of jobs of the critical path
+      (see [](`~ccbr_tools.job_timeline.get_critical_path`)).
+    - `critical_path_fraction`: `critical_path_sec / makespan_sec`.
+    - `bottleneck`: see [](`~ccbr_tools.job_timeline.get_bottleneck`).
+
+    Args:
+        df (pandas.DataFrame): Job records, e.g. from [](`~ccbr_tools.jobby.records_to_df`).
+        quantiles (tuple, optional): Quantiles of the queue wait to report. Defaults to `QUEUE_WAIT_QUANTILES`.
+
+    Returns:
+        dict: The timeline summary. Times are in seconds and fractions are rounded to 2 decimals.
+    """
+    times = get_timeline_arrays(df)
+    start, end = times["start"], times["end"]
+    runtime = end - start
+    queue_wait = times["start"] - times["submit"]
+    waited = queue_wait[~np.isnan(queue_wait)]
+    concurrency = get_concurrency(start, end)
+    firsts = np.concatenate([times["submit"], start])
+    firsts, lasts = firsts[~np.isnan(firsts)], end[~np.isnan(end)]
+    makespan = (
+        max(float(lasts.max() - firsts.min()), 0.0)
+        if len(firsts) and len(lasts)
+        else 0.0
+    )
+    durations = np.diff(concurrency["time"].to_numpy())
+    running = concurrency["running"].to_numpy()[:-1]
+    max_concurrency = int(concurrency["running"].max()) if len(concurrency) else 0
+    critical_path_sec, critical_path = get_critical_path(start, end)
+    sum_runtime = float(np.nansum(runtime))
+    summary = {
+        "n_jobs": len(df),
+        "n_finished": int((~np.isnan(runtime)).sum()),
+        "makespan_sec": makespan,
+        "sum_runtime_sec": sum_runtime,
+        "mean_concurrency": sum_runtime / makespan if makespan else np.nan,
+        "max_concurrency": max_concurrency,
+        "saturation_fraction": (
+            durations[running == max_concurrency].sum() / makespan
+            if makespan
+            else np.nan
+        ),
+        "queue_wait_mean_sec": waited.mean() if len(waited) else np.nan,
+        **{
+            f"queue_wait_p{round(quantile * 100)}_sec": (
+                np.quantile(waited, quantile) if len(waited) else np.nan
+            )
+            for quantile in quantiles
+        },
+        "queue_wait_max_sec": waited.max() if len(waited) else np.nan,
+        "queue_wait_fraction": (
+            np.nansum(queue_wait) / (np.nansum(queue_wait) + sum_runtime)
+            if np.nansum(queue_wait) + sum_runtime
+            else np.nan
+        ),
+        "critical_path_sec": critical_path_sec,
+        "critical_path_jobs": len(critical_path),
+        "critical_path_fraction": critical_path_sec / makespan if makespan else np.nan,
+    }
+    summary = {
+        key: round(float(value), 2) if isinstance(value, float) else value
+        for key, value in summary.items()
+    }
+    summary["bottleneck"] = get_bottleneck(summary)
+    return summary
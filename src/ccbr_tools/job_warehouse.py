@@ -0,0 +1,408 @@
+"""
+Append-only store of normalized `jobby` records across pipeline runs.
+
+ABOUT:
+    The job warehouse collects the job records of many pipeline runs in one local SQLite database,
+    so resource usage can be compared across runs without re-parsing logs or calling `sacct` again.
+    Each job is stored once per run, tagged with the pipeline name, pipeline version and run ID.
+    Rows are only ever inserted: ingesting the same run again adds only jobs that are not stored yet.
+
+    [](`~ccbr_tools.job_warehouse.summarize_usage`) computes grouped percentiles of memory use,
+    CPU efficiency and walltime, e.g. to find rules that chronically over-request resources.
+    [](`~ccbr_tools.job_warehouse.recommend_resources`) turns that history into right-sized
+    memory, CPU and walltime settings per rule, formatted as Snakemake or Nextflow configuration
+    by [](`~ccbr_tools.job_warehouse.format_recommendations`).
+
+USAGE:
+    ```
+    jobby ingest snakemake.log --pipeline RENEE --pipeline-version v2.5.12 [--run-id ID] [--warehouse PATH]
+    jobby query [--by rule] [--pipeline NAME] [--state STATE] [--since DATE] [--warehouse PATH]
+    jobby recommend --pipeline RENEE [--config cluster-json|snakemake-profile|nextflow]
+    ```
+
+EXAMPLES:
+    ```python
+    from ccbr_tools.job_warehouse import JobWarehouse, summarize_usage
+    with JobWarehouse() as warehouse:
+        summary = summarize_usage(warehouse.load_jobs(pipeline="RENEE"))
+    ```
+"""
+
+import json
+import os
+import pathlib
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+# Columns stored for each job, with their SQLite types
+WAREHOUSE_COLUMNS = {
+    "run_id": "TEXT NOT NULL",
+    "pipeline": "TEXT",
+    "pipeline_version": "TEXT",
+    "ingested_at": "TEXT NOT NULL",
+    "JobId": "TEXT NOT NULL",
+    "JobName": "TEXT",
+    "rule": "TEXT",
+    "JobState": "TEXT",
+    "NumNodes": "INTEGER",
+    "NumCPUs": "INTEGER",
+    "CPUEfficiency": "REAL",
+    "ReqMemGB": "REAL",
+    "MaxMemUsedGB": "REAL",
+    "ExitCode": "INTEGER",
+    "KillSignal": "INTEGER",
+    "ElapsedSec": "REAL",
+    "TimelimitSec": "REAL",
+    "NodeList": "TEXT",
+    "StartTime": "TEXT",
+    "EndTime": "TEXT",
+    "QueuedTime": "TEXT",
+    "WorkDir": "TEXT",
+}
+WAREHOUSE_INDEXES = {
+    "idx_jobs_rule": ("pipeline", "rule"),
+    "idx_jobs_jobname": ("JobName",),
+    "idx_jobs_state": ("JobState",),
+    "idx_jobs_start": ("StartTime",),
+}
+# Metrics summarized by summarize_usage
+USAGE_METRICS = (
+    "MaxMemUsedGB",
+    "MemUsedFraction",
+    "CPUEfficiency",
+    "ElapsedSec",
+    "TimeUsedFraction",
+)
+USAGE_QUANTILES = (0.5, 0.95)
+NUMERIC_COLUMNS = (
+    "NumCPUs",
+    "ReqMemGB",
+    "MaxMemUsedGB",
+    "CPUEfficiency",
+    "ElapsedSec",
+    "TimelimitSec",
+)
+# Defaults for recommend_resources: recommend the p95 of usage plus 20%
+RECOMMEND_QUANTILE = 0.95
+RECOMMEND_HEADROOM = 1.2
+RECOMMEND_FORMATS = ("cluster-json", "snakemake-profile", "nextflow")
+
+
+def get_warehouse_path():
+    """
+    Get the default path of the job warehouse database.
+
+    Returns:
+        pathlib.Path: `$XDG_DATA_HOME/ccbr_tools/jobby_warehouse.sqlite`, where `XDG_DATA_HOME` defaults to `~/.local/share`.
+    """
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(
+        os.path.expanduser("~"), ".local", "share"
+    )
+    return pathlib.Path(data_home) / "ccbr_tools" / "jobby_warehouse.sqlite"
+
+
+class JobWarehouse:
+    """
+    Append-only SQLite store of job records from many pipeline runs.
+
+    Args:
+        path (str or pathlib.Path, optional): Path to the SQLite database.
+            Defaults to [](`~ccbr_tools.job_warehouse.get_warehouse_path`).
+
+    Examples:
+        >>> with JobWarehouse("jobby_warehouse.sqlite") as warehouse:
+        ...     warehouse.add_jobs(records_df, run_id="run1", pipeline="RENEE")
+    """
+
+    def __init__(self, path=None):
+        self.path = pathlib.Path(path) if path else get_warehouse_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                + ", ".join(
+                    f"{col} {sql_type}" for col, sql_type in WAREHOUSE_COLUMNS.items()
+                )
+                + ", UNIQUE (run_id, JobId))"
+            )
+            for index_name, columns in WAREHOUSE_INDEXES.items():
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {index_name} ON jobs ({', '.join(columns)})"
+                )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
+
+    def add_jobs(self, df, run_id, pipeline=None, pipeline_version=None):
+        """
+        Append job records of one pipeline run.
+
+        Jobs that are already stored for this run are left unchanged.
+
+        Args:
+            df (pandas.DataFrame): Normalized job records, e.g. from [](`~ccbr_tools.jobby.records_to_df`).
+                Columns not in `WAREHOUSE_COLUMNS` are ignored, and missing columns are stored as NULL.
+                If there is no `rule` column, the job name is used as the rule.
+            run_id (str): Identifier of the pipeline run.
+            pipeline (str, optional): Pipeline name. Defaults to None.
+            pipeline_version (str, optional): Pipeline version. Defaults to None.
+
+        Returns:
+            int: The number of jobs added.
+        """
+        df = df.assign(
+            run_id=run_id,
+            pipeline=pipeline,
+            pipeline_version=pipeline_version,
+            ingested_at=time.strftime("%Y-%m-%dT%H:%M:%S"),
+        )
+        if "rule" not in df.columns and "JobName" in df.columns:
+            df["rule"] = df["JobName"]
+        df = df.reindex(columns=list(WAREHOUSE_COLUMNS))
+        rows = (
+            df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+        )
+        with self._conn:
+            n_before = self._conn.total_changes
+            self._conn.executemany(
+                f"INSERT OR IGNORE INTO jobs ({', '.join(WAREHOUSE_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(WAREHOUSE_COLUMNS))})",
+                rows,
+            )
+            n_added = self._conn.total_changes - n_before
+        return n_added
+
+    def load_jobs(self, pipeline=None, state=None, since=None, columns=None):
+        """
+        Load stored jobs, filtered in the database.
+
+        Args:
+            pipeline (str, optional): Only load jobs of this pipeline. Defaults to None (all pipelines).
+            state (str, optional): Only load jobs in this state, e.g. `COMPLETED`
+                (`CANCELLED` also matches `CANCELLED by 1234`). Defaults to None (all states).
+            since (str, optional): Only load jobs that started on or after this ISO date or time,
+                e.g. `2025-01-01`. Jobs without a start time are left out. Defaults to None.
+            columns (list, optional): Columns to load. Defaults to all `WAREHOUSE_COLUMNS`.
+
+        Returns:
+            pandas.DataFrame: The matching jobs.
+        """
+        filters = {
+            "pipeline = ?": pipeline,
+            "(JobState = ? OR JobState LIKE ? || ' %')": state,
+            # jobs that never started have a non-ISO StartTime like `Unknown`, which sorts after any date
+            "(StartTime GLOB '[0-9]*' AND StartTime >= ?)": since,
+        }
+        conditions = [condition for condition, value in filters.items() if value]
+        params = [
+            param
+            for condition, value in filters.items()
+            if value
+            for param in [value] * condition.count("?")
+        ]
+        query = f"SELECT {', '.join(columns or WAREHOUSE_COLUMNS)} FROM jobs"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        return pd.read_sql_query(query, self._conn, params=params)
+
+
+def summarize_usage(df, by=("pipeline", "rule"), quantiles=USAGE_QUANTILES):
+    """
+    Summarize resource usage of stored jobs by group.
+
+    For each group, reports the number of jobs and runs, the median requested memory, CPUs and time limit,
+    and the given quantiles of each of the `USAGE_METRICS`:
+
+    - `MaxMemUsedGB`: peak memory used.
+    - `MemUsedFraction`: peak memory used as a fraction of the requested memory.
+    - `CPUEfficiency`: CPU efficiency (%).
+    - `ElapsedSec`: walltime in seconds.
+    - `TimeUsedFraction`: walltime as a fraction of the time limit.
+
+    Low `MemUsedFraction` or `TimeUsedFraction` percentiles point to rules that over-request resources.
+
+    Args:
+        df (pandas.DataFrame): Jobs, e.g. from [](`~ccbr_tools.job_warehouse.JobWarehouse.load_jobs`).
+        by (tuple, optional): Columns to group by. Defaults to `("pipeline", "rule")`.
+        quantiles (tuple, optional): Quantiles to compute. Defaults to `USAGE_QUANTILES` (p50 and p95).
+
+    Returns:
+        pandas.DataFrame: One row per group, with metric columns such as `MaxMemUsedGB_p95`.
+    """
+    by = list(by)
+    df = coerce_numeric(df)
+    df = df.assign(
+        MemUsedFraction=df["MaxMemUsedGB"] / df["ReqMemGB"].where(df["ReqMemGB"] > 0),
+        TimeUsedFraction=df["ElapsedSec"]
+        / df["TimelimitSec"].where(df["TimelimitSec"] > 0),
+    )
+    grouped = df.groupby(by, dropna=False, sort=True)
+    summary = grouped.agg(
+        n_jobs=("JobId", "size"),
+        n_runs=("run_id", "nunique"),
+        ReqMemGB=("ReqMemGB", "median"),
+        NumCPUs=("NumCPUs", "median"),
+        TimelimitSec=("TimelimitSec", "median"),
+    )
+    percentiles = pd.concat(
+        {
+            f"{metric}_p{round(quantile * 100)}": grouped[metric].quantile(quantile)
+            for metric in USAGE_METRICS
+            for quantile in quantiles
+        },
+        axis=1,
+    )
+    return summary.join(percentiles).reset_index().round(2)
+
+
+def coerce_numeric(df):
+    """Convert the `NUMERIC_COLUMNS` to numbers (columns that are all NULL in the database are loaded as objects)."""
+    return df.assign(
+        **{
+            col: pd.to_numeric(df[col], errors="coerce")
+            for col in df.columns.intersection(NUMERIC_COLUMNS)
+        }
+    )
+
+
+def recommend_resources(
+    df, by="rule", quantile=RECOMMEND_QUANTILE, headroom=RECOMMEND_HEADROOM
+):
+    """
+    Recommend memory, CPUs and walltime for each rule or process from historical usage.
+
+    Each recommendation is the `quantile` of the observed usage times `headroom`, rounded up:
+
+    - `mem_gb`: peak memory used, in whole GB (at least 1).
+    - `cpus`: CPUs actually used (`NumCPUs * CPUEfficiency / 100`), at least 1 and at most the largest request.
+    - `time_min`: walltime, in whole minutes (at least 1).
+
+    Only pass jobs that ran to completion (e.g. `state="COMPLETED"` in
+    [](`~ccbr_tools.job_warehouse.JobWarehouse.load_jobs`)), since the walltime and memory of
+    cancelled or timed-out jobs are truncated.
+
+    Args:
+        df (pandas.DataFrame): Jobs, e.g. from [](`~ccbr_tools.job_warehouse.JobWarehouse.load_jobs`).
+        by (str, optional): Column with the rule or process name. Defaults to "rule".
+        quantile (float, optional): Quantile of usage to recommend. Defaults to `RECOMMEND_QUANTILE`.
+        headroom (float, optional): Factor to multiply the usage quantile by. Defaults to `RECOMMEND_HEADROOM`.
+
+    Returns:
+        pandas.DataFrame: One row per rule with the number of jobs, the median current request
+            (`ReqMemGB`, `NumCPUs`, `TimelimitSec`) and the recommendation (`mem_gb`, `cpus`, `time_min`).
+    """
+    df = coerce_numeric(df)
+    df = df.assign(UsedCPUs=df["NumCPUs"] * df["CPUEfficiency"] / 100)
+    grouped = df.groupby(by, sort=True)
+    recs = pd.DataFrame(
+        {
+            "n_jobs": grouped.size(),
+            "ReqMemGB": grouped["ReqMemGB"].median(),
+            "NumCPUs": grouped["NumCPUs"].median(),
+            "TimelimitSec": grouped["TimelimitSec"].median(),
+            "mem_gb": np.ceil(
+                grouped["MaxMemUsedGB"].quantile(quantile) * headroom
+            ).clip(lower=1),
+            "cpus": np.ceil(grouped["UsedCPUs"].quantile(quantile) * headroom).clip(
+                lower=1, upper=grouped["NumCPUs"].max()
+            ),
+            "time_min": np.ceil(
+                grouped["ElapsedSec"].quantile(quantile) * headroom / 60
+            ).clip(lower=1),
+        }
+    )
+    recs[["mem_gb", "cpus", "time_min"]] = recs[["mem_gb", "cpus", "time_min"]].astype(
+        "Int64"
+    )
+    return recs.reset_index()
+
+
+def format_recommendations(recs, config_format, by="rule"):
+    """
+    Format resource recommendations as a pipeline configuration snippet.
+
+    Args:
+        recs (pandas.DataFrame): Recommendations from [](`~ccbr_tools.job_warehouse.recommend_resources`).
+        config_format (str): One of the `RECOMMEND_FORMATS`:
+
+            - `cluster-json`: rule entries for a Snakemake `cluster.json` (`mem`, `threads`, `time`).
+            - `snakemake-profile`: `set-resources` (`mem_mb`, `runtime` in minutes) and `set-threads`
+              for a Snakemake profile `config.yaml`.
+            - `nextflow`: a `process` block with one `withName:` selector per process.
+        by (str, optional): Column with the rule or process name. Defaults to "rule".
+
+    Returns:
+        str: The configuration snippet. Resources without a recommendation (no usage data) are left out.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    rules = [
+        (
+            row[by],
+            {
+                key: int(row[key])
+                for key in ("mem_gb", "cpus", "time_min")
+                if not pd.isna(row[key])
+            },
+        )
+        for _, row in recs.iterrows()
+    ]
+    if config_format == "cluster-json":
+        out_str = json.dumps(
+            {
+                rule: {
+                    **({"mem": f"{res['mem_gb']}g"} if "mem_gb" in res else {}),
+                    **({"threads": res["cpus"]} if "cpus" in res else {}),
+                    **(
+                        {
+                            "time": f"{res['time_min'] // 60}:{res['time_min'] % 60:02d}:00"
+                        }
+                        if "time_min" in res
+                        else {}
+                    ),
+                }
+                for rule, res in rules
+            },
+            indent=4,
+        )
+    elif config_format == "snakemake-profile":
+        lines = ["set-resources:"]
+        for rule, res in rules:
+            lines.append(f"  {rule}:")
+            if "mem_gb" in res:
+                lines.append(f"    mem_mb: {res['mem_gb'] * 1024}")
+            if "time_min" in res:
+                lines.append(f"    runtime: {res['time_min']}")
+        lines.append("set-threads:")
+        lines.extend(f"  {rule}: {res['cpus']}" for rule, res in rules if "cpus" in res)
+        out_str = "\n".join(lines)
+    elif config_format == "nextflow":
+        lines = ["process {"]
+        for rule, res in rules:
+            lines.append(f"    withName: '{rule}' {{")
+            if "cpus" in res:
+                lines.append(f"        cpus = {res['cpus']}")
+            if "mem_gb" in res:
+                lines.append(f"        memory = '{res['mem_gb']} GB'")
+            if "time_min" in res:
+                lines.append(f"        time = '{res['time_min']}m'")
+            lines.append("    }")
+        lines.append("}")
+        out_str = "\n".join(lines)
+    else:
+        raise ValueError(
+            f"❌ Config format {config_format} not supported. Choose one of {', '.join(RECOMMEND_FORMATS)}."
+        )
+    return out_str
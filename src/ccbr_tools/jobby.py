@@ -15,16 +15,59 @@ ABOUT:
 FEATURES:
     - Parses SLURM job IDs from CLI args, `.nextflow.log`, and `snakemake.log`.
     - Queries SLURM using `sacct` to gather job information such as state, runtime, CPU/memory usage, etc.
+      Job IDs are batched into as few `sacct -j a,b,c` calls as the argument length limit allows,
+      and the batches can be queried concurrently with `--workers` (throttled by `--sacct-rate`).
+    - Caches sacct records of finished jobs (COMPLETED, FAILED, TIMEOUT, OUT_OF_MEMORY, CANCELLED) in a local
+      SQLite database, so repeated runs do not query sacct for them again. Disable with `--no-cache`.
+    - With `--incremental`, only the part of the log appended since the previous call is parsed, and only
+      new or still-running jobs are queried and reported. Progress is kept in `<log>.checkpoint.json`.
+    - With `--watch SECONDS`, keeps polling and re-queries only jobs that have not finished yet (and new jobs
+      appended to the log). The markdown table is redrawn in place; with `--json`, only new or changed rows
+      are printed as JSON lines.
     - Converts time fields to seconds, memory fields to GB, and calculates CPU efficiency.
-    - Supports multiple output formats: Markdown (default), TSV, JSON, and YAML.
+    - Supports multiple output formats: Markdown (default), TSV, JSON, NDJSON, and YAML,
+      plus the columnar formats Parquet and Arrow/Feather with typed columns (integer exit codes,
+      float GB, datetime start/end times) for loading and concatenating many runs downstream.
+    - `jobby ingest` appends the finished jobs of a run, tagged with the pipeline name, version and run ID,
+      to a local job warehouse (see [](`~ccbr_tools.job_warehouse`)), and `jobby query` reports p50/p95 memory use,
+      CPU efficiency and walltime by rule across all ingested runs.
+    - `jobby recommend` turns that history into right-sized `mem`/`cpus`/`time` settings per rule
+      (p95 of usage plus 20% headroom by default), as a Snakemake `cluster.json` or profile snippet,
+      or a Nextflow `withName:` config block.
+    - `jobby timeline` analyzes the run as a whole: queue waits, jobs running over time, the critical path
+      and makespan versus the sum of runtimes, to show whether a slow run was limited by scheduling,
+      throttling (`-j`/`queueSize`) or compute (see [](`~ccbr_tools.job_timeline`)).
+    - `jobby gantt` renders a self-contained HTML (or `--svg`) Gantt chart of all jobs, grouped by rule and
+      colored by state, to find stragglers and idle gaps (see [](`~ccbr_tools.job_gantt`)). Large runs are
+      downsampled, so the chart stays responsive for 50k+ jobs. Attach it to an e-mail with `send_email --attach-html`.
+    - With `--ndjson`, records are streamed as one JSON object per line as soon as each `sacct` call returns,
+      so tools like `jq` see results immediately and memory use does not grow with the number of jobs.
+    - With `--extended`, also report disk I/O (`MaxDiskReadGB`/`MaxDiskWriteGB`), GPUs (`NumGPUs`),
+      allocated and peak TRES usage (`AllocTRES`/`TRESUsageInMax`) and energy (`ConsumedEnergyJoules`).
+      Usage is aggregated as the max across all job steps (not just `.batch`), and the steps are listed in `Steps`.
+    - With `--replay FILE`, read recorded `sacct --parsable2` output instead of running `sacct`, e.g. to
+      re-run a report away from the cluster (see [](`~ccbr_tools.accounting.ReplayBackend`)).
     - Optionally include job log files and their contents for failed jobs (--outerr), or also for all jobs with --include-completed. These columns are never included when the output format is markdown.
+      Only the first and last 64 KiB of each log are read (`--log-bytes`), with a marker where the middle was
+      skipped, and the full log size is reported in `log_out_size`/`log_err_size`. Logs are read concurrently.
 
 USAGE:
     ```
-    jobby <jobid1> [jobid2 ...] [--tsv|--json|--yaml]
-    jobby <jobid1>,<jobid2> [--tsv|--json|--yaml]
-    jobby snakemake.log [--tsv|--json|--yaml] [--outerr] [--include-completed]
-    jobby .nextflow.log [--tsv|--json|--yaml] [--outerr] [--include-completed]
+    jobby <jobid1> [jobid2 ...] [--tsv|--json|--ndjson|--yaml]
+    jobby <jobid1>,<jobid2> [--tsv|--json|--ndjson|--yaml]
+    jobby snakemake.log [--tsv|--json|--ndjson|--yaml] [--outerr] [--include-completed]
+    jobby .nextflow.log [--tsv|--json|--ndjson|--yaml] [--outerr] [--include-completed] [--log-bytes N]
+    jobby .nextflow.log [--workers N] [--sacct-rate N] [--cache PATH|--no-cache]
+    jobby .nextflow.log --incremental [--checkpoint PATH]
+    jobby snakemake.log --parquet|--arrow > jobs.parquet
+    jobby snakemake.log --extended [--tsv|--json|--ndjson|--yaml]
+    jobby snakemake.log --replay sacct.txt
+    jobby ingest snakemake.log --pipeline NAME --pipeline-version VERSION [--run-id ID] [--warehouse PATH]
+    jobby query [--by pipeline,rule] [--pipeline NAME] [--state STATE] [--since DATE] [--warehouse PATH]
+    jobby recommend --pipeline NAME [--quantile Q] [--headroom H] [--config cluster-json|snakemake-profile|nextflow]
+    jobby snakemake.log --watch SECONDS [--json]
+    jobby timeline snakemake.log [--concurrency]
+    jobby gantt snakemake.log [--svg] [--width N] [--max-rows N] > timeline.html
     ```
 
 DEPENDENCIES:
@@ -32,6 +75,7 @@ DEPENDENCIES:
     - pandas (required)
     - numpy (required)
     - PyYAML (optional, required only for --yaml output)
+    - pyarrow (optional, required only for --parquet and --arrow output)
 
 EXAMPLES:
     ```sh
@@ -39,20 +83,62 @@ EXAMPLES:
     jobby snakemake.log --json
     jobby .nextflow.log --yaml
     jobby 12345678,12345679 --tsv
+    jobby snakemake.log --parquet > jobs.parquet
+    jobby snakemake.log --extended --tsv
     jobby .nextflow.log --outerr
     jobby .nextflow.log --outerr --include-completed
+    jobby .nextflow.log --workers 4
+    jobby snakemake.log --watch 60
+    jobby timeline .nextflow.log
+    jobby gantt snakemake.log > timeline.html
     ```
 """
 
+import collections
+import concurrent.futures
+import contextlib
+import functools
+import importlib.util
+import io
 import itertools
 import json
 import os
+import pathlib
 import re
+import sqlite3
 import subprocess
 import sys
+import threading
+import time
 import warnings
 
-from .paths import glob_files
+from .accounting import (
+    SLURM_MEM_PATTERN,
+    SLURM_TIME_PATTERN,
+    ReplayBackend,
+    SacctBackend,
+    chunk_job_ids,
+    extract_jobids,
+    parse_mems_to_gb,
+    parse_times_to_seconds,
+)
+from .job_gantt import (
+    GANTT_MAX_ROWS,
+    GANTT_WIDTH,
+    render_gantt_html,
+    render_gantt_svg,
+)
+from .job_timeline import get_concurrency, get_epoch_seconds, summarize_timeline
+from .job_warehouse import (
+    RECOMMEND_HEADROOM,
+    RECOMMEND_QUANTILE,
+    JobWarehouse,
+    format_recommendations,
+    recommend_resources,
+    summarize_usage,
+)
+from .logscan import get_complete_size, is_gzipped, scan_log
+from .paths import scan_files
 from .pkg_util import get_version
 
 # Graceful imports
@@ -94,6 +180,67 @@ SACCT_COLUMNS = {
     "Submit": "QueuedTime",
     "WorkDir": "WorkDir",
 }
+# Extra sacct columns for I/O, TRES and energy accounting (opt-in, see get_record_columns)
+SACCT_EXTENDED_COLUMNS = {
+    "MaxDiskRead": "MaxDiskReadGB",
+    "MaxDiskWrite": "MaxDiskWriteGB",
+    "AllocTRES": "AllocTRES",
+    "TRESUsageInMax": "TRESUsageInMax",
+    "ConsumedEnergyRaw": "ConsumedEnergyJoules",
+}
+# Usage fields folded from job steps into the job record as the max across all steps
+STEP_MAX_FIELDS = ("MaxRSS", "MaxDiskRead", "MaxDiskWrite", "ConsumedEnergyRaw")
+# Columns added by get_job_logs when job logs are requested
+LOG_COLUMNS = (
+    "log_out_path",
+    "log_out_txt",
+    "log_out_size",
+    "log_err_path",
+    "log_err_txt",
+    "log_err_size",
+)
+# Column types for the columnar output formats (see set_column_dtypes)
+INT_COLUMNS = (
+    "NumNodes",
+    "NumCPUs",
+    "ExitCode",
+    "KillSignal",
+    "log_out_size",
+    "log_err_size",
+    "NumGPUs",
+)
+FLOAT_COLUMNS = (
+    "CPUEfficiency",
+    "ReqMemGB",
+    "MaxMemUsedGB",
+    "MaxDiskReadGB",
+    "MaxDiskWriteGB",
+    "ConsumedEnergyJoules",
+)
+DATETIME_COLUMNS = ("StartTime", "EndTime", "QueuedTime")
+# Output formats written as binary data rather than text (require pyarrow)
+BINARY_FORMATS = ("parquet", "arrow")
+
+# Only the head and tail of large job logs are read (see read_log_excerpt)
+LOG_EXCERPT_BYTES = 64 * 1024  # bytes kept from each end of a log
+LOG_TRUNCATION_MARKER = "\n... [{skipped} bytes truncated by jobby] ...\n"
+LOG_READ_WORKERS = 8  # job logs are often on slow network filesystems
+# Job IDs in log file names, e.g. `slurm-12345.out`, `rule.12345.err` or array jobs `slurm-12345_7.out`
+LOG_JOBID_PATTERN = re.compile(r"\d+(?:_\d+)?")
+LOG_NUMBER_PATTERN = re.compile(r"\d+")
+
+# Default throttle for concurrent sacct calls (see list_records)
+SACCT_MAX_CALLS_PER_SECOND = 5
+
+# Job states that will not change anymore, so their sacct records can be cached
+TERMINAL_STATES = ("COMPLETED", "FAILED", "TIMEOUT", "OUT_OF_MEMORY", "CANCELLED")
+SACCT_CACHE_TTL_DAYS = 30
+SQLITE_MAX_VARIABLES = 500  # stay below SQLite's limit on query parameters
+
+# Units of the extended sacct columns (see accounting for the time and memory patterns)
+TRES_GPU_PATTERN = r"(?:^|,)gres/gpu=(\d+)"
+SLURM_UNIT_FACTORS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+BYTES_TO_GB = 1 / 1024**3  # sacct disk I/O values without a unit are in bytes
 
 
 def parse_time_to_seconds(t: str):
@@ -151,25 +298,306 @@ def parse_mem_to_gb(mem_str: str):
 
 
 def extract_jobids_from_file(filepath):
-    """Extract SLURM job IDs from a Snakemake or Nextflow log file."""
+    """
+    Extract SLURM job IDs from a Snakemake or Nextflow log file.
+
+    See [](`~ccbr_tools.accounting.extract_jobids`). Warns instead of raising if the file does not exist.
+    """
     job_ids = []
     try:
-        with open(filepath, "r") as f:
-            for line in f:
-                # Match Snakemake pattern: external jobid '12345' or "12345"
-                match_snakemake = re.search(r"external jobid\s+['\"](\d+)['\"]", line)
-                if match_snakemake:
-                    job_ids.append(match_snakemake.group(1))
-                else:
-                    # Match Nextflow pattern: (JOB ID: 12345)
-                    match_nextflow = re.search(
-                        r"\[Task submitter\].*?>\s*jobId:\s*(\d+);", line
-                    )
-                    if match_nextflow:
-                        job_ids.append(match_nextflow.group(1))
+        job_ids = extract_jobids(filepath)
     except FileNotFoundError:
         warnings.warn(f"❌ File not found: {filepath}")
-    return sorted(set(job_ids))  # deduplicate
+    return job_ids
+
+
+def get_log_checkpoint_path(logfile):
+    """Get the default path of the checkpoint sidecar file for a log, i.e. `<logfile>.checkpoint.json`."""
+    return pathlib.Path(f"{logfile}.checkpoint.json")
+
+
+def load_log_checkpoint(checkpoint_path):
+    """
+    Load a log checkpoint written by [](`~ccbr_tools.jobby.save_log_checkpoint`).
+
+    Args:
+        checkpoint_path (str or pathlib.Path): Path to the checkpoint file.
+
+    Returns:
+        dict: The checkpoint, with keys `inode`, `offset` and `jobs` (job ID -> last known state).
+            A fresh checkpoint is returned if the file does not exist or cannot be read.
+    """
+    checkpoint = {"inode": None, "offset": 0, "jobs": {}}
+    try:
+        with open(checkpoint_path, "r") as infile:
+            checkpoint.update(json.load(infile))
+    except FileNotFoundError:
+        pass
+    except (OSError, json.JSONDecodeError) as err:
+        warnings.warn(
+            f"⚠️ Could not read checkpoint {checkpoint_path}: {err}. Scanning the whole log."
+        )
+    return checkpoint
+
+
+def save_log_checkpoint(checkpoint_path, checkpoint):
+    """
+    Atomically write a log checkpoint.
+
+    Args:
+        checkpoint_path (str or pathlib.Path): Path to the checkpoint file.
+        checkpoint (dict): The checkpoint from [](`~ccbr_tools.jobby.scan_new_jobids`).
+    """
+    tmp_path = pathlib.Path(f"{checkpoint_path}.tmp")
+    with open(tmp_path, "w") as outfile:
+        json.dump(checkpoint, outfile)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def scan_new_jobids(logfile, checkpoint):
+    """
+    Scan only the part of a log appended since the last checkpoint.
+
+    The checkpoint stores the inode of the log and the byte offset where the previous scan
+    stopped. If the log was replaced or truncated, it is scanned from the start.
+    Gzipped logs are always scanned in full, because their uncompressed size is unknown.
+
+    Args:
+        logfile (str or pathlib.Path): Path to the Snakemake or Nextflow log.
+        checkpoint (dict): The previous checkpoint from [](`~ccbr_tools.jobby.load_log_checkpoint`).
+
+    Returns:
+        tuple: The sorted job IDs that are new or not yet in a terminal state, and the updated checkpoint.
+    """
+    stat = os.stat(logfile)
+    gzipped = is_gzipped(logfile)
+    stop = None if gzipped else get_complete_size(logfile)
+    start = checkpoint["offset"]
+    if gzipped or checkpoint["inode"] != stat.st_ino or start > stop:
+        start = 0
+    jobs = dict(checkpoint["jobs"])
+    for event in scan_log(logfile, start=start, stop=stop):
+        if event.kind == "submit":
+            jobs.setdefault(event.jobid, None)
+    job_ids = sorted(
+        jobid for jobid, state in jobs.items() if not is_terminal_state(state)
+    )
+    new_checkpoint = {
+        "log": str(pathlib.Path(logfile).resolve()),
+        "inode": stat.st_ino,
+        "offset": stop or 0,
+        "jobs": jobs,
+    }
+    return job_ids, new_checkpoint
+
+
+class RateLimiter:
+    """
+    Limit how often an action may happen, across all threads that share the limiter.
+
+    Args:
+        max_calls_per_second (float): Maximum number of calls per second. If falsy, calls are not limited.
+    """
+
+    def __init__(self, max_calls_per_second):
+        self.interval = 1.0 / max_calls_per_second if max_calls_per_second else 0.0
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    def wait(self):
+        """Block until the next call is allowed."""
+        with self._lock:
+            now = time.monotonic()
+            wait_time = max(self._next_time - now, 0.0)
+            self._next_time = max(now, self._next_time) + self.interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+def get_sacct_cache_path():
+    """
+    Get the default path of the sacct cache database.
+
+    Returns:
+        pathlib.Path: `$XDG_CACHE_HOME/ccbr_tools/jobby_sacct.sqlite`, where `XDG_CACHE_HOME` defaults to `~/.cache`.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return pathlib.Path(cache_home) / "ccbr_tools" / "jobby_sacct.sqlite"
+
+
+def is_terminal_state(state):
+    """Whether a sacct job state (e.g. `CANCELLED by 1234`) is one of `TERMINAL_STATES`."""
+    return bool(state) and state.split()[0] in TERMINAL_STATES
+
+
+class SacctCache:
+    """
+    Persistent SQLite cache of sacct records for jobs in terminal states.
+
+    Records of finished jobs do not change in the accounting database, so they can be reused
+    across `jobby` runs without calling `sacct` again. Log paths and contents are not cached.
+
+    Args:
+        path (str or pathlib.Path, optional): Path to the SQLite database.
+            Defaults to [](`~ccbr_tools.jobby.get_sacct_cache_path`).
+        ttl_days (float, optional): Records cached more than this many days ago are evicted
+            when the cache is opened. Defaults to `SACCT_CACHE_TTL_DAYS`.
+
+    Examples:
+        >>> with SacctCache("jobby_sacct.sqlite") as cache:
+        ...     records = list_records(["12345678"], cache=cache)
+    """
+
+    def __init__(self, path=None, ttl_days=SACCT_CACHE_TTL_DAYS):
+        self.path = pathlib.Path(path) if path else get_sacct_cache_path()
+        self.ttl_days = ttl_days
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sacct_records ("
+                "jobid TEXT PRIMARY KEY, state TEXT NOT NULL, "
+                "record TEXT NOT NULL, cached_at REAL NOT NULL)"
+            )
+        self.evict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
+
+    def evict(self):
+        """Remove records older than the TTL."""
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM sacct_records WHERE cached_at < ?",
+                (time.time() - self.ttl_days * 86400,),
+            )
+
+    def get_records(self, job_ids):
+        """
+        Get cached records for the given job IDs.
+
+        Args:
+            job_ids (list): Job IDs to look up.
+
+        Returns:
+            dict: Job records keyed by job ID, for the job IDs found in the cache.
+        """
+        job_ids = [str(jobid) for jobid in job_ids]
+        records = {}
+        for idx in range(0, len(job_ids), SQLITE_MAX_VARIABLES):
+            chunk = job_ids[idx : idx + SQLITE_MAX_VARIABLES]
+            rows = self._conn.execute(
+                "SELECT jobid, record FROM sacct_records "
+                f"WHERE jobid IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            records.update(
+                {
+                    jobid: {**json.loads(record), **dict.fromkeys(LOG_COLUMNS)}
+                    for jobid, record in rows
+                }
+            )
+        return records
+
+    def put_records(self, records):
+        """
+        Add records of jobs in terminal states to the cache. Other records are ignored.
+
+        Args:
+            records (list): Job records from [](`~ccbr_tools.jobby.list_records`).
+        """
+        now = time.time()
+        rows = [
+            (
+                record["JobId"],
+                record["JobState"],
+                json.dumps({k: v for k, v in record.items() if k not in LOG_COLUMNS}),
+                now,
+            )
+            for record in records
+            if record.get("JobId") and is_terminal_state(record.get("JobState"))
+        ]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sacct_records VALUES (?, ?, ?, ?)", rows
+            )
+
+
+def open_sacct_cache(path=None, ttl_days=SACCT_CACHE_TTL_DAYS):
+    """
+    Open the sacct cache, warning and returning None if it cannot be opened.
+
+    Args:
+        path (str or pathlib.Path, optional): Path to the SQLite database. Defaults to the default cache path.
+        ttl_days (float, optional): Cache TTL in days. Defaults to `SACCT_CACHE_TTL_DAYS`.
+
+    Returns:
+        SacctCache: The opened cache, or None.
+    """
+    cache = None
+    try:
+        cache = SacctCache(path, ttl_days=ttl_days)
+    except (OSError, sqlite3.Error) as err:
+        warnings.warn(
+            f"⚠️ Could not open sacct cache {path or get_sacct_cache_path()}: {err}. Continuing without a cache."
+        )
+    return cache
+
+
+@contextlib.contextmanager
+def sacct_cache_session(use_cache=True, cache_path=None, backend=None):
+    """
+    Open the sacct cache for the duration of a `with` block, closing it afterwards.
+
+    The cache only holds records from `sacct`. It is not used with other backends, such as
+    [](`~ccbr_tools.accounting.ReplayBackend`), so replayed or synthetic records never mix with real ones.
+
+    Args:
+        use_cache (bool, optional): Whether to use the sacct cache. Defaults to True.
+        cache_path (str, optional): Path to the sacct cache database. Defaults to [](`~ccbr_tools.jobby.get_sacct_cache_path`).
+        backend (AccountingBackend, optional): Backend the records come from. Defaults to running `sacct`.
+
+    Yields:
+        SacctCache: The opened cache, or None if it is not used or cannot be opened.
+    """
+    use_cache = use_cache and (backend is None or isinstance(backend, SacctBackend))
+    cache = open_sacct_cache(cache_path) if use_cache else None
+    try:
+        yield cache
+    finally:
+        if cache:
+            cache.close()
+
+
+def fetch_records(job_ids, use_cache=True, cache_path=None, backend=None, **kwargs):
+    """
+    Get the job records of job IDs with [](`~ccbr_tools.jobby.list_records`), using the sacct cache.
+
+    Args:
+        job_ids (list): Job IDs to query.
+        use_cache (bool, optional): Whether to use the sacct cache. Defaults to True.
+        cache_path (str, optional): Path to the sacct cache database. Defaults to [](`~ccbr_tools.jobby.get_sacct_cache_path`).
+        backend (AccountingBackend, optional): Backend that returns `sacct --parsable2` output. Defaults to running `sacct`.
+            The sacct cache is only used with `sacct`, see [](`~ccbr_tools.jobby.sacct_cache_session`).
+        **kwargs: Passed on to [](`~ccbr_tools.jobby.list_records`), e.g. `workers` and `sacct_rate`.
+
+    Returns:
+        list: The job records, or an empty list if there are no job IDs.
+    """
+    records = []
+    if job_ids:
+        with sacct_cache_session(use_cache, cache_path, backend) as cache:
+            records = list_records(job_ids, cache=cache, backend=backend, **kwargs)
+    return records
 
 
 def list_records(
@@ -178,129 +606,714 @@ def list_records(
     include_completed=False,
     completed_state="COMPLETED",
     success_exit_code=0,
+    batched=True,
+    workers=1,
+    sacct_rate=SACCT_MAX_CALLS_PER_SECOND,
+    cache=None,
+    log_bytes=LOG_EXCERPT_BYTES,
+    extended=False,
+    backend=None,
 ):
-    """List job records for the given job IDs."""
-    return list(
+    """
+    List job records for the given job IDs.
+
+    By default job IDs are queried in chunks with a single `sacct -j a,b,c` call per chunk
+    (see [](`~ccbr_tools.jobby.chunk_job_ids`)). Set `batched=False` to call `sacct` once per job ID.
+    With `workers > 1`, chunks are queried concurrently in a thread pool and the `sacct` calls
+    are throttled to `sacct_rate` calls per second across all workers.
+    Records are always returned in the order of `job_ids`, regardless of the number of workers.
+    If a [](`~ccbr_tools.jobby.SacctCache`) is given, jobs found in the cache are not queried again,
+    and newly queried jobs in terminal states are added to it.
+    With `include_out_err`, job logs are looked up in a shared [](`~ccbr_tools.jobby.JobLogIndex`),
+    and only the first and last `log_bytes` bytes of each job log are read
+    (see [](`~ccbr_tools.jobby.read_job_logs`)).
+    With `extended`, the I/O, TRES and energy fields in `SACCT_EXTENDED_COLUMNS` are also queried,
+    and usage is aggregated across all job steps (see [](`~ccbr_tools.jobby.merge_step_record`)).
+    Pass a `backend` such as [](`~ccbr_tools.accounting.ReplayBackend`) to read recorded `sacct` output
+    instead of running `sacct`.
+    To process records chunk by chunk as they arrive, use [](`~ccbr_tools.jobby.iter_record_chunks`).
+    """
+    order = {str(jobid): idx for idx, jobid in enumerate(job_ids)}
+    return sorted(
         itertools.chain.from_iterable(
-            [
-                get_sacct_info(
-                    jobid,
-                    include_out_err=include_out_err,
-                    include_completed=include_completed,
-                    completed_state=completed_state,
-                    success_exit_code=success_exit_code,
+            iter_record_chunks(
+                job_ids,
+                include_out_err=include_out_err,
+                include_completed=include_completed,
+                completed_state=completed_state,
+                success_exit_code=success_exit_code,
+                batched=batched,
+                workers=workers,
+                sacct_rate=sacct_rate,
+                cache=cache,
+                log_bytes=log_bytes,
+                extended=extended,
+                backend=backend,
+            )
+        ),
+        key=lambda record: order.get(record["JobId"], len(order)),
+    )
+
+
+def iter_record_chunks(
+    job_ids: list,
+    include_out_err=False,
+    include_completed=False,
+    completed_state="COMPLETED",
+    success_exit_code=0,
+    batched=True,
+    workers=1,
+    sacct_rate=SACCT_MAX_CALLS_PER_SECOND,
+    cache=None,
+    log_bytes=LOG_EXCERPT_BYTES,
+    extended=False,
+    backend=None,
+):
+    """
+    Yield job records chunk by chunk, as soon as each `sacct` call returns.
+
+    Cached records (if any) are yielded first, then the records of each chunk of job IDs in the
+    order of the chunks. Failed job IDs are warned about as their chunk is yielded.
+    Only the chunks in flight are held in memory.
+    Cached records are only reused by queries with the same `extended` setting,
+    since usage is aggregated across job steps differently.
+    See [](`~ccbr_tools.jobby.list_records`) for a description of the arguments.
+
+    Yields:
+        list: Job records as dictionaries.
+    """
+    # one log index for all chunks, so each working directory is walked only once
+    log_index = JobLogIndex()
+    sacct_kwargs = {
+        "include_out_err": include_out_err,
+        "include_completed": include_completed,
+        "completed_state": completed_state,
+        "success_exit_code": success_exit_code,
+        "log_bytes": log_bytes,
+        "log_index": log_index,
+        "extended": extended,
+        "backend": backend,
+    }
+    columns = get_record_columns(extended)
+    cached_records = {
+        jobid: {column: record[column] for column in columns}
+        for jobid, record in (cache.get_records(job_ids) if cache else {}).items()
+        if record.keys() == set(columns)
+    }
+    if cached_records:
+        for record in cached_records.values():
+            if include_out_err and needs_job_logs(
+                record["JobState"],
+                record["ExitCode"],
+                include_completed=include_completed,
+                completed_state=completed_state,
+                success_exit_code=success_exit_code,
+            ):
+                record.update(
+                    get_job_logs(
+                        record["JobId"],
+                        record["WorkDir"],
+                        include_text=False,
+                        log_index=log_index,
+                    )
                 )
-                for jobid in job_ids
-            ]
-        )
+        yield read_job_logs(list(cached_records.values()), log_bytes=log_bytes)
+    query_jobids = [jobid for jobid in job_ids if str(jobid) not in cached_records]
+    chunks = (
+        chunk_job_ids(query_jobids) if batched else [[jobid] for jobid in query_jobids]
     )
+    if workers > 1 and len(chunks) > 1:
+        query_chunk = functools.partial(
+            query_sacct, rate_limiter=RateLimiter(sacct_rate), **sacct_kwargs
+        )
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            yield from handle_query_results(pool.map(query_chunk, chunks), cache=cache)
+    else:
+        yield from handle_query_results(
+            (query_sacct(chunk, **sacct_kwargs) for chunk in chunks), cache=cache
+        )
 
 
-def get_sacct_info(
-    jobid,
+def handle_query_results(results, cache=None):
+    """
+    Warn about failed job IDs and cache the records of each [](`~ccbr_tools.jobby.query_sacct`) result.
+
+    Warnings are emitted from the calling thread (not from `sacct` worker threads), in job ID order.
+
+    Args:
+        results (iterable): Tuples of job records and failed job IDs.
+        cache (SacctCache, optional): Cache to add records of finished jobs to. Defaults to None.
+
+    Yields:
+        list: The job records of each result.
+    """
+    for records, failed_jobids in results:
+        warn_failed_jobids(failed_jobids)
+        if cache:
+            cache.put_records(records)
+        yield records
+
+
+def run_sacct(job_ids, columns=SACCT_COLUMNS, backend=None):
+    """
+    Run `sacct` for one or more job IDs.
+
+    Args:
+        job_ids (list): Job IDs to query with a single `sacct` call.
+        columns (dict, optional): sacct fields to request. Defaults to `SACCT_COLUMNS`.
+        backend (AccountingBackend, optional): Backend that returns `sacct --parsable2` output.
+            Defaults to [](`~ccbr_tools.accounting.SacctBackend`).
+
+    Returns:
+        list: The lines of `sacct --parsable2` output, starting with the header.
+    """
+    return (backend or SacctBackend()).fetch(job_ids, list(columns.keys()))
+
+
+def parse_sacct_output(
+    output,
     include_out_err=False,
     include_completed=False,
     completed_state="COMPLETED",
     success_exit_code=0,
+    log_index=None,
+    extended=False,
 ):
-    """Get sacct records for a job ID."""
+    """
+    Demultiplex `sacct --parsable2` rows into one raw record per base job ID.
+
+    Step rows (e.g. `12345.batch`, `12345.extern`) are folded into their parent job record.
+    By default only the memory usage of the `.batch` step is used. With `extended`, the usage
+    of all steps is aggregated instead (see [](`~ccbr_tools.jobby.merge_step_record`)).
+
+    Args:
+        output (list): Lines of sacct output, starting with the header.
+        include_out_err (bool, optional): Whether to include job log paths. Defaults to False.
+            The logs are read later by [](`~ccbr_tools.jobby.read_job_logs`).
+        include_completed (bool, optional): Whether to include logs for completed jobs. Defaults to False.
+        completed_state (str, optional): The state string that indicates a job is completed. Defaults to "COMPLETED".
+        success_exit_code (int, optional): The exit code that indicates a job was successful. Defaults to 0.
+        log_index (JobLogIndex, optional): Index of log files shared between jobs. Defaults to one index per call.
+        extended (bool, optional): Aggregate usage across all job steps. Defaults to False.
+
+    Returns:
+        dict: Raw sacct records keyed by base job ID, in the order they appear in the output.
+    """
     job_records = {}
-    try:
-        sacct_cmd = [
-            "sacct",
-            "-j",
-            str(jobid),
-            f"--format={','.join(SACCT_COLUMNS.keys())}",
-            "-P",
-            "--parsable2",
-        ]
-        output = subprocess.check_output(sacct_cmd, text=True).strip().split("\n")
-        header = output[0].split("|")
-        for line in output[1:]:
-            parts = line.split("|")
-            record_raw = dict(zip(header, parts))
-            base_jobid = record_raw.get("JobID", "").split(".")[0]
-            step_type = record_raw.get("JobID", "")
-            # optionally include job log files & contents
-            if include_out_err and (
-                include_completed
-                or (
-                    record_raw.get("State", "") != completed_state
-                    or int(record_raw.get("ExitCode", "").split(":")[0])
-                    != success_exit_code
+    log_index = log_index or JobLogIndex()
+    header = output[0].split("|")
+    for line in output[1:]:
+        parts = line.split("|")
+        record_raw = dict(zip(header, parts))
+        base_jobid = record_raw.get("JobID", "").split(".")[0]
+        step_type = record_raw.get("JobID", "")
+        # optionally include job log files & contents
+        if include_out_err and needs_job_logs(
+            record_raw.get("State", ""),
+            record_raw.get("ExitCode", ""),
+            include_completed=include_completed,
+            completed_state=completed_state,
+            success_exit_code=success_exit_code,
+        ):
+            record_raw.update(
+                get_job_logs(
+                    job_id=base_jobid,
+                    workdir=record_raw.get("WorkDir", None),
+                    include_text=False,
+                    log_index=log_index,
                 )
+            )
+        if base_jobid not in job_records:
+            # First time seeing this JobID: store info
+            job_records[base_jobid] = record_raw
+        elif extended:
+            merge_step_record(job_records[base_jobid], record_raw)
+        else:
+            # If this is .batch, update resource usage fields
+            if step_type.endswith(".batch"):
+                for resource_field in ("MaxRSS", "AveRSS", "MaxVMSize"):
+                    if record_raw.get(resource_field):
+                        job_records[base_jobid][resource_field] = record_raw[
+                            resource_field
+                        ]
+    return job_records
+
+
+def parse_slurm_number(value):
+    """
+    Parse a SLURM usage value to a number for comparisons.
+
+    Args:
+        value (str): A size or count with an optional K/M/G/T suffix (e.g. `1.5M`), or a time (e.g. `01:02:03`).
+
+    Returns:
+        float: The value in base units (e.g. bytes or seconds), or NaN if it cannot be parsed.
+    """
+    number = np.nan
+    value = (value or "").strip()
+    match = re.match(SLURM_MEM_PATTERN, value)
+    if match:
+        number = float(match.group("value")) * SLURM_UNIT_FACTORS[match.group("unit")]
+    else:
+        match = re.match(SLURM_TIME_PATTERN, value)
+        if match:
+            parts = match.groupdict(default="0")
+            number = (
+                float(parts["days"]) * 86400
+                + float(parts["hours"]) * 3600
+                + float(parts["minutes"]) * 60
+                + float(parts["seconds"])
+            )
+    return number
+
+
+def merge_tres(job_tres, step_tres):
+    """
+    Merge two TRES strings (e.g. `cpu=00:01:00,mem=1024K,fs/disk=2048`), keeping the max of each resource.
+
+    Args:
+        job_tres (str): TRES of the job so far.
+        step_tres (str): TRES of a job step.
+
+    Returns:
+        str: The merged TRES, with resources in order of first appearance.
+    """
+    merged = {}
+    for tres in (job_tres, step_tres):
+        for item in filter(None, (tres or "").split(",")):
+            name, _, value = item.partition("=")
+            if name not in merged or parse_slurm_number(value) > parse_slurm_number(
+                merged[name]
             ):
-                record_raw.update(
-                    get_job_logs(
-                        job_id=base_jobid, workdir=record_raw.get("WorkDir", None)
-                    )
+                merged[name] = value
+    return ",".join(f"{name}={value}" for name, value in merged.items())
+
+
+def merge_step_record(job_record, step_record):
+    """
+    Fold a job step row of sacct output into its job record.
+
+    The step name (e.g. `batch`, `extern`, `0`) is added to `Steps`, each of the `STEP_MAX_FIELDS`
+    keeps the max across all steps, and `TRESUsageInMax` keeps the max of each resource across all steps
+    (see [](`~ccbr_tools.jobby.merge_tres`)).
+
+    Args:
+        job_record (dict): Raw sacct record of the job. Modified in place.
+        step_record (dict): Raw sacct record of the step.
+
+    Returns:
+        dict: The updated job record.
+    """
+    step = step_record.get("JobID", "").partition(".")[2]
+    job_record["Steps"] = ",".join(filter(None, (job_record.get("Steps"), step)))
+    for field in STEP_MAX_FIELDS:
+        if step_record.get(field) and not (
+            parse_slurm_number(job_record.get(field))
+            >= parse_slurm_number(step_record[field])
+        ):
+            job_record[field] = step_record[field]
+    if step_record.get("TRESUsageInMax"):
+        job_record["TRESUsageInMax"] = merge_tres(
+            job_record.get("TRESUsageInMax"), step_record["TRESUsageInMax"]
+        )
+    return job_record
+
+
+def needs_job_logs(
+    state,
+    exit_code,
+    include_completed=False,
+    completed_state="COMPLETED",
+    success_exit_code=0,
+):
+    """
+    Whether job logs should be collected for a job with the given state and exit code.
+
+    Args:
+        state (str): The sacct job state.
+        exit_code (str): The sacct exit code, e.g. `0:0`.
+        include_completed (bool, optional): Whether to include logs for completed jobs. Defaults to False.
+        completed_state (str, optional): The state string that indicates a job is completed. Defaults to "COMPLETED".
+        success_exit_code (int, optional): The exit code that indicates a job was successful. Defaults to 0.
+
+    Returns:
+        bool: True if the job failed or `include_completed` is set.
+    """
+    return include_completed or (
+        state != completed_state or int(exit_code.split(":")[0]) != success_exit_code
+    )
+
+
+def get_sacct_columns(extended=False):
+    """Get the sacct fields to query, mapped to jobby column names, including `SACCT_EXTENDED_COLUMNS` if `extended`."""
+    return {**SACCT_COLUMNS, **(SACCT_EXTENDED_COLUMNS if extended else {})}
+
+
+def get_record_columns(extended=False):
+    """Get the names of the columns of a raw job record (see [](`~ccbr_tools.jobby.rename_sacct_record`))."""
+    return [
+        *get_sacct_columns(extended).values(),
+        *(["Steps"] if extended else []),
+        *LOG_COLUMNS,
+    ]
+
+
+def rename_sacct_record(record_raw, extended=False):
+    """Rename raw sacct fields to jobby column names and add the log columns (and `Steps` if `extended`)."""
+    sacct_fields = {new: old for old, new in get_sacct_columns(extended).items()}
+    return {
+        column: record_raw.get(sacct_fields.get(column, column), None)
+        for column in get_record_columns(extended)
+    }
+
+
+def query_sacct(
+    job_ids,
+    include_out_err=False,
+    include_completed=False,
+    completed_state="COMPLETED",
+    success_exit_code=0,
+    rate_limiter=None,
+    log_bytes=LOG_EXCERPT_BYTES,
+    log_index=None,
+    extended=False,
+    backend=None,
+):
+    """
+    Query sacct for a chunk of job IDs with a single `sacct` call, without emitting warnings.
+
+    Records are returned in the order of `job_ids`. If `sacct` fails for a chunk of several
+    job IDs (e.g. because one of them is invalid), each job ID is queried individually
+    so that only the bad job IDs are dropped.
+
+    Args:
+        job_ids (list): Job IDs to query.
+        include_out_err (bool, optional): Whether to include job log paths and contents. Defaults to False.
+        include_completed (bool, optional): Whether to include logs for completed jobs. Defaults to False.
+        completed_state (str, optional): The state string that indicates a job is completed. Defaults to "COMPLETED".
+        success_exit_code (int, optional): The exit code that indicates a job was successful. Defaults to 0.
+        rate_limiter (RateLimiter, optional): Limiter to wait on before each `sacct` call. Defaults to None.
+        log_bytes (int, optional): Number of bytes to read from each end of a job log. Defaults to `LOG_EXCERPT_BYTES`.
+        log_index (JobLogIndex, optional): Index of log files shared between chunks. Defaults to one index per call.
+        extended (bool, optional): Also query `SACCT_EXTENDED_COLUMNS` and aggregate usage across all job steps. Defaults to False.
+        backend (AccountingBackend, optional): Backend that returns `sacct --parsable2` output.
+            Defaults to [](`~ccbr_tools.accounting.SacctBackend`).
+
+    Returns:
+        tuple: A list of job records as dictionaries and a list of job IDs that `sacct` failed for.
+
+    Raises:
+        RuntimeError: If `sacct` is not installed.
+    """
+    sacct_kwargs = {
+        "include_out_err": include_out_err,
+        "include_completed": include_completed,
+        "completed_state": completed_state,
+        "success_exit_code": success_exit_code,
+        "rate_limiter": rate_limiter,
+        "log_bytes": log_bytes,
+        "log_index": log_index or JobLogIndex(),
+        "extended": extended,
+        "backend": backend,
+    }
+    job_ids = [str(jobid) for jobid in job_ids]
+    records = []
+    failed_jobids = []
+    try:
+        if rate_limiter:
+            rate_limiter.wait()
+        job_records = parse_sacct_output(
+            run_sacct(job_ids, columns=get_sacct_columns(extended), backend=backend),
+            include_out_err=include_out_err,
+            include_completed=include_completed,
+            completed_state=completed_state,
+            success_exit_code=success_exit_code,
+            log_index=sacct_kwargs["log_index"],
+            extended=extended,
+        )
+        order = {jobid: idx for idx, jobid in enumerate(job_ids)}
+        records = read_job_logs(
+            [
+                rename_sacct_record(job_records[jobid], extended=extended)
+                for jobid in sorted(
+                    job_records, key=lambda jobid: order.get(jobid, len(order))
                 )
-            if base_jobid not in job_records:
-                # First time seeing this JobID: store info
-                job_records[base_jobid] = record_raw
-            else:
-                # If this is .batch, update resource usage fields
-                if step_type.endswith(".batch"):
-                    for resource_field in ("MaxRSS", "AveRSS", "MaxVMSize"):
-                        if record_raw.get(resource_field):
-                            job_records[base_jobid][resource_field] = record_raw[
-                                resource_field
-                            ]
+            ],
+            log_bytes=log_bytes,
+        )
     except subprocess.CalledProcessError:
-        warnings.warn(f"❌ Failed to fetch info for JobID {jobid}")
+        if len(job_ids) > 1:
+            for jobid in job_ids:
+                job_records, job_failed = query_sacct([jobid], **sacct_kwargs)
+                records.extend(job_records)
+                failed_jobids.extend(job_failed)
+        else:
+            failed_jobids = job_ids
     except FileNotFoundError as err:
         raise RuntimeError(
             "❌ sacct command not found. Is SLURM installed?"
         ).with_traceback(err.__traceback__) from err
-    records = [
-        {
-            new: record_raw.get(old, None)
-            for old, new in itertools.chain(
-                SACCT_COLUMNS.items(),
-                {
-                    k: k
-                    for k in (
-                        "log_out_path",
-                        "log_out_txt",
-                        "log_err_path",
-                        "log_err_txt",
-                    )
-                }.items(),
+    return records, failed_jobids
+
+
+def warn_failed_jobids(job_ids):
+    """Warn about each job ID that sacct failed for."""
+    for jobid in job_ids:
+        warnings.warn(f"❌ Failed to fetch info for JobID {jobid}")
+
+
+def get_sacct_info(
+    jobid,
+    include_out_err=False,
+    include_completed=False,
+    completed_state="COMPLETED",
+    success_exit_code=0,
+):
+    """
+    Get sacct records for a job ID.
+
+    Deprecated: use [](`~ccbr_tools.jobby.list_records`), which queries many job IDs per `sacct` call.
+    """
+    warnings.warn(
+        "get_sacct_info() is deprecated, use list_records() instead.",
+        DeprecationWarning,
+        stacklevel=2,
+    )
+    records, failed_jobids = query_sacct(
+        [jobid],
+        include_out_err=include_out_err,
+        include_completed=include_completed,
+        completed_state=completed_state,
+        success_exit_code=success_exit_code,
+    )
+    warn_failed_jobids(failed_jobids)
+    return records
+
+
+def read_log_excerpt(
+    filepath, head_bytes=LOG_EXCERPT_BYTES, tail_bytes=LOG_EXCERPT_BYTES
+):
+    """
+    Read the head and tail of a log file without loading the rest of it.
+
+    If the file is larger than `head_bytes + tail_bytes`, the middle of the file is skipped
+    and replaced with `LOG_TRUNCATION_MARKER`, which states how many bytes were skipped.
+
+    Args:
+        filepath (str or pathlib.Path): Path to the log file.
+        head_bytes (int, optional): Number of bytes to read from the start of the file. Defaults to `LOG_EXCERPT_BYTES`.
+        tail_bytes (int, optional): Number of bytes to read from the end of the file. Defaults to `LOG_EXCERPT_BYTES`.
+            Read the whole file if either is None.
+
+    Returns:
+        tuple: The decoded text and the size of the file in bytes.
+    """
+    with open(filepath, "rb") as infile:
+        size = infile.seek(0, os.SEEK_END)
+        infile.seek(0)
+        if head_bytes is None or tail_bytes is None or size <= head_bytes + tail_bytes:
+            content = infile.read()
+        else:
+            head = infile.read(head_bytes)
+            infile.seek(size - tail_bytes)
+            tail = infile.read(tail_bytes)
+            marker = LOG_TRUNCATION_MARKER.format(
+                skipped=size - head_bytes - tail_bytes
             )
-        }
-        for jobid, record_raw in job_records.items()
+            content = head + marker.encode() + tail
+    return content.decode("utf-8", errors="replace"), size
+
+
+def read_slurm_log(
+    filepath, head_bytes=LOG_EXCERPT_BYTES, tail_bytes=LOG_EXCERPT_BYTES
+):
+    """
+    Reads the contents of a SLURM log file, escapes all special characters using JSON encoding,
+    and returns the escaped string without the outer quotes.
+
+    Only the head and tail of large files are read (see [](`~ccbr_tools.jobby.read_log_excerpt`)).
+
+    Args:
+        filepath (str): Path to the SLURM log file.
+        head_bytes (int, optional): Number of bytes to read from the start of the file. Defaults to `LOG_EXCERPT_BYTES`.
+        tail_bytes (int, optional): Number of bytes to read from the end of the file. Defaults to `LOG_EXCERPT_BYTES`.
+
+    Returns:
+        str: The contents of the file with special characters JSON-escaped and outer quotes removed.
+    """
+    content, _ = read_log_excerpt(
+        filepath, head_bytes=head_bytes, tail_bytes=tail_bytes
+    )
+    # JSON-escape all special characters (quotes, tabs, newlines, etc.)
+    safe_content = json.dumps(content)
+    # remove the outer quotes since json.dumps returns a JSON string literal
+    return safe_content[1:-1]
+
+
+def read_job_logs(records, log_bytes=LOG_EXCERPT_BYTES, workers=LOG_READ_WORKERS):
+    """
+    Read the job logs found by [](`~ccbr_tools.jobby.get_job_logs`) concurrently.
+
+    For every `log_out_path` and `log_err_path` in the records whose text has not been read yet,
+    the head and tail of the log are read in a thread pool, JSON-escaped and stored in
+    `log_out_txt`/`log_err_txt`, along with the full file size in `log_out_size`/`log_err_size`.
+
+    Args:
+        records (list): Job records. Modified in place.
+        log_bytes (int, optional): Number of bytes to read from each end of a log. Defaults to `LOG_EXCERPT_BYTES`.
+            Read whole logs if None.
+        workers (int, optional): Number of threads reading logs. Defaults to `LOG_READ_WORKERS`.
+
+    Returns:
+        list: The same job records.
+    """
+    log_keys = [
+        (record, key)
+        for record in records
+        for key in ("out", "err")
+        if record.get(f"log_{key}_path") and record.get(f"log_{key}_txt") is None
     ]
+    read_log = functools.partial(
+        read_log_excerpt, head_bytes=log_bytes, tail_bytes=log_bytes
+    )
+    filepaths = [record[f"log_{key}_path"] for record, key in log_keys]
+    if len(filepaths) > 1 and workers > 1:
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(workers, len(filepaths))
+        ) as pool:
+            contents = list(pool.map(read_log, filepaths))
+    else:
+        contents = [read_log(filepath) for filepath in filepaths]
+    for (record, key), (content, size) in zip(log_keys, contents):
+        record[f"log_{key}_txt"] = json.dumps(content)[1:-1]
+        record[f"log_{key}_size"] = size
     return records
 
 
-def read_slurm_log(filepath):
+class JobLogIndex:
+    """
+    Index of the job log files (`*.out`, `*.err`) under job working directories.
+
+    Each distinct working directory is walked once with [](`~ccbr_tools.paths.scan_files`) the first
+    time a job in it is looked up, and all later lookups are served from memory. This matters for
+    Snakemake, where every job shares the same working directory. The index can be shared between threads.
+
+    Log files match a job ID if the job ID is one of the numbers in the file name, e.g. `slurm-12345.out`
+    or `logs/bwa_2_12345.err` (array tasks like `slurm-12345_7.out` match both `12345_7` and `12345`).
+    Other job IDs match any log file name that contains them. Nextflow task logs (`.command.out`,
+    `.command.err`) match every job in their working directory.
+
+    Examples:
+        >>> log_index = JobLogIndex()
+        >>> log_index.get_files("12345", "/path/to/workdir", "err")
     """
-    Reads the contents of a SLURM log file, escapes all special characters using JSON encoding,
-    and returns the escaped string without the outer quotes.
+
+    def __init__(self):
+        self._dirs = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get_files(self, job_id, workdir, key):
+        """
+        Get the log files of a job.
+
+        Args:
+            job_id (str): The SLURM job ID.
+            workdir (str): The job's working directory.
+            key (str): The log type, `out` or `err`.
+
+        Returns:
+            list: Matching log files as sorted `pathlib.Path` objects.
+        """
+        dir_index = self._get_dir_index(str(workdir))
+        job_id = str(job_id)
+        if LOG_JOBID_PATTERN.fullmatch(job_id):
+            files = dir_index["jobs"].get((key, job_id), [])
+        else:
+            files = [path for name, path in dir_index["names"][key] if job_id in name]
+        return sorted(
+            {
+                pathlib.Path(path)
+                for path in itertools.chain(files, dir_index["commands"][key])
+            }
+        )
+
+    def _get_dir_index(self, workdir):
+        """Get the index of a working directory, walking it if this is the first lookup."""
+        with self._lock:
+            dir_lock = self._locks.setdefault(workdir, threading.Lock())
+        # only threads looking up the same working directory wait for each other
+        with dir_lock:
+            if workdir not in self._dirs:
+                self._dirs[workdir] = index_log_files(workdir)
+        return self._dirs[workdir]
+
+
+def index_log_files(workdir):
+    """
+    Walk a working directory once and index its job log files by job ID.
 
     Args:
-        filepath (str): Path to the SLURM log file.
+        workdir (str): The directory to search recursively.
 
     Returns:
-        str: The contents of the file with special characters JSON-escaped and outer quotes removed.
+        dict: Log file paths keyed by `(key, job_id)` under `jobs`, Nextflow task logs by key under `commands`,
+            and `(file name, path)` pairs by key under `names`, where `key` is `out` or `err`.
+    """
+    dir_index = {
+        "jobs": collections.defaultdict(list),
+        "commands": {"out": [], "err": []},
+        "names": {"out": [], "err": []},
+    }
+    for entry in scan_files(workdir):
+        stem, _, key = entry.name.rpartition(".")
+        if key in ("out", "err"):
+            if stem == ".command":
+                dir_index["commands"][key].append(entry.path)
+            elif not entry.name.startswith("."):
+                dir_index["names"][key].append((entry.name, entry.path))
+                for job_id in _get_log_job_ids(stem):
+                    dir_index["jobs"][(key, job_id)].append(entry.path)
+    return dir_index
+
+
+def _get_log_job_ids(stem):
+    """
+    Get the possible job IDs in a log file name: every number on its own, plus each pair of
+    numbers joined by an underscore as an array job ID (e.g. `bwa_2_12347` gives `2`, `12347` and `2_12347`).
+    """
+    numbers = list(LOG_NUMBER_PATTERN.finditer(stem))
+    job_ids = {match.group(0) for match in numbers}
+    for first, second in itertools.pairwise(numbers):
+        if stem[first.end() : second.start()] == "_":
+            job_ids.add(f"{first.group(0)}_{second.group(0)}")
+    return job_ids
+
+
+def get_job_logs(
+    job_id, workdir, include_text=True, log_bytes=LOG_EXCERPT_BYTES, log_index=None
+):
     """
-    with open(filepath, "r") as infile:
-        content = infile.read()
-        # JSON-escape all special characters (quotes, tabs, newlines, etc.)
-        safe_content = json.dumps(content)
-        # remove the outer quotes since json.dumps returns a JSON string literal
-        safe_content = safe_content[1:-1]
-    return safe_content
+    Get job log paths and contents.
 
+    Args:
+        job_id (str): The SLURM job ID.
+        workdir (str): The job's working directory, searched recursively for its logs.
+        include_text (bool, optional): Whether to read the head and tail of the logs (see
+            [](`~ccbr_tools.jobby.read_job_logs`)). Defaults to True.
+        log_bytes (int, optional): Number of bytes to read from each end of a log. Defaults to `LOG_EXCERPT_BYTES`.
+        log_index (JobLogIndex, optional): Index of log files to look the job up in, shared between jobs.
+            Defaults to a new [](`~ccbr_tools.jobby.JobLogIndex`).
 
-def get_job_logs(job_id, workdir, include_text=True):
-    """Get job log paths and contents."""
+    Returns:
+        dict: Log paths, plus their contents and sizes if `include_text` is True.
+    """
     job_logs = {}
     if workdir:
-        out_files = glob_files(workdir, patterns=[f"*{job_id}*.out", ".command.out"])
-        err_files = glob_files(workdir, patterns=[f"*{job_id}*.err", ".command.err"])
+        log_index = log_index or JobLogIndex()
         # search for nextflow & snakemake log for this job
-        for key, files in {"out": out_files, "err": err_files}.items():
+        for key in ("out", "err"):
+            files = log_index.get_files(job_id, workdir, key)
             filepath = next(iter(files), None)
             if len(files) > 1:
                 warnings.warn(
@@ -310,8 +1323,8 @@ def get_job_logs(job_id, workdir, include_text=True):
                 job_logs[f"log_{key}_path"] = str(
                     filepath
                 )  # pathlib.Path is not JSON serializable
-                if include_text:
-                    job_logs[f"log_{key}_txt"] = read_slurm_log(filepath)
+        if include_text:
+            read_job_logs([job_logs], log_bytes=log_bytes)
     return job_logs
 
 
@@ -320,8 +1333,28 @@ def records_to_df(records):
     df = pd.DataFrame(records)
 
     # convert Memory to GB
-    df["ReqMemGB"] = df["ReqMemGB"].apply(parse_mem_to_gb).round(2)
-    df["MaxMemUsedGB"] = df["MaxMemUsedGB"].apply(parse_mem_to_gb).round(2)
+    df["ReqMemGB"] = parse_mems_to_gb(df["ReqMemGB"]).round(2)
+    df["MaxMemUsedGB"] = parse_mems_to_gb(df["MaxMemUsedGB"]).round(2)
+
+    # Extended accounting columns (jobby --extended)
+    for col in df.columns.intersection(["MaxDiskReadGB", "MaxDiskWriteGB"]):
+        df[col] = parse_mems_to_gb(df[col], unitless_to_gb=BYTES_TO_GB).round(2)
+    if "ConsumedEnergyJoules" in df.columns:
+        df["ConsumedEnergyJoules"] = pd.to_numeric(
+            df["ConsumedEnergyJoules"], errors="coerce"
+        )
+    if "AllocTRES" in df.columns:
+        # Insert NumGPUs right before AllocTRES; jobs without GPUs have 0
+        df.insert(
+            df.columns.get_loc("AllocTRES"),
+            "NumGPUs",
+            pd.to_numeric(
+                df["AllocTRES"].fillna("").str.extract(TRES_GPU_PATTERN)[0],
+                errors="coerce",
+            )
+            .fillna(0)
+            .astype("Int64"),
+        )
 
     # Split ExitCode into ExitCode and KillSignal
     exit_split = df["ExitCode"].str.split(":", expand=True)
@@ -329,8 +1362,8 @@ def records_to_df(records):
     df["KillSignal"] = pd.to_numeric(exit_split[1], errors="coerce").astype("Int64")
 
     # Parse time columns to seconds
-    df["ElapsedSec"] = df["RunTime"].apply(parse_time_to_seconds)
-    df["CPUTimeSec"] = df["TotalCPUTime"].apply(parse_time_to_seconds)
+    df["ElapsedSec"] = parse_times_to_seconds(df["RunTime"])
+    df["CPUTimeSec"] = parse_times_to_seconds(df["TotalCPUTime"])
 
     # Ensure AllocCPUs is numeric
     df["AllocCPUs"] = pd.to_numeric(df["NumCPUs"], errors="coerce")
@@ -370,20 +1403,68 @@ def records_to_df(records):
     return df
 
 
+def set_column_dtypes(df):
+    """
+    Convert job record columns to proper types for the columnar output formats.
+
+    Counts and exit codes become nullable integers (`Int64`), memory and CPU efficiency become floats,
+    and start, end and queued times become datetimes. Values that cannot be converted
+    (e.g. an `Unknown` end time of a running job) become missing values.
+
+    Args:
+        df (pandas.DataFrame): Job records, e.g. from [](`~ccbr_tools.jobby.records_to_df`).
+
+    Returns:
+        pandas.DataFrame: A copy of the DataFrame with typed columns.
+    """
+    df = df.copy()
+    for col in df.columns.intersection(INT_COLUMNS):
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
+    for col in df.columns.intersection(FLOAT_COLUMNS):
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    for col in df.columns.intersection(DATETIME_COLUMNS):
+        df[col] = pd.to_datetime(df[col], errors="coerce", format="ISO8601")
+    return df
+
+
 def format_df(df, output_format):
-    """Format the DataFrame for output based on the requested format."""
+    """
+    Format the DataFrame for output based on the requested format.
+
+    Args:
+        df (pandas.DataFrame): Job records.
+        output_format (str): One of `markdown`, `tsv`, `json`, `ndjson` (one JSON record per line), `yaml`,
+            `parquet` or `arrow` (Feather).
+
+    Returns:
+        str or bytes: The formatted records. The `BINARY_FORMATS` (`parquet` and `arrow`) are returned
+            as bytes with typed columns (see [](`~ccbr_tools.jobby.set_column_dtypes`)).
+
+    Raises:
+        ValueError: If the output format is not supported.
+    """
     out_str = ""
     if output_format == "markdown":
         out_str = df.drop(
-            columns=["log_out_path", "log_out_txt", "log_err_path", "log_err_txt"],
+            columns=list(LOG_COLUMNS),
             errors="ignore",
         ).to_markdown(index=False)
     elif output_format == "tsv":
         out_str = df.to_csv(sep="\t", index=False)
     elif output_format == "json":
         out_str = df.to_json(orient="records", indent=2)
+    elif output_format == "ndjson":
+        out_str = df.to_json(orient="records", lines=True).rstrip("\n")
     elif output_format == "yaml":
         out_str = yaml.dump(df.to_dict(orient="records"), sort_keys=False)
+    elif output_format in BINARY_FORMATS:
+        buffer = io.BytesIO()
+        typed_df = set_column_dtypes(df).reset_index(drop=True)
+        if output_format == "parquet":
+            typed_df.to_parquet(buffer, index=False)
+        else:
+            typed_df.to_feather(buffer)
+        out_str = buffer.getvalue()
     else:
         raise ValueError(f"output format {output_format} not supported")
     return out_str
@@ -395,6 +1476,16 @@ def jobby(
     include_completed=False,
     completed_state="COMPLETED",
     success_exit_code=0,
+    workers=1,
+    sacct_rate=SACCT_MAX_CALLS_PER_SECOND,
+    use_cache=True,
+    cache_path=None,
+    incremental=False,
+    checkpoint_path=None,
+    log_bytes=LOG_EXCERPT_BYTES,
+    ndjson_file=None,
+    extended=False,
+    backend=None,
 ):
     """
     Processes a list of job IDs or a file containing job IDs to retrieve job information.
@@ -405,9 +1496,30 @@ def jobby(
         include_completed (bool, optional): Whether to include completed jobs in the results. Defaults to False.
         completed_state (str, optional): The state string that indicates a job is completed. Defaults to "COMPLETED".
         success_exit_code (int, optional): The exit code that indicates a job was successful. Defaults to 0.
+        workers (int, optional): Number of concurrent `sacct` workers. Defaults to 1.
+        sacct_rate (float, optional): Maximum `sacct` calls per second across all workers. Defaults to `SACCT_MAX_CALLS_PER_SECOND`.
+        use_cache (bool, optional): Whether to reuse and store records of finished jobs in the sacct cache. Defaults to True.
+        cache_path (str, optional): Path to the sacct cache database. Defaults to [](`~ccbr_tools.jobby.get_sacct_cache_path`).
+        incremental (bool, optional): When `args` is a log file, only parse the part of the log appended since
+            the previous incremental call, and only report jobs that are new or were still running last time.
+            Progress is stored in a checkpoint sidecar file. Defaults to False.
+        checkpoint_path (str, optional): Path to the checkpoint file for incremental mode.
+            Defaults to [](`~ccbr_tools.jobby.get_log_checkpoint_path`).
+        log_bytes (int, optional): With `include_out_err`, number of bytes to read from each end of a job log.
+            Defaults to `LOG_EXCERPT_BYTES`. Read whole logs if None.
+        ndjson_file (file object, optional): Stream the records to this file as NDJSON instead of returning them.
+            Each chunk of records is normalized and written as soon as its `sacct` call returns,
+            so output appears immediately and memory use does not grow with the number of jobs
+            (see [](`~ccbr_tools.jobby.write_ndjson`)). Defaults to None.
+        extended (bool, optional): Also report disk I/O, GPUs, TRES usage and energy, aggregated
+            across all job steps (see [](`~ccbr_tools.jobby.merge_step_record`)). Defaults to False.
+        backend (AccountingBackend, optional): Backend that returns `sacct --parsable2` output,
+            e.g. [](`~ccbr_tools.accounting.ReplayBackend`). Defaults to running `sacct`.
+            The sacct cache is only used with `sacct`, so other backends never read or write it.
 
     Returns:
-        dict: A list of job records as dictionaries, or an empty dictionary if no jobs are found.
+        dict: A list of job records as dictionaries, or an empty dictionary if no jobs are found
+            or the records were streamed to `ndjson_file`.
 
     Raises:
         TypeError: If 'args' is not a list.
@@ -418,49 +1530,601 @@ def jobby(
     if not isinstance(args, list):
         raise TypeError("Expected a list of arguments")
 
+    checkpoint = None
     # Case: 1 argument and it's a file
     if len(args) == 1 and os.path.isfile(args[0]):
-        job_ids = extract_jobids_from_file(args[0])
+        if incremental:
+            checkpoint_path = checkpoint_path or get_log_checkpoint_path(args[0])
+            job_ids, checkpoint = scan_new_jobids(
+                args[0], load_log_checkpoint(checkpoint_path)
+            )
+        else:
+            job_ids = extract_jobids_from_file(args[0])
     else:
         job_ids = args  # Treat all arguments as job IDs
 
     output = {}
     if job_ids:
-        records = list_records(
-            job_ids,
-            include_out_err=include_out_err,
-            include_completed=include_completed,
-            completed_state=completed_state,
-            success_exit_code=success_exit_code,
-        )
-        if records:
-            output = records_to_df(records).to_dict(orient="records")
+        record_kwargs = {
+            "include_out_err": include_out_err,
+            "include_completed": include_completed,
+            "completed_state": completed_state,
+            "success_exit_code": success_exit_code,
+            "workers": workers,
+            "sacct_rate": sacct_rate,
+            "log_bytes": log_bytes,
+            "extended": extended,
+            "backend": backend,
+        }
+        if ndjson_file:
+            with sacct_cache_session(use_cache, cache_path, backend) as cache:
+                job_states = write_ndjson(
+                    iter_record_chunks(job_ids, cache=cache, **record_kwargs),
+                    ndjson_file,
+                )
         else:
+            records = fetch_records(
+                job_ids, use_cache=use_cache, cache_path=cache_path, **record_kwargs
+            )
+            job_states = {record["JobId"]: record["JobState"] for record in records}
+            if records:
+                output = records_to_df(records).to_dict(orient="records")
+        if not job_states and checkpoint is None:
             warnings.warn("⚠️ No job data found.")
-    else:
+    elif checkpoint is None:
         warnings.warn("⚠️ No job IDs to process.")
+    if checkpoint is not None:
+        # an incremental poll without new activity is normal, so it does not warn
+        if job_ids:
+            checkpoint["jobs"].update(job_states)
+        save_log_checkpoint(checkpoint_path, checkpoint)
     return output
 
 
+def write_ndjson(record_chunks, outfile):
+    """
+    Normalize chunks of job records and write them as NDJSON as they arrive.
+
+    Each chunk is converted with [](`~ccbr_tools.jobby.records_to_df`), written as one JSON record
+    per line, and flushed before the next chunk is requested, so downstream tools (e.g. `jq`)
+    see results immediately and only one chunk is held in memory at a time.
+
+    Args:
+        record_chunks (iterable): Lists of job records, e.g. from [](`~ccbr_tools.jobby.iter_record_chunks`).
+        outfile (file object): Where to write the NDJSON lines.
+
+    Returns:
+        dict: The state of each written job, keyed by job ID.
+    """
+    job_states = {}
+    for records in record_chunks:
+        if records:
+            outfile.write(format_df(records_to_df(records), "ndjson") + "\n")
+            outfile.flush()
+            job_states.update(
+                {record["JobId"]: record["JobState"] for record in records}
+            )
+    return job_states
+
+
+def watch(
+    args: list,
+    interval,
+    output_format="markdown",
+    max_polls=None,
+    outfile=None,
+    include_out_err=False,
+    include_completed=False,
+    workers=1,
+    sacct_rate=SACCT_MAX_CALLS_PER_SECOND,
+    use_cache=True,
+    cache_path=None,
+    log_bytes=LOG_EXCERPT_BYTES,
+    extended=False,
+    backend=None,
+):
+    """
+    Repeatedly report job information, re-querying only jobs that have not finished.
+
+    Job records are kept in memory between polls. Each poll queries `sacct` only for new jobs
+    (when watching a log that is still growing) and for jobs that are not yet in one of the `TERMINAL_STATES`
+    (e.g. PENDING, RUNNING or REQUEUED).
+
+    Args:
+        args (list): A list of job IDs or a single-element list containing a Snakemake or Nextflow log.
+        interval (float): Seconds to wait between polls.
+        output_format (str, optional): `markdown` redraws the whole table in place after every poll,
+            and `json` or `ndjson` writes only new or changed rows as JSON lines. Defaults to "markdown".
+        max_polls (int, optional): Stop after this many polls. Defaults to None (keep polling
+            until interrupted, or until sacct has reported every job given as a job ID as finished).
+        outfile (file object, optional): Where to write the output. Defaults to `sys.stdout`.
+        include_out_err (bool, optional): Whether to include output and error file information. Defaults to False.
+        include_completed (bool, optional): Whether to include completed jobs in the results. Defaults to False.
+        workers (int, optional): Number of concurrent `sacct` workers. Defaults to 1.
+        sacct_rate (float, optional): Maximum `sacct` calls per second across all workers. Defaults to `SACCT_MAX_CALLS_PER_SECOND`.
+        use_cache (bool, optional): Whether to use the sacct cache. Defaults to True.
+        cache_path (str, optional): Path to the sacct cache database. Defaults to [](`~ccbr_tools.jobby.get_sacct_cache_path`).
+        log_bytes (int, optional): Number of bytes to read from each end of a job log. Defaults to `LOG_EXCERPT_BYTES`.
+        extended (bool, optional): Also report disk I/O, GPUs, TRES usage and energy. Defaults to False.
+        backend (AccountingBackend, optional): Backend that returns `sacct --parsable2` output,
+            e.g. [](`~ccbr_tools.accounting.ReplayBackend`). Defaults to running `sacct`.
+            The sacct cache is only used with `sacct`, so other backends never read or write it.
+
+    Returns:
+        dict: The latest job records keyed by job ID.
+
+    Raises:
+        ValueError: If the output format is not supported in watch mode.
+    """
+    if output_format not in ("markdown", "json", "ndjson"):
+        raise ValueError(
+            f"❌ Output format {output_format} is not supported with --watch"
+        )
+    outfile = outfile or sys.stdout
+    logfile = args[0] if len(args) == 1 and os.path.isfile(args[0]) else None
+    checkpoint = {"inode": None, "offset": 0, "jobs": {}}
+    requested_jobids = [] if logfile else [str(jobid) for jobid in args]
+    table = {}
+    polls = 0
+    with sacct_cache_session(use_cache, cache_path, backend) as cache:
+        all_done = False
+        while not all_done and (max_polls is None or polls < max_polls):
+            if polls:
+                time.sleep(interval)
+            if logfile:
+                new_jobids, checkpoint = scan_new_jobids(logfile, checkpoint)
+            else:
+                # job IDs that sacct has not returned yet are queried again on every poll
+                new_jobids = [
+                    jobid
+                    for jobid in requested_jobids
+                    if not _has_watch_record(table, jobid)
+                ]
+            query_jobids = sorted(
+                set(new_jobids)
+                | {
+                    jobid
+                    for jobid, record in table.items()
+                    if not is_terminal_state(record["JobState"])
+                }
+            )
+            records = (
+                list_records(
+                    query_jobids,
+                    include_out_err=include_out_err,
+                    include_completed=include_completed,
+                    workers=workers,
+                    sacct_rate=sacct_rate,
+                    cache=cache,
+                    log_bytes=log_bytes,
+                    extended=extended,
+                    backend=backend,
+                )
+                if query_jobids
+                else []
+            )
+            changed = [
+                record for record in records if table.get(record["JobId"]) != record
+            ]
+            table.update({record["JobId"]: record for record in records})
+            checkpoint["jobs"].update(
+                {jobid: record["JobState"] for jobid, record in table.items()}
+            )
+            if output_format in ("json", "ndjson"):
+                if changed:
+                    outfile.write(format_df(records_to_df(changed), "ndjson") + "\n")
+            elif changed or not polls:
+                outfile.write(format_watch_table(table, outfile))
+            outfile.flush()
+            polls += 1
+            all_done = (
+                not logfile
+                and all(_has_watch_record(table, jobid) for jobid in requested_jobids)
+                and all(
+                    is_terminal_state(record["JobState"]) for record in table.values()
+                )
+            )
+    return table
+
+
+def _has_watch_record(table, jobid):
+    """Whether the watched job table has a record for a job ID, or for any task of an array job."""
+    return jobid in table or any(key.startswith(f"{jobid}_") for key in table)
+
+
+def format_watch_table(table, outfile):
+    """Format the watched job table as markdown with a status line, clearing the terminal first if there is one."""
+    states = collections.Counter(
+        (record["JobState"] or "UNKNOWN").split()[0] for record in table.values()
+    )
+    status = ", ".join(f"{count} {state}" for state, count in sorted(states.items()))
+    out_str = "\x1b[H\x1b[2J" if outfile.isatty() else ""
+    out_str += f"jobby --watch: {len(table)} jobs ({status}) at {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+    if table:
+        out_str += format_df(records_to_df(list(table.values())), "markdown")
+    return out_str + "\n"
+
+
+def get_job_rules(args):
+    """
+    Get the job IDs to query, and the rule or process name of each job when `args` is a log.
+
+    Args:
+        args (list): A list of job IDs or a single-element list containing a Snakemake or Nextflow log.
+
+    Returns:
+        tuple: The sorted unique job IDs submitted in the log (or `args` itself),
+            and a dict of rule names keyed by job ID (empty when `args` are job IDs).
+    """
+    rules = {}
+    job_ids = args
+    if len(args) == 1 and os.path.isfile(args[0]):
+        submits = [event for event in scan_log(args[0]) if event.kind == "submit"]
+        rules = {event.jobid: event.name for event in submits if event.name}
+        job_ids = sorted({event.jobid for event in submits})
+    return job_ids, rules
+
+
+def ingest(
+    args: list,
+    pipeline=None,
+    pipeline_version=None,
+    run_id=None,
+    warehouse_path=None,
+    workers=1,
+    sacct_rate=SACCT_MAX_CALLS_PER_SECOND,
+    use_cache=True,
+    cache_path=None,
+    backend=None,
+):
+    """
+    Add the finished jobs of a pipeline run to the job warehouse.
+
+    Jobs are normalized with [](`~ccbr_tools.jobby.records_to_df`), and their walltime and time limit
+    are converted to seconds. When `args` is a Snakemake or Nextflow log, the rule or process name of each
+    job is taken from the log; otherwise the job name is used. Jobs that have not finished yet are skipped,
+    because rows in the warehouse are never updated.
+
+    Args:
+        args (list): A list of job IDs or a single-element list containing a Snakemake or Nextflow log.
+        pipeline (str, optional): Pipeline name. Defaults to None.
+        pipeline_version (str, optional): Pipeline version. Defaults to None.
+        run_id (str, optional): Identifier of the run. Defaults to the absolute path of the log,
+            or the current time when `args` are job IDs.
+        warehouse_path (str, optional): Path to the warehouse database.
+            Defaults to [](`~ccbr_tools.job_warehouse.get_warehouse_path`).
+        workers (int, optional): Number of concurrent `sacct` workers. Defaults to 1.
+        sacct_rate (float, optional): Maximum `sacct` calls per second across all workers. Defaults to `SACCT_MAX_CALLS_PER_SECOND`.
+        use_cache (bool, optional): Whether to use the sacct cache. Defaults to True.
+        cache_path (str, optional): Path to the sacct cache database. Defaults to [](`~ccbr_tools.jobby.get_sacct_cache_path`).
+        backend (AccountingBackend, optional): Backend that returns `sacct --parsable2` output,
+            e.g. [](`~ccbr_tools.accounting.ReplayBackend`). Defaults to running `sacct`.
+            The sacct cache is only used with `sacct`, so other backends never read or write it.
+
+    Returns:
+        int: The number of jobs added to the warehouse.
+    """
+    job_ids, rules = get_job_rules(args)
+    if len(args) == 1 and os.path.isfile(args[0]):
+        run_id = run_id or os.path.abspath(args[0])
+    else:
+        run_id = run_id or time.strftime("%Y-%m-%dT%H:%M:%S")
+    records = fetch_records(
+        job_ids,
+        use_cache=use_cache,
+        cache_path=cache_path,
+        workers=workers,
+        sacct_rate=sacct_rate,
+        backend=backend,
+    )
+    finished = [record for record in records if is_terminal_state(record["JobState"])]
+    if len(finished) < len(records):
+        warnings.warn(
+            f"⚠️ Skipping {len(records) - len(finished)} jobs that have not finished yet."
+        )
+    n_added = 0
+    if finished:
+        df = records_to_df(finished)
+        timelimits = df["Timelimit"].where(
+            df["Timelimit"].astype(str).str.match(r"^[\d:.-]+$"), ""
+        )  # e.g. UNLIMITED or Partition_Limit
+        df = df.assign(
+            rule=df["JobId"].map(rules).fillna(df["JobName"]),
+            ElapsedSec=parse_times_to_seconds(df["RunTime"]),
+            TimelimitSec=parse_times_to_seconds(timelimits),
+        )
+        with JobWarehouse(warehouse_path) as warehouse:
+            n_added = warehouse.add_jobs(
+                df,
+                run_id=run_id,
+                pipeline=pipeline,
+                pipeline_version=pipeline_version,
+            )
+    return n_added
+
+
+def query_warehouse(
+    warehouse_path=None,
+    by=("pipeline", "rule"),
+    pipeline=None,
+    state=None,
+    since=None,
+):
+    """
+    Summarize resource usage across the runs in the job warehouse.
+
+    See [](`~ccbr_tools.job_warehouse.summarize_usage`) for the reported metrics.
+
+    Args:
+        warehouse_path (str, optional): Path to the warehouse database.
+            Defaults to [](`~ccbr_tools.job_warehouse.get_warehouse_path`).
+        by (list, optional): Columns to group by. Defaults to `("pipeline", "rule")`.
+        pipeline (str, optional): Only include jobs of this pipeline. Defaults to None.
+        state (str, optional): Only include jobs in this state, e.g. `COMPLETED`. Defaults to None.
+        since (str, optional): Only include jobs that started on or after this ISO date. Defaults to None.
+
+    Returns:
+        pandas.DataFrame: One row per group with percentiles of each usage metric.
+    """
+    with JobWarehouse(warehouse_path) as warehouse:
+        df = warehouse.load_jobs(pipeline=pipeline, state=state, since=since)
+    return summarize_usage(df, by=by)
+
+
+def recommend(
+    warehouse_path=None,
+    pipeline=None,
+    state="COMPLETED",
+    since=None,
+    quantile=RECOMMEND_QUANTILE,
+    headroom=RECOMMEND_HEADROOM,
+):
+    """
+    Recommend memory, CPUs and walltime per rule from the runs in the job warehouse.
+
+    See [](`~ccbr_tools.job_warehouse.recommend_resources`) for how recommendations are computed
+    and [](`~ccbr_tools.job_warehouse.format_recommendations`) to turn them into a
+    Snakemake or Nextflow configuration snippet.
+
+    Args:
+        warehouse_path (str, optional): Path to the warehouse database.
+            Defaults to [](`~ccbr_tools.job_warehouse.get_warehouse_path`).
+        pipeline (str, optional): Only include jobs of this pipeline. Defaults to None.
+        state (str, optional): Only include jobs in this state. Defaults to "COMPLETED".
+        since (str, optional): Only include jobs that started on or after this ISO date. Defaults to None.
+        quantile (float, optional): Quantile of usage to recommend. Defaults to `RECOMMEND_QUANTILE`.
+        headroom (float, optional): Factor to multiply the usage quantile by. Defaults to `RECOMMEND_HEADROOM`.
+
+    Returns:
+        pandas.DataFrame: One row per rule with the current median request and the recommendation.
+    """
+    with JobWarehouse(warehouse_path) as warehouse:
+        df = warehouse.load_jobs(pipeline=pipeline, state=state, since=since)
+    if df["pipeline"].nunique() > 1:
+        warnings.warn(
+            "⚠️ Jobs from several pipelines are combined by rule name. Use --pipeline to select one."
+        )
+    return recommend_resources(df, quantile=quantile, headroom=headroom)
+
+
+def timeline(
+    args: list,
+    concurrency=False,
+    workers=1,
+    sacct_rate=SACCT_MAX_CALLS_PER_SECOND,
+    use_cache=True,
+    cache_path=None,
+    backend=None,
+):
+    """
+    Analyze the timeline of the jobs of a pipeline run.
+
+    See [](`~ccbr_tools.job_timeline.summarize_timeline`) for the metrics reported, which show whether
+    a run was limited by scheduling, throttling or compute.
+
+    Args:
+        args (list): A list of job IDs or a single-element list containing a Snakemake or Nextflow log.
+        concurrency (bool, optional): Report the number of jobs running over time instead of the summary
+            (see [](`~ccbr_tools.job_timeline.get_concurrency`)). Defaults to False.
+        workers (int, optional): Number of concurrent `sacct` workers. Defaults to 1.
+        sacct_rate (float, optional): Maximum `sacct` calls per second across all workers. Defaults to `SACCT_MAX_CALLS_PER_SECOND`.
+        use_cache (bool, optional): Whether to use the sacct cache. Defaults to True.
+        cache_path (str, optional): Path to the sacct cache database. Defaults to [](`~ccbr_tools.jobby.get_sacct_cache_path`).
+        backend (AccountingBackend, optional): Backend that returns `sacct --parsable2` output,
+            e.g. [](`~ccbr_tools.accounting.ReplayBackend`). Defaults to running `sacct`.
+            The sacct cache is only used with `sacct`, so other backends never read or write it.
+
+    Returns:
+        pandas.DataFrame: A single row with the timeline summary, or one row per change in the number of running jobs.
+    """
+    job_ids = (
+        extract_jobids_from_file(args[0])
+        if len(args) == 1 and os.path.isfile(args[0])
+        else args
+    )
+    records = fetch_records(
+        job_ids,
+        use_cache=use_cache,
+        cache_path=cache_path,
+        workers=workers,
+        sacct_rate=sacct_rate,
+        backend=backend,
+    )
+    if not records:
+        warnings.warn("⚠️ No job data found.")
+    df = (
+        records_to_df(records)
+        if records
+        else pd.DataFrame(columns=SACCT_COLUMNS.values())
+    )
+    if concurrency:
+        steps = get_concurrency(
+            get_epoch_seconds(df["StartTime"]), get_epoch_seconds(df["EndTime"])
+        )
+        out_df = steps.assign(
+            time=pd.to_datetime(steps["time"], unit="s").dt.strftime(
+                "%Y-%m-%dT%H:%M:%S"
+            )
+        )
+    else:
+        out_df = pd.DataFrame([summarize_timeline(df)])
+    return out_df
+
+
+def gantt(
+    args: list,
+    svg=False,
+    width=GANTT_WIDTH,
+    max_rows=GANTT_MAX_ROWS,
+    workers=1,
+    sacct_rate=SACCT_MAX_CALLS_PER_SECOND,
+    use_cache=True,
+    cache_path=None,
+    backend=None,
+):
+    """
+    Render a Gantt chart of the jobs of a pipeline run, grouped by rule and colored by state.
+
+    When `args` is a Snakemake or Nextflow log, jobs are grouped by the rule or process name from the log;
+    otherwise by job name. See [](`~ccbr_tools.job_gantt`) for how large runs are downsampled.
+
+    Args:
+        args (list): A list of job IDs or a single-element list containing a Snakemake or Nextflow log.
+        svg (bool, optional): Render only the chart as an SVG document instead of the HTML report. Defaults to False.
+        width (int, optional): Width of the chart in pixels. Defaults to `GANTT_WIDTH`.
+        max_rows (int, optional): Approximate maximum number of chart rows. Defaults to `GANTT_MAX_ROWS`.
+        workers (int, optional): Number of concurrent `sacct` workers. Defaults to 1.
+        sacct_rate (float, optional): Maximum `sacct` calls per second across all workers. Defaults to `SACCT_MAX_CALLS_PER_SECOND`.
+        use_cache (bool, optional): Whether to use the sacct cache. Defaults to True.
+        cache_path (str, optional): Path to the sacct cache database. Defaults to [](`~ccbr_tools.jobby.get_sacct_cache_path`).
+        backend (AccountingBackend, optional): Backend that returns `sacct --parsable2` output,
+            e.g. [](`~ccbr_tools.accounting.ReplayBackend`). Defaults to running `sacct`.
+            The sacct cache is only used with `sacct`, so other backends never read or write it.
+
+    Returns:
+        str: The SVG or HTML document.
+    """
+    job_ids, rules = get_job_rules(args)
+    records = fetch_records(
+        job_ids,
+        use_cache=use_cache,
+        cache_path=cache_path,
+        workers=workers,
+        sacct_rate=sacct_rate,
+        backend=backend,
+    )
+    if not records:
+        warnings.warn("⚠️ No job data found.")
+    df = (
+        records_to_df(records)
+        if records
+        else pd.DataFrame(columns=SACCT_COLUMNS.values())
+    )
+    df = df.assign(rule=df["JobId"].map(rules).fillna(df["JobName"]))
+    return (
+        render_gantt_svg(df, width=width, max_rows=max_rows)
+        if svg
+        else render_gantt_html(
+            df,
+            width=width,
+            max_rows=max_rows,
+            title=f"Job timeline: {args[0]}" if len(args) == 1 else None,
+        )
+    )
+
+
+def pop_option_value(args, option, default=None, cast=str):
+    """
+    Remove an option and its value (e.g. `--workers 4`) from the argument list.
+
+    Args:
+        args (list): Command-line arguments. Modified in place.
+        option (str): The option name, e.g. `--workers`.
+        default (optional): Value to return if the option is absent. Defaults to None.
+        cast (callable, optional): Function to convert the value. Defaults to str.
+
+    Returns:
+        The converted option value, or `default` if the option is absent.
+
+    Raises:
+        ValueError: If the option is given without a value.
+    """
+    value = default
+    if option in args:
+        idx = args.index(option)
+        if idx + 1 >= len(args):
+            raise ValueError(f"❌ {option} requires a value")
+        value = cast(args[idx + 1])
+        del args[idx : idx + 2]
+    return value
+
+
 def main():
     """Run the CLI."""
     args = sys.argv[1:]
     if len(args) == 0 or "-h" in args or "--help" in args:
         print("Usage:")
         print(
-            "  jobby <jobid1> [jobid2 ...] [--tsv|--json|--yaml] [--outerr] [--include-completed]"
+            "  jobby <jobid1> [jobid2 ...] [--tsv|--json|--ndjson|--yaml] [--outerr] [--include-completed]"
+        )
+        print(
+            "  jobby <jobid1>,<jobid2> [--tsv|--json|--ndjson|--yaml] [--outerr] [--include-completed]"
+        )
+        print(
+            "  jobby snakemake.log [--tsv|--json|--ndjson|--yaml] [--outerr] [--include-completed]"
         )
         print(
-            "  jobby <jobid1>,<jobid2> [--tsv|--json|--yaml] [--outerr] [--include-completed]"
+            "  jobby .nextflow.log [--tsv|--json|--ndjson|--yaml] [--outerr] [--include-completed]"
         )
+        print("  jobby snakemake.log --parquet|--arrow > jobs.parquet")
         print(
-            "  jobby snakemake.log [--tsv|--json|--yaml] [--outerr] [--include-completed]"
+            "  jobby ingest snakemake.log [--pipeline NAME] [--pipeline-version VERSION] [--run-id ID] [--warehouse PATH]"
         )
         print(
-            "  jobby .nextflow.log [--tsv|--json|--yaml] [--outerr] [--include-completed]"
+            "  jobby query [--by pipeline,rule] [--pipeline NAME] [--state STATE] [--since DATE] [--warehouse PATH] [--tsv|--json|...]"
+        )
+        print(
+            "  jobby recommend [--pipeline NAME] [--quantile 0.95] [--headroom 1.2] [--config cluster-json|snakemake-profile|nextflow]"
+        )
+        print("  jobby timeline snakemake.log [--concurrency] [--tsv|--json|...]")
+        print(
+            "  jobby gantt snakemake.log [--svg] [--width 1200] [--max-rows 400] > timeline.html"
         )
         print("  jobby -v or --version")
         print("  jobby -h or --help")
+        print("Options:")
+        print(
+            "  --parquet, --arrow write typed Parquet or Arrow (Feather) data to stdout (requires pyarrow)"
+        )
+        print("  --workers N       query sacct with N concurrent workers (default: 1)")
+        print(
+            f"  --sacct-rate N    max sacct calls per second across workers (default: {SACCT_MAX_CALLS_PER_SECOND})"
+        )
+        print(
+            "  --cache PATH      sacct cache for finished jobs (default: $XDG_CACHE_HOME/ccbr_tools/jobby_sacct.sqlite)"
+        )
+        print("  --no-cache        always query sacct; do not read or write the cache")
+        print(
+            "  --replay FILE     read recorded `sacct --parsable2` output instead of running sacct (implies --no-cache)"
+        )
+        print(
+            "  --incremental     only parse log lines appended since the last --incremental call"
+        )
+        print(
+            "  --checkpoint PATH checkpoint file for --incremental (default: <log>.checkpoint.json)"
+        )
+        print(
+            "  --log-bytes N     with --outerr, read only the first and last N bytes of each log (default: 65536; 0 reads whole logs)"
+        )
+        print(
+            "  --extended        also report disk I/O, GPUs, TRES usage and energy, as the max across all job steps"
+        )
+        print(
+            "  --warehouse PATH  job warehouse for ingest/query (default: $XDG_DATA_HOME/ccbr_tools/jobby_warehouse.sqlite)"
+        )
+        print(
+            "  --watch SECONDS   keep polling, re-querying only unfinished jobs; with --json, print changed rows as JSON lines"
+        )
     elif len(args) == 1 and ("-v" in args or "--version" in args):
         version = get_version()
         # add prefix "v" to the version string if not already present
@@ -468,36 +2132,229 @@ def main():
             version = f"v{version}"
         print(f"jobby: ccbr_tools version: {version}")
     else:
-        output_format = "markdown"  # Default output format
-        if "--tsv" in args:
-            output_format = "tsv"
-            args.remove("--tsv")
-        elif "--json" in args:
-            output_format = "json"
-            args.remove("--json")
-        elif "--yaml" in args:
-            output_format = "yaml"
-            args.remove("--yaml")
-            if yaml is None:
-                raise ImportError(
-                    "❌ YAML output requested but PyYAML is not installed. Install with `pip install pyyaml`."
+        output_format = pop_output_format(args)
+        workers = pop_option_value(args, "--workers", default=1, cast=int)
+        sacct_rate = pop_option_value(
+            args, "--sacct-rate", default=SACCT_MAX_CALLS_PER_SECOND, cast=float
+        )
+        cache_path = pop_option_value(args, "--cache")
+        use_cache = True
+        if "--no-cache" in args:
+            use_cache = False
+            args.remove("--no-cache")
+        replay_path = pop_option_value(args, "--replay")
+        backend = None
+        if replay_path:
+            # recorded output must not overwrite cached records from live sacct calls
+            backend = ReplayBackend(replay_path, output_format="sacct")
+            use_cache = False
+        warehouse_path = pop_option_value(args, "--warehouse")
+        if args and args[0] == "ingest":
+            pipeline = pop_option_value(args, "--pipeline")
+            pipeline_version = pop_option_value(args, "--pipeline-version")
+            run_id = pop_option_value(args, "--run-id")
+            n_added = ingest(
+                args[1:],
+                pipeline=pipeline,
+                pipeline_version=pipeline_version,
+                run_id=run_id,
+                warehouse_path=warehouse_path,
+                workers=workers,
+                sacct_rate=sacct_rate,
+                use_cache=use_cache,
+                cache_path=cache_path,
+                backend=backend,
+            )
+            print(f"Added {n_added} jobs to the job warehouse")
+        elif args and args[0] == "query":
+            summary = query_warehouse(
+                warehouse_path=warehouse_path,
+                by=pop_option_value(args, "--by", default="pipeline,rule").split(","),
+                pipeline=pop_option_value(args, "--pipeline"),
+                state=pop_option_value(args, "--state"),
+                since=pop_option_value(args, "--since"),
+            )
+            print_df(summary, output_format)
+        elif args and args[0] == "recommend":
+            config_format = pop_option_value(args, "--config")
+            recs = recommend(
+                warehouse_path=warehouse_path,
+                pipeline=pop_option_value(args, "--pipeline"),
+                state=pop_option_value(args, "--state", default="COMPLETED"),
+                since=pop_option_value(args, "--since"),
+                quantile=pop_option_value(
+                    args, "--quantile", default=RECOMMEND_QUANTILE, cast=float
+                ),
+                headroom=pop_option_value(
+                    args, "--headroom", default=RECOMMEND_HEADROOM, cast=float
+                ),
+            )
+            if config_format:
+                print(format_recommendations(recs, config_format))
+            else:
+                print_df(recs, output_format)
+        elif args and args[0] == "gantt":
+            svg = False
+            if "--svg" in args:
+                svg = True
+                args.remove("--svg")
+            width = pop_option_value(args, "--width", default=GANTT_WIDTH, cast=int)
+            max_rows = pop_option_value(
+                args, "--max-rows", default=GANTT_MAX_ROWS, cast=int
+            )
+            print(
+                gantt(
+                    args[1:],
+                    svg=svg,
+                    width=width,
+                    max_rows=max_rows,
+                    workers=workers,
+                    sacct_rate=sacct_rate,
+                    use_cache=use_cache,
+                    cache_path=cache_path,
+                    backend=backend,
                 )
+            )
+        elif args and args[0] == "timeline":
+            concurrency = False
+            if "--concurrency" in args:
+                concurrency = True
+                args.remove("--concurrency")
+            print_df(
+                timeline(
+                    args[1:],
+                    concurrency=concurrency,
+                    workers=workers,
+                    sacct_rate=sacct_rate,
+                    use_cache=use_cache,
+                    cache_path=cache_path,
+                    backend=backend,
+                ),
+                output_format,
+            )
+        else:
+            run_jobby_cli(
+                args,
+                output_format=output_format,
+                workers=workers,
+                sacct_rate=sacct_rate,
+                use_cache=use_cache,
+                cache_path=cache_path,
+                backend=backend,
+            )
 
-        include_out_err = False
-        if "--outerr" in args:
-            include_out_err = True
-            args.remove("--outerr")
-        include_completed = False
-        if "--include-completed" in args:
-            include_completed = True
-            args.remove("--include-completed")
 
+def run_jobby_cli(
+    args, output_format, workers, sacct_rate, use_cache, cache_path, backend=None
+):
+    """Run `jobby` (or `jobby --watch`) from the command line arguments left after the common options."""
+    include_out_err = False
+    if "--outerr" in args:
+        include_out_err = True
+        args.remove("--outerr")
+    include_completed = False
+    if "--include-completed" in args:
+        include_completed = True
+        args.remove("--include-completed")
+    extended = False
+    if "--extended" in args:
+        extended = True
+        args.remove("--extended")
+    log_bytes = (
+        pop_option_value(args, "--log-bytes", default=LOG_EXCERPT_BYTES, cast=int)
+        or None
+    )
+    checkpoint_path = pop_option_value(args, "--checkpoint")
+    incremental = False
+    if "--incremental" in args:
+        incremental = True
+        args.remove("--incremental")
+    watch_interval = pop_option_value(args, "--watch", cast=float)
+    if watch_interval is not None:
+        try:
+            watch(
+                args,
+                watch_interval,
+                output_format=output_format,
+                include_out_err=include_out_err,
+                include_completed=include_completed,
+                workers=workers,
+                sacct_rate=sacct_rate,
+                use_cache=use_cache,
+                cache_path=cache_path,
+                log_bytes=log_bytes,
+                extended=extended,
+                backend=backend,
+            )
+        except KeyboardInterrupt:
+            pass
+    else:
         jobby_out = jobby(
-            args, include_out_err=include_out_err, include_completed=include_completed
+            args,
+            include_out_err=include_out_err,
+            include_completed=include_completed,
+            workers=workers,
+            sacct_rate=sacct_rate,
+            use_cache=use_cache,
+            cache_path=cache_path,
+            incremental=incremental,
+            checkpoint_path=checkpoint_path,
+            log_bytes=log_bytes,
+            ndjson_file=sys.stdout if output_format == "ndjson" else None,
+            extended=extended,
+            backend=backend,
         )
         if jobby_out:
-            out_str = format_df(pd.DataFrame(jobby_out), output_format)
-            print(out_str)
+            print_df(pd.DataFrame(jobby_out), output_format)
+
+
+def pop_output_format(args):
+    """
+    Remove the output format flag (e.g. `--json`) from the argument list.
+
+    Args:
+        args (list): Command-line arguments. Modified in place.
+
+    Returns:
+        str: The output format, `markdown` if no format flag is given.
+
+    Raises:
+        ImportError: If the optional dependency of the requested format is not installed.
+    """
+    output_format = "markdown"  # Default output format
+    if "--tsv" in args:
+        output_format = "tsv"
+        args.remove("--tsv")
+    elif "--json" in args:
+        output_format = "json"
+        args.remove("--json")
+    elif "--ndjson" in args:
+        output_format = "ndjson"
+        args.remove("--ndjson")
+    elif "--yaml" in args:
+        output_format = "yaml"
+        args.remove("--yaml")
+        if yaml is None:
+            raise ImportError(
+                "❌ YAML output requested but PyYAML is not installed. Install with `pip install pyyaml`."
+            )
+    elif "--parquet" in args or "--arrow" in args:
+        output_format = "parquet" if "--parquet" in args else "arrow"
+        args.remove(f"--{output_format}")
+        if importlib.util.find_spec("pyarrow") is None:
+            raise ImportError(
+                f"❌ {output_format.capitalize()} output requested but pyarrow is not installed. Install with `pip install pyarrow`."
+            )
+    return output_format
+
+
+def print_df(df, output_format):
+    """Print a DataFrame in the given output format, writing binary formats to the raw stdout buffer."""
+    out_str = format_df(df, output_format)
+    if output_format in BINARY_FORMATS:
+        sys.stdout.buffer.write(out_str)
+    else:
+        print(out_str)
 
 
 if __name__ == "__main__":
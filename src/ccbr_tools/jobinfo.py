@@ -17,6 +17,8 @@ Example:
     $ jobinfo -s path/to/snakemake.log
     $ jobinfo -j 123456,7891011 -o path/to/report.tsv
     $ jobinfo -s path/to/snakemake.log --failonly
+    $ jobinfo -s path/to/snakemake.log --chunk-size 200 --workers 8
+    $ jobinfo -j 123456,7891011 --replay path/to/jobs.json
 """
 
 __version__ = "v1.0.0"
@@ -24,14 +26,25 @@ __author__ = "Vishal Koparde"
 __email__ = "vishal.koparde@nih.gov"
 
 import argparse
-import datetime
+import concurrent.futures
+import functools
 import json
 import os
 import subprocess
 import sys
-import time
 
+import numpy as np
 import pandas as pd
+from dateutil import tz
+
+from .accounting import (
+    DashboardBackend,
+    ReplayBackend,
+    chunk_job_ids,
+    extract_jobids,
+    parse_mems_to_gb,
+    parse_times_to_seconds,
+)
 
 # SHORT_FIELDS used to display on screen
 SHORT_FIELDS = "jobid,state,jobname,elapsed_time,timelimit,time_util,cpus,max_cpu_util,mem,max_mem_util,exit_code"
@@ -39,6 +52,9 @@ FAILONLY_FIELDS = "jobid,jobname,elapsed_time,timelimit,time_util,cpus,max_cpu_u
 # LONG_FIELDS used to write to output file
 LONG_FIELDS = "jobid,jobname,state,state_reason,eval,exit_code,nodelist,partition,qos,submit_time,queued_time,queued_time_seconds,elapsed_time,elapsed_time_seconds,timelimit,timelimit_seconds,user,cpus,cpu_min,cpu_avg,cpu_max,mem,mem_min,mem_avg,mem_max,gres,work_dir,std_out,std_err"
 FAILONLY = "FAILED,TIMEOUT"
+# max number of jobids per dashboard_cli call, and number of concurrent calls
+CHUNK_SIZE = 500
+WORKERS = 4
 
 # change FAILONLY state .. for debugging only
 # FAILONLY="TIMEOUT"
@@ -118,6 +134,30 @@ def collect_args():
         required=False,
     )
 
+    # dashboard_cli batching
+    parser.add_argument(
+        "--chunk-size",
+        help=f"number of jobids per dashboard_cli call (default: {CHUNK_SIZE})",
+        type=int,
+        default=CHUNK_SIZE,
+        required=False,
+    )
+    parser.add_argument(
+        "--workers",
+        help=f"number of concurrent dashboard_cli calls (default: {WORKERS})",
+        type=int,
+        default=WORKERS,
+        required=False,
+    )
+
+    # recorded dashboard_cli output
+    parser.add_argument(
+        "--replay",
+        help="read job records from a JSON file recorded with `dashboard_cli jobs --json` instead of running dashboard_cli. Works on any host.",
+        type=str,
+        required=False,
+    )
+
     check_help(parser)
 
     # extract parsed arguments
@@ -139,15 +179,7 @@ def collect_args():
     if (
         args.snakemakelog
     ):  # if snakemakelog file is given then extract the jobids from it.
-        cmd = (
-            'grep "external jobid" '
-            + args.snakemakelog.name
-            + ' | awk \'{print $NF}\' | sed "s/\'//g" | sed "s/\\.//g"'
-        )
-        p1 = subprocess.run(
-            cmd, capture_output=True, text=True, shell=True, check=False
-        )
-        args.joblist = p1.stdout.strip().split("\n")
+        args.joblist = extract_jobids(args.snakemakelog.name)
 
     return args
 
@@ -224,65 +256,205 @@ def time2sec(timestr):
     return float(sec)
 
 
-def get_jobinfo(args):
-    """Retrieve job information from dashboard_cli."""
-    cmd = (
-        "/usr/local/bin/dashboard_cli jobs --joblist "  # abs-path:ignore
-        + ",".join(args.joblist)
-        + " --archive --json --fields "
-        + LONG_FIELDS
+def mems2gb(mems):
+    """
+    Vectorized version of [](`~ccbr_tools.jobinfo.mem2gb`) for a whole column.
+
+    See [](`~ccbr_tools.accounting.parse_mems_to_gb`), which is shared with `jobby`.
+
+    Args:
+        mems (pandas.Series): Memory strings like "4.5 GB", "512 MB" or "0".
+
+    Returns:
+        pandas.Series: Memory in GB, or NaN for values that cannot be parsed (e.g. "-").
+    """
+    return pd.Series(parse_mems_to_gb(mems, warn=False), index=mems.index)
+
+
+def times2sec(times):
+    """
+    Vectorized version of [](`~ccbr_tools.jobinfo.time2sec`) for a whole column.
+
+    See [](`~ccbr_tools.accounting.parse_times_to_seconds`), which is shared with `jobby`.
+
+    Args:
+        times (pandas.Series): SLURM time strings like "1-02:03:04", "02:03:04", "03:04" or "04".
+            Empty strings count as zero.
+
+    Returns:
+        pandas.Series: Time in seconds, or NaN for values that cannot be parsed (e.g. "UNLIMITED").
+    """
+    seconds = pd.Series(parse_times_to_seconds(times, warn=False), index=times.index)
+    return seconds.mask(times.astype(str).str.strip() == "", 0.0)
+
+
+def format_percent(numerator, denominator, missing="-"):
+    """
+    Format a ratio as a percentage string like "12.34 %".
+
+    Args:
+        numerator (pandas.Series): Numerators.
+        denominator (pandas.Series): Denominators.
+        missing (str, optional): Value for rows where the ratio is missing. Defaults to "-".
+
+    Returns:
+        pandas.Series: Formatted percentages.
+    """
+    percent = (numerator * 100 / denominator).to_numpy(dtype=float)
+    formatted = np.char.add(np.char.mod("%.2f", percent), " %")
+    return pd.Series(
+        np.where(np.isnan(percent), missing, formatted), index=numerator.index
     )
-    p1 = subprocess.run(cmd, capture_output=True, text=True, shell=True, check=False)
-    if p1.returncode != 0:
-        exit_w_msg("dashboard_cli failed!")
-    p1_json = json.loads(p1.stdout)
-    p1_table = pd.json_normalize(p1_json)
-    p1_table["epochtime"] = p1_table.apply(
-        lambda row: time.mktime(
-            datetime.datetime.strptime(row.submit_time, "%Y-%m-%dT%H:%M:%S").timetuple()  # noqa: DTZ007
-        ),
-        axis=1,
+
+
+def format_seconds(seconds):
+    """Format seconds as whole-number strings, with "-" for missing values."""
+    return seconds.fillna(0).astype(int).astype(str).where(seconds.notna(), "-")
+
+
+def add_usage_columns(table):
+    """
+    Add the submit epoch time, utilization and `*_seconds` columns to a dashboard_cli job table.
+
+    All columns are computed with vectorized operations on whole columns:
+
+    - `epochtime`: submit time in seconds since the epoch (local time), used to sort the jobs.
+    - `max_cpu_util`, `max_mem_util`: max CPU and memory use as a percentage of the allocation, or "-".
+    - `queued_time_seconds`, `elapsed_time_seconds`, `timelimit_seconds`: times in whole seconds.
+    - `time_util`: elapsed time as a percentage of the time limit, or "- %" without a time limit.
+
+    Args:
+        table (pandas.DataFrame): Jobs from dashboard_cli.
+
+    Returns:
+        pandas.DataFrame: The jobs with the added columns, sorted by submit time.
+    """
+    submit_time = pd.to_datetime(
+        table["submit_time"], format="%Y-%m-%dT%H:%M:%S"
+    ).dt.tz_localize(
+        tz.tzlocal(),
+        ambiguous=np.ones(len(table), dtype=bool),
+        nonexistent="shift_forward",
     )
-    p1_table = p1_table.sort_values(by=["epochtime"])
-    p1_table["max_cpu_util"] = p1_table.apply(
-        lambda row: (
-            "-"
-            if row["cpu_max"] == "-"
-            else "%.2f" % (float(row["cpu_max"]) * 100 / int(row["cpus"])) + " %"
+    table = table.assign(
+        epochtime=(submit_time - pd.Timestamp(0, tz="UTC")) / pd.Timedelta(seconds=1)
+    ).sort_values(by=["epochtime"])
+    cpu_max = pd.to_numeric(table["cpu_max"], errors="coerce")
+    mem_max = mems2gb(table["mem_max"])
+    elapsed_seconds = np.floor(times2sec(table["elapsed_time"]))
+    timelimit_seconds = np.floor(times2sec(table["timelimit"]))
+    return table.assign(
+        max_cpu_util=format_percent(
+            cpu_max, pd.to_numeric(table["cpus"], errors="coerce")
+        ).where(table["cpu_max"] != "-", "-"),
+        max_mem_util=format_percent(mem_max, mems2gb(table["mem"])).where(
+            table["mem_max"] != "-", "-"
         ),
-        axis=1,
-    )
-    p1_table["max_mem_util"] = p1_table.apply(
-        lambda row: (
-            "-"
-            if row["mem_max"] == "-"
-            else "%.2f" % (mem2gb(row["mem_max"]) * 100 / mem2gb(row["mem"])) + " %"
+        queued_time_seconds=format_seconds(np.floor(times2sec(table["queued_time"]))),
+        elapsed_time_seconds=format_seconds(elapsed_seconds),
+        timelimit_seconds=format_seconds(timelimit_seconds),
+        time_util=format_percent(
+            elapsed_seconds, timelimit_seconds.where(timelimit_seconds != 0), "- %"
         ),
-        axis=1,
     )
-    p1_table["queued_time_seconds"] = p1_table.apply(
-        lambda row: f"{int(time2sec(row['queued_time']))}", axis=1
-    )
-    p1_table["elapsed_time_seconds"] = p1_table.apply(
-        lambda row: f"{int(time2sec(row['elapsed_time']))}", axis=1
+
+
+def run_dashboard_cli(jobids, backend=None):
+    """
+    Query dashboard_cli for one chunk of jobids.
+
+    Args:
+        jobids (list): Slurm jobids.
+        backend (AccountingBackend, optional): Backend that returns dashboard_cli job records,
+            e.g. [](`~ccbr_tools.accounting.ReplayBackend`). Defaults to [](`~ccbr_tools.accounting.DashboardBackend`).
+
+    Returns:
+        tuple: The job records parsed from the JSON output, and an error message (None on success).
+    """
+    records = []
+    error = None
+    try:
+        records = (backend or DashboardBackend()).fetch(jobids, LONG_FIELDS.split(","))
+    except subprocess.CalledProcessError as err:
+        error = f"exit code {err.returncode}: {(err.stderr or '').strip()}"
+    except OSError as err:
+        error = str(err)
+    except json.JSONDecodeError as err:
+        error = f"invalid JSON output: {err}"
+    return records, error
+
+
+def query_dashboard(joblist, chunk_size=CHUNK_SIZE, workers=WORKERS, backend=None):
+    """
+    Query dashboard_cli for many jobids in chunks, with a bounded pool of concurrent calls.
+
+    Chunks hold at most `chunk_size` jobids and always fit on one command line
+    (see [](`~ccbr_tools.accounting.chunk_job_ids`)).
+    A failed chunk does not stop the other chunks; its jobids are reported instead.
+
+    Args:
+        joblist (list): Slurm jobids.
+        chunk_size (int, optional): Max number of jobids per dashboard_cli call. Defaults to `CHUNK_SIZE`.
+        workers (int, optional): Number of concurrent dashboard_cli calls. Defaults to `WORKERS`.
+        backend (AccountingBackend, optional): Backend that returns dashboard_cli job records.
+            Defaults to [](`~ccbr_tools.accounting.DashboardBackend`).
+
+    Returns:
+        tuple: The merged job records of all chunks, in chunk order, and a list of
+            (jobids, error message) tuples for the chunks that failed.
+    """
+    chunks = chunk_job_ids(joblist, max_jobs=chunk_size)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        results = list(
+            pool.map(functools.partial(run_dashboard_cli, backend=backend), chunks)
+        )
+    records = [record for chunk_records, _ in results for record in chunk_records]
+    failures = [(jobids, error) for jobids, (_, error) in zip(chunks, results) if error]
+    return records, failures
+
+
+def print_failure_report(failures, n_jobs):
+    """Print which chunks of jobids dashboard_cli failed for to stderr."""
+    n_failed = sum(len(jobids) for jobids, _ in failures)
+    print(
+        f"WARNING: dashboard_cli failed for {n_failed} of {n_jobs} jobs "
+        f"({len(failures)} chunks). These jobs are missing from the report:",
+        file=sys.stderr,
     )
-    p1_table["timelimit_seconds"] = p1_table.apply(
-        lambda row: f"{int(time2sec(row['timelimit']))}", axis=1
+    for jobids, error in failures:
+        print(f"  {','.join(jobids)}: {error}", file=sys.stderr)
+
+
+def get_jobinfo(args):
+    """
+    Retrieve job information from dashboard_cli.
+
+    The joblist is queried in chunks of `args.chunk_size` jobids with up to `args.workers`
+    concurrent dashboard_cli calls (see [](`~ccbr_tools.jobinfo.query_dashboard`)).
+    If some chunks fail, the other jobs are still reported, the failed jobids are printed to stderr
+    and kept in the `failed_jobids` entry of the table's `attrs`.
+    The command exits only if all chunks fail.
+    With `args.replay`, job records are read from recorded dashboard_cli output
+    (see [](`~ccbr_tools.accounting.ReplayBackend`)).
+    """
+    replay = getattr(args, "replay", None)
+    records, failures = query_dashboard(
+        args.joblist,
+        chunk_size=getattr(args, "chunk_size", CHUNK_SIZE),
+        workers=getattr(args, "workers", WORKERS),
+        backend=ReplayBackend(replay, output_format="json") if replay else None,
     )
-    p1_table["time_util"] = p1_table.apply(
-        lambda row: (
-            "%.2f"
-            % (
-                float(row["elapsed_time_seconds"])
-                * 100
-                / float(row["timelimit_seconds"])
-            )
-            + " %"
-            if float(row["timelimit_seconds"]) != 0
-            else "- %"
-        ),
-        axis=1,
+    failed_jobids = [jobid for jobids, _ in failures for jobid in jobids]
+    if failures and len(failed_jobids) == len(args.joblist):
+        exit_w_msg("dashboard_cli failed!")
+    if failures:
+        print_failure_report(failures, len(args.joblist))
+    p1_table = add_usage_columns(
+        pd.json_normalize(records)
+        if records
+        else pd.DataFrame(columns=LONG_FIELDS.split(","))
     )
+    p1_table.attrs["failed_jobids"] = failed_jobids
     if args.output:
         try:
             if not p1_table.empty:
@@ -329,8 +501,9 @@ def main():
     # collect all arguments
     """Run the CLI."""
     args = collect_args()
-    # check host
-    check_host()
+    # check host (replayed output can be reported anywhere)
+    if not args.replay:
+        check_host()
     # query dashboard_cli to get details as a pandas table
     t = get_jobinfo(args)
     # filter table, print to screen and write to output file
@@ -0,0 +1,338 @@
+"""
+Scan Snakemake and Nextflow logs for SLURM job submissions and failures in a single pass.
+
+ABOUT:
+    `logscan` is the shared log-scanning engine behind `jobby` and the shell helpers
+    (`get_slurm_file_with_error.sh`, `cancel_snakemake_jobs.sh`).
+    The log is read in large binary chunks, and a single precompiled regex of cheap literal
+    tokens locates the few interesting lines, so only those lines are decoded and parsed.
+    Gzip-compressed (e.g. rotated) logs are read transparently.
+
+    Each interesting line produces a [](`~ccbr_tools.logscan.LogEvent`) with:
+
+    - `kind`: `submit` when a job is submitted to SLURM, or `failure` when a job failed.
+    - `jobid`: the SLURM job ID (None if the log does not say).
+    - `name`: the Snakemake rule or Nextflow process name (without the Nextflow tag).
+    - `task`: the Snakemake job number or Nextflow task ID (None if the log does not say).
+    - `time`: the timestamp string from the log, as written by Snakemake or Nextflow.
+    - `offset`: the byte offset of the line in the (uncompressed) log.
+
+USAGE:
+    ```
+    logscan snakemake.log
+    logscan .nextflow.log --jobids
+    logscan snakemake.log --failed
+    ```
+
+EXAMPLES:
+    ```python
+    from ccbr_tools.logscan import scan_log
+    failed = [event.jobid for event in scan_log("snakemake.log") if event.kind == "failure"]
+    ```
+"""
+
+import collections
+import gzip
+import math
+import re
+
+import click
+
+SCAN_CHUNK_SIZE = 8 * 1024 * 1024  # bytes read from the log at a time
+SCAN_BLOCK_SIZE = 64 * 1024  # bytes read at a time when searching backwards
+
+LogEvent = collections.namedtuple(
+    "LogEvent", ["kind", "jobid", "name", "task", "time", "offset"]
+)
+
+# Cheap literal tokens that every interesting line contains.
+# Lines without any of these tokens are never decoded or parsed.
+PREFILTER = re.compile(
+    rb"(?m)^\[|^(?:local)?(?:rule|checkpoint) |jobid|Error in rule"
+    rb"|\[Task submitter\]|Task completed|Error executing process"
+)
+
+# Snakemake
+SMK_TIMESTAMP = re.compile(r"^\[(\w{3} \w{3} +\d+ \d{2}:\d{2}:\d{2} \d{4})\]\s*$")
+SMK_RULE = re.compile(r"^(?:local)?(?:rule|checkpoint) (\S+):\s*$")
+SMK_JOB = re.compile(r"^\s+jobid: (\d+)\s*$")
+SMK_SUBMIT = re.compile(
+    r"(?:Submitted (?:group )?job (\S+) with )?external jobid\s+['\"](\d+)['\"]"
+)
+SMK_ERROR = re.compile(r"^Error in rule (\S+):")
+# Nextflow
+NXF_TIMESTAMP = re.compile(r"^(\w{3}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}) ")
+NXF_SUBMIT = re.compile(
+    r"\[Task submitter\].*?(?:submitted process (.+?) )?>\s*jobId:\s*(\d+);"
+)
+NXF_COMPLETED = re.compile(
+    r"Task completed > TaskHandler\[jobId: (\d+); id: (\d+); name: (.+?); "
+    r"status: \w+; exit: ([^;]+);"
+)
+NXF_ERROR = re.compile(r"Error executing process > '(.+?)'")
+NXF_TAG = re.compile(r" \(.*\)$")
+
+
+def is_gzipped(filepath):
+    """Whether a file is gzip-compressed, judging by its magic bytes."""
+    with open(filepath, "rb") as infile:
+        magic = infile.read(2)
+    return magic == b"\x1f\x8b"
+
+
+def open_log(filepath):
+    """
+    Open a log file for binary reading, decompressing it if it is gzipped.
+
+    Args:
+        filepath (str or pathlib.Path): Path to the log file.
+
+    Returns:
+        file object: The opened binary file.
+    """
+    return gzip.open(filepath, "rb") if is_gzipped(filepath) else open(filepath, "rb")
+
+
+def get_complete_size(filepath, block_size=SCAN_BLOCK_SIZE):
+    """
+    Get the byte offset just past the last newline of a plain-text log.
+
+    Bytes after this offset belong to a line that is still being written.
+
+    Args:
+        filepath (str or pathlib.Path): Path to the (uncompressed) log file.
+        block_size (int, optional): Number of bytes to read at a time while searching backwards. Defaults to `SCAN_BLOCK_SIZE`.
+
+    Returns:
+        int: The size of the log up to and including its last newline.
+    """
+    complete_size = 0
+    with open(filepath, "rb") as infile:
+        position = infile.seek(0, 2)
+        while position > 0 and not complete_size:
+            block_start = max(position - block_size, 0)
+            infile.seek(block_start)
+            block = infile.read(position - block_start)
+            complete_size = (
+                block_start + block.rfind(b"\n") + 1 if b"\n" in block else 0
+            )
+            position = block_start
+    return complete_size
+
+
+def iter_log_lines(fileobj, chunk_size=SCAN_CHUNK_SIZE, offset=0, limit=None):
+    """
+    Yield the interesting lines of a binary log file, reading it in large chunks.
+
+    Args:
+        fileobj (file object): Binary file object to read from.
+        chunk_size (int, optional): Number of bytes to read at a time. Defaults to `SCAN_CHUNK_SIZE`.
+        offset (int, optional): Byte offset of the current position of `fileobj`. Defaults to 0.
+        limit (int, optional): Maximum number of bytes to read. Defaults to None (read to the end of the file).
+
+    Yields:
+        tuple: The byte offset and the decoded text of each line that matches `PREFILTER`.
+    """
+    remaining = math.inf if limit is None else limit
+    remainder = b""
+    chunk = fileobj.read(min(chunk_size, remaining))
+    while chunk or remainder:
+        remaining -= len(chunk)
+        buffer = remainder + chunk
+        # only scan complete lines; keep the last partial line for the next chunk
+        end = len(buffer) if not chunk else buffer.rfind(b"\n") + 1
+        match = PREFILTER.search(buffer, 0, end)
+        while match:
+            line_start = buffer.rfind(b"\n", 0, match.start()) + 1
+            line_end = buffer.find(b"\n", match.end(), end)
+            line_end = end if line_end == -1 else line_end
+            yield (
+                offset + line_start,
+                buffer[line_start:line_end].decode("utf-8", errors="replace"),
+            )
+            match = PREFILTER.search(buffer, line_end, end)
+        offset += end
+        remainder = buffer[end:]
+        chunk = fileobj.read(min(chunk_size, remaining)) if chunk and remaining else b""
+
+
+def parse_log_lines(lines):
+    """
+    Parse interesting log lines into job events.
+
+    Snakemake logs spread job information over several lines, so the most recent timestamp,
+    rule name and job number are tracked while scanning.
+
+    Args:
+        lines (iterable): Tuples of byte offset and line text, e.g. from [](`~ccbr_tools.logscan.iter_log_lines`).
+
+    Yields:
+        LogEvent: Job submissions and failures in log order.
+    """
+    timestamp = None
+    rule = None
+    smk_rules = {}  # snakemake job number -> rule name
+    smk_jobids = {}  # snakemake job number -> latest SLURM job ID
+    error_rule = None
+    for offset, line in lines:
+        event = None
+        if line.startswith("["):
+            match = SMK_TIMESTAMP.match(line)
+            timestamp = match.group(1) if match else timestamp
+        if "[Task submitter]" in line:
+            match = NXF_SUBMIT.search(line)
+            if match:
+                name = match.group(1)
+                event = LogEvent(
+                    "submit",
+                    match.group(2),
+                    NXF_TAG.sub("", name) if name else None,
+                    None,
+                    get_nxf_timestamp(line),
+                    offset,
+                )
+        elif "Task completed" in line:
+            match = NXF_COMPLETED.search(line)
+            if match and match.group(4) not in ("0", "-"):
+                event = LogEvent(
+                    "failure",
+                    match.group(1),
+                    NXF_TAG.sub("", match.group(3)),
+                    match.group(2),
+                    get_nxf_timestamp(line),
+                    offset,
+                )
+        elif "Error executing process" in line:
+            match = NXF_ERROR.search(line)
+            if match:
+                event = LogEvent(
+                    "failure",
+                    None,
+                    NXF_TAG.sub("", match.group(1)),
+                    None,
+                    get_nxf_timestamp(line),
+                    offset,
+                )
+        elif "external jobid" in line:
+            match = SMK_SUBMIT.search(line)
+            if match:
+                task, jobid = match.groups()
+                smk_jobids[task] = jobid
+                event = LogEvent(
+                    "submit", jobid, smk_rules.get(task, rule), task, timestamp, offset
+                )
+        elif line.startswith("Error in rule"):
+            match = SMK_ERROR.match(line)
+            error_rule = match.group(1) if match else None
+        else:
+            match = SMK_RULE.match(line)
+            if match:
+                rule = match.group(1)
+            else:
+                match = SMK_JOB.match(line)
+                if match and error_rule:
+                    task = match.group(1)
+                    event = LogEvent(
+                        "failure",
+                        smk_jobids.get(task),
+                        error_rule,
+                        task,
+                        timestamp,
+                        offset,
+                    )
+                    error_rule = None
+                elif match and rule:
+                    smk_rules[match.group(1)] = rule
+        if event:
+            yield event
+
+
+def get_nxf_timestamp(line):
+    """Get the timestamp at the start of a Nextflow log line, or None."""
+    match = NXF_TIMESTAMP.match(line)
+    return match.group(1) if match else None
+
+
+def scan_log(filepath, chunk_size=SCAN_CHUNK_SIZE, start=0, stop=None):
+    """
+    Scan a Snakemake or Nextflow log for job submissions and failures in a single pass.
+
+    Args:
+        filepath (str or pathlib.Path): Path to the log file, optionally gzip-compressed.
+        chunk_size (int, optional): Number of bytes to read at a time. Defaults to `SCAN_CHUNK_SIZE`.
+        start (int, optional): Byte offset to start scanning from. It should be the start of a line,
+            e.g. a previous `stop`. Defaults to 0.
+        stop (int, optional): Byte offset to stop scanning at, e.g. from
+            [](`~ccbr_tools.logscan.get_complete_size`). Defaults to None (scan to the end of the log).
+
+    Yields:
+        LogEvent: Job submissions and failures in log order.
+        When scanning from the middle of a Snakemake log, rule names and timestamps
+        of jobs whose rule block precedes `start` are not known.
+
+    Examples:
+        >>> sorted({event.jobid for event in scan_log("snakemake.log") if event.kind == "submit"})
+    """
+    with open_log(filepath) as infile:
+        infile.seek(start)
+        yield from parse_log_lines(
+            iter_log_lines(
+                infile,
+                chunk_size=chunk_size,
+                offset=start,
+                limit=None if stop is None else stop - start,
+            )
+        )
+
+
+def format_events(events):
+    """Format log events as tab-separated lines, with empty strings for missing values."""
+    return "\n".join(
+        "\t".join("" if value is None else str(value) for value in event)
+        for event in events
+    )
+
+
+@click.command(context_settings={"help_option_names": ["-h", "--help"]})
+@click.argument("logfile", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--jobids",
+    "output",
+    flag_value="jobids",
+    help="Print the unique SLURM job IDs of submitted jobs, one per line.",
+)
+@click.option(
+    "--failed",
+    "output",
+    flag_value="failed",
+    help="Print failure events only.",
+)
+def cli(logfile, output):
+    """
+    Scan a Snakemake or Nextflow log for SLURM job submissions and failures.
+
+    By default, all events are printed as tab-separated columns:
+    kind, jobid, name, task, time, offset.
+
+    LOGFILE : Path to snakemake.log or .nextflow.log (may be gzipped)
+    """
+    events = scan_log(logfile)
+    if output == "jobids":
+        out_str = "\n".join(
+            sorted({event.jobid for event in events if event.kind == "submit"})
+        )
+    elif output == "failed":
+        out_str = format_events(event for event in events if event.kind == "failure")
+    else:
+        out_str = format_events(events)
+    if out_str:
+        click.echo(out_str)
+
+
+def main():
+    """Run the CLI."""
+    cli()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,80 @@
 import ast
+import concurrent.futures
+import fnmatch
 import glob
 import json
 import math
+import os
 import pathlib
+import stat
 import tarfile
 import warnings
 
 from .shell import shell_run
 
+# threads listing directories in parallel
+TREE_WORKERS = 8
 
-def get_tree(pipeline_outdir, args="-aJ --du"):
+
+def get_tree(pipeline_outdir, workers=TREE_WORKERS, **kwargs):
     """
-    Generate a directory tree structure using the `tree` command-line utility
+    Generate the directory tree structure of a pipeline output directory.
 
-    Note: when using -J with --du, the output is not valid JSON due to extra trailing commas.
-    It can be parsed with `ast.literal_eval` rather than `json.loads`.
+    The tree has the same structure as the JSON output of `tree -aJ --du`. It is built from the records
+    of [](`~ccbr_tools.paths.iter_tree_records`) rather than by running the `tree` command-line utility,
+    and it is held in memory as a whole; use [](`~ccbr_tools.paths.iter_tree_records`) directly to stream it.
 
     Args:
-        pipeline_outdir (str): The path to the directory for which the tree
+        pipeline_outdir (str or pathlib.Path): The path to the directory for which the tree
             structure will be generated.
-        args (str, optional): Additional arguments to pass to the `tree`
-            command. Defaults to "-aJ" for including hidden files and formatting output as JSON
+        workers (int, optional): Number of threads listing directories in parallel. Defaults to `TREE_WORKERS`.
+        **kwargs: Passed on to [](`~ccbr_tools.paths.iter_tree_records`), e.g. `max_depth`, `max_entries` and `exclude`.
 
     Returns:
-        str: The directory tree structure as a string, stripped of any
-        leading or trailing whitespace.
+        list: The root directory node and the report, e.g.
+            `[{"type": "directory", "name": pipeline_outdir, "size": 8192, "contents": [...]},
+            {"type": "report", "size": 8192, "directories": 1, "files": 0}]`.
+            Directory sizes include everything they contain. Directory nodes have `contents`, file nodes
+            do not, symbolic link nodes have a `target`, and collapsed directories have a `summary`.
     """
-    return shell_run(f"tree {args} {pipeline_outdir}").strip()
+    nodes = {}
+    records = iter_tree_records(pipeline_outdir, workers=workers, **kwargs)
+    for record in records:
+        if record["type"] == "report":
+            report = record
+        else:
+            nodes[record["path"]] = _get_tree_node(record, pipeline_outdir)
+    # directory records come before their contents, so sum sizes from the deepest entries up
+    for relpath in sorted(nodes, key=lambda path: path.count("/"), reverse=True):
+        if relpath != ".":
+            parent = nodes[relpath.rsplit("/", 1)[0] if "/" in relpath else "."]
+            parent["contents"].append(nodes[relpath])
+            parent["size"] += nodes[relpath]["size"]
+    for node in nodes.values():
+        if "contents" in node:
+            node["contents"].sort(
+                key=lambda child: (child["name"].casefold(), child["name"])
+            )
+    return [nodes["."], report]
+
+
+def _get_tree_node(record, pipeline_outdir):
+    """Convert a record from [](`~ccbr_tools.paths.iter_tree_records`) to a node of [](`~ccbr_tools.paths.get_tree`)."""
+    is_root = record["path"] == "."
+    node = {
+        "type": "directory" if is_root else record["type"],
+        "name": str(pipeline_outdir) if is_root else record["path"].rsplit("/", 1)[-1],
+        "size": record["size"],
+    }
+    if "target" in record:
+        node["target"] = record["target"]
+    if "summary" in record:
+        node["size"] += record["summary"]["size"]
+        node["summary"] = record["summary"]
+    # `tree -aJ` lists (empty) contents for links as well as directories, without following them
+    if node["type"] in ("directory", "link"):
+        node["contents"] = []
+    return node
 
 
 def load_tree(tree_str):
@@ -34,6 +82,9 @@ def load_tree(tree_str):
     Load a tree structure from a string, attempting to parse it as JSON or
     Python literal.
 
+    This is only needed for trees saved from the `tree` command-line utility:
+    when using -J with --du, its output is not valid JSON due to extra trailing commas.
+
     Args:
         tree_str (str): The string representation of the tree structure.
     Returns:
@@ -73,6 +124,191 @@ def get_disk_usage(tree_dict, pipeline_outdir):
     return dir_size
 
 
+def iter_tree_records(
+    directory,
+    workers=TREE_WORKERS,
+    max_depth=None,
+    max_entries=None,
+    exclude=None,
+    visit=None,
+):
+    """
+    Walk a directory tree with `os.scandir`, yielding one flat record per entry.
+
+    Unlike [](`~ccbr_tools.paths.get_tree`), the tree is never held in memory: records are yielded while
+    walking, so they can be written straight to a file. Sizes are of each entry itself (not including the
+    contents of directories), and the final report has the total. Hidden files are included, symbolic
+    links are not followed, and unreadable directories are reported as empty. Up to `workers` directories
+    ahead of the walk are listed and stat'ed in parallel threads.
+
+    The records can be condensed for large trees. Directories deeper than `max_depth`, or with more than
+    `max_entries` entries, are collapsed: their record gets a `summary` of everything they contain instead
+    of a record for each entry. Entries matching an `exclude` pattern are left out. Collapsed and excluded
+    entries are still walked, so the report and `visit` see every entry.
+
+    Args:
+        directory (str or pathlib.Path): The directory to walk.
+        workers (int, optional): Number of threads listing directories in parallel. Defaults to `TREE_WORKERS`.
+        max_depth (int, optional): Collapse directories this many levels below `directory`. Defaults to no limit.
+        max_entries (int, optional): Collapse directories with more entries than this. Defaults to no limit.
+        exclude (list, optional): Glob patterns of entries to leave out, matched against the relative path
+            and the name of each entry, e.g. `["work/??/*"]` for the Nextflow task directories or `[".snakemake"]`.
+        visit (callable, optional): Function called with the record of every entry below `directory`,
+            including collapsed and excluded entries.
+
+    Yields:
+        dict: A record for each entry, e.g. `{"path": "results/a.bam", "type": "file", "size": 1024, "mtime": 1718000000}`,
+            with `path` relative to `directory` (`.` for the directory itself) and `mtime` in seconds since the epoch.
+            Symbolic links also have a `target`. Collapsed directories have a `summary` of their contents, e.g.
+            `{"size": 2048, "directories": 1, "files": 2, "extensions": {".bam": 1, ".bai": 1}}`.
+            Directory records are yielded after their entries have been listed. The last record is the report, e.g.
+            `{"type": "report", "size": 1024, "directories": 1, "files": 1}`, as in [](`~ccbr_tools.paths.get_tree`).
+            With `exclude`, the report also has a summary of the excluded entries under `excluded`.
+    """
+    directory = str(directory)
+    exclude = exclude or []
+    report = {"type": "report", "size": 0, "directories": 0, "files": 0}
+    excluded = _new_summary()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        root = _get_tree_record(directory, ".")
+        report["size"] += root["size"]
+        # depth-first, with the listings of the next directories submitted ahead of time.
+        # entries in a collapsed directory share a group, which is yielded when no directories in it are left
+        stack = [(directory, root, 0, None, None)]
+        while stack:
+            dirpath, record, depth, group, listing = stack.pop()
+            listing = (
+                listing.result()
+                if listing
+                else _list_tree_records(dirpath, record["path"])
+            )
+            if group:
+                group["pending"] -= 1
+            elif listing and (
+                (max_depth is not None and depth >= max_depth)
+                or (max_entries is not None and len(listing) > max_entries)
+            ):
+                group = {"record": record, "pending": 0, "summary": _new_summary()}
+            else:
+                yield record
+            subdirs = []
+            for entry_path, entry_record in listing:
+                if visit:
+                    visit(entry_record)
+                is_dir = entry_record["type"] == "directory"
+                report["size"] += entry_record["size"]
+                report["directories" if is_dir else "files"] += 1
+                entry_group = group
+                if not entry_group and _match_tree_patterns(
+                    entry_record["path"], exclude
+                ):
+                    entry_group = {"record": None, "pending": 0, "summary": excluded}
+                if entry_group:
+                    _add_to_summary(entry_group["summary"], entry_record)
+                if is_dir:
+                    if entry_group:
+                        entry_group["pending"] += 1
+                    subdirs.append((entry_path, entry_record, depth + 1, entry_group))
+                elif not entry_group:
+                    yield entry_record
+            if group and group["record"] and not group["pending"]:
+                yield {**group["record"], "summary": group["summary"]}
+            for subdir in reversed(subdirs):
+                stack.append((*subdir, None))
+            for i in range(max(len(stack) - workers, 0), len(stack)):
+                *item, listing = stack[i]
+                if not listing:
+                    stack[i] = (
+                        *item,
+                        pool.submit(_list_tree_records, item[0], item[1]["path"]),
+                    )
+    if exclude:
+        report["excluded"] = excluded
+    yield report
+
+
+def _new_summary():
+    """Create an empty summary of the contents of a collapsed directory."""
+    return {"size": 0, "directories": 0, "files": 0, "extensions": {}}
+
+
+def _add_to_summary(summary, record):
+    """Add a tree record to a summary from [](`~ccbr_tools.paths._new_summary`)."""
+    summary["size"] += record["size"]
+    if record["type"] == "directory":
+        summary["directories"] += 1
+    else:
+        summary["files"] += 1
+        extension = os.path.splitext(record["path"])[1]
+        summary["extensions"][extension] = summary["extensions"].get(extension, 0) + 1
+
+
+def _match_tree_patterns(relpath, patterns):
+    """Check whether the relative path or name of a tree entry matches any of the glob patterns."""
+    name = relpath.rsplit("/", 1)[-1]
+    return any(
+        fnmatch.fnmatchcase(relpath, pattern) or fnmatch.fnmatchcase(name, pattern)
+        for pattern in patterns
+    )
+
+
+def _scan_tree_dir(dirpath):
+    """List the entries of a directory sorted by name, or none if it cannot be read."""
+    try:
+        with os.scandir(dirpath) as dir_entries:
+            entries = sorted(
+                dir_entries, key=lambda entry: (entry.name.casefold(), entry.name)
+            )
+    except OSError:
+        entries = []
+    return entries
+
+
+def _get_tree_record(path, relpath, stat_result=None):
+    """Get the flat tree record of a path without following symbolic links."""
+    try:
+        stat_result = stat_result or os.lstat(path)
+        size, mtime = stat_result.st_size, int(stat_result.st_mtime)
+        mode = stat_result.st_mode
+    except OSError:
+        size, mtime, mode = 0, None, 0
+    if stat.S_ISLNK(mode):
+        try:
+            target = os.readlink(path)
+        except OSError:
+            target = ""
+        record = {
+            "path": relpath,
+            "type": "link",
+            "size": size,
+            "mtime": mtime,
+            "target": target,
+        }
+    else:
+        record = {
+            "path": relpath,
+            "type": "directory" if stat.S_ISDIR(mode) else "file",
+            "size": size,
+            "mtime": mtime,
+        }
+    return record
+
+
+def _list_tree_records(dirpath, relpath):
+    """List the entries of a directory as (path, record) pairs sorted by name."""
+    listing = []
+    for entry in _scan_tree_dir(dirpath):
+        try:
+            stat_result = entry.stat(follow_symlinks=False)
+        except OSError:
+            stat_result = None
+        entry_relpath = entry.name if relpath == "." else f"{relpath}/{entry.name}"
+        listing.append(
+            (entry.path, _get_tree_record(entry.path, entry_relpath, stat_result))
+        )
+    return listing
+
+
 def run_du(dirpath):
     """
     Calculates the total size of a directory in bytes using the `du` shell command.
@@ -131,6 +367,37 @@ def glob_files(
     }
 
 
+def scan_files(directory):
+    """
+    Recursively list the files in a directory with `os.scandir`.
+
+    Like `glob.glob(f"{directory}/**/*", recursive=True)`, hidden directories are not searched,
+    symbolic links to directories are followed, and unreadable directories are skipped.
+    Unlike [](`~ccbr_tools.paths.glob_files`), the tree is walked only once however many
+    patterns are matched against the results.
+
+    Args:
+        directory (str or pathlib.Path): The base directory to search for files.
+
+    Yields:
+        os.DirEntry: Each file in the directory and its subdirectories, including hidden files.
+    """
+    dirpaths = [directory]
+    while dirpaths:
+        dirpath = dirpaths.pop()
+        try:
+            with os.scandir(dirpath) as dir_entries:
+                entries = list(dir_entries)
+        except OSError:
+            entries = []
+        for entry in entries:
+            if entry.is_dir():
+                if not entry.name.startswith("."):
+                    dirpaths.append(entry.path)
+            elif entry.is_file():
+                yield entry
+
+
 def create_tar_archive(files, tar_filename):
     """
     Creates a compressed tar archive (.tar.gz) containing the specified files.
@@ -16,16 +16,18 @@ Main classes & functions
 """
 
 import math
+import os
 import re
 import warnings
 
 
-def count_pipeline_samples(tree_str, pipeline_name):
+def count_pipeline_samples(tree, pipeline_name):
     """
     Count the number of samples in a pipeline run.
 
     Args:
-        tree_str (str): The tree as a JSON string representing the pipeline run output directory (from `tree -aJ` command).
+        tree (str or iterable): The file paths or names in the pipeline run output directory,
+            or the tree as a JSON string (from `tree -aJ` command).
         pipeline_name (str): The name of the pipeline.
 
     Returns:
@@ -33,13 +35,13 @@ def count_pipeline_samples(tree_str, pipeline_name):
         list: The sample names in the pipeline run. Returns an empty list if the pipeline is not recognized.
 
     See Also:
-        `~ccbr_tools.spooker.get_tree`: The function used to generate the tree structure.
+        `~ccbr_tools.paths.iter_tree_records`: The function used to walk the output directory.
     """
     nsamples = math.nan
     sample_names = []
     pipeline = create_pipeline(pipeline_name)
     if pipeline:
-        nsamples, sample_names = pipeline.count_samples(tree_str)
+        nsamples, sample_names = pipeline.count_samples(tree)
     else:
         warnings.warn(
             f"Pipeline {pipeline_name} not recognized. Cannot retrieve samples."
@@ -49,26 +51,29 @@ def count_pipeline_samples(tree_str, pipeline_name):
 
 class Pipeline:
     SAMPLES_PATTERN = None  # must be a regex pattern with exactly one capture group, which excludes slashes
+    # suffixes of filenames written once per sample; the rest of the filename is the sample name
+    SAMPLE_SUFFIXES = ()
+    SAMPLE_NAME_PATTERN = re.compile(r"[a-zA-Z0-9_\-\.]*")
 
     @classmethod
-    def count_samples(cls, tree_str):
+    def count_samples(cls, tree):
         """
         Count the number of samples in a pipeline run.
 
         Args:
-            tree_str (str): The tree as a JSON string representing the pipeline run output directory (from `tree -aJ` command).
-            pipeline_name (str): The name of the pipeline.
+            tree (str or iterable): The file paths or names in the pipeline run output directory,
+                or the tree as a JSON string (from `tree -aJ` command).
 
         Returns:
             int: The number of samples in the pipeline run. Returns NaN if the pipeline is not recognized.
             list: The sample names in the pipeline run. Returns an empty list if the pipeline is not recognized.
         See Also:
-            `~ccbr_tools.spooker.get_tree`: The function used to generate the tree structure.
+            `~ccbr_tools.paths.iter_tree_records`: The function used to walk the output directory.
         """
         nsamples = math.nan
         sample_names = []
         try:
-            sample_names = cls.get_samples(tree_str)
+            sample_names = cls.get_samples(tree)
             nsamples = len(sample_names)
         except Exception as err:  # noqa: BLE001
             warnings.warn(
@@ -77,61 +82,108 @@ class Pipeline:
         return nsamples, sample_names
 
     @classmethod
-    def get_samples(cls, tree_str):
+    def get_samples(cls, tree):
         """
         Get the sample names in a pipeline run.
 
+        Sample names are found by matching the filenames against `SAMPLE_SUFFIXES`, or by searching a
+        JSON tree string for `SAMPLES_PATTERN`.
+
         Args:
-            tree_str (str): The tree as a JSON string representing the pipeline run output directory (from `tree -aJ` command).
+            tree (str or iterable): The file paths or names in the pipeline run output directory,
+                or the tree as a JSON string (from `tree -aJ` command).
 
         Returns:
             list: unique sample names
 
         See Also:
-            `~ccbr_tools.spooker.get_tree`: The function used to generate the tree structure.
+            `~ccbr_tools.paths.iter_tree_records`: The function used to walk the output directory.
+        """
+        if isinstance(tree, str):
+            # get unique set of capture groups for all matches
+            sample_names = set(re.findall(cls.SAMPLES_PATTERN, tree))
+        else:
+            sample_names = {cls.get_sample_name(path) for path in tree}
+            sample_names.discard(None)
+        return sorted(sample_names)
+
+    @classmethod
+    def get_sample_name(cls, path):
+        """
+        Get the sample name from the path of a file written once per sample.
+
+        Args:
+            path (str or pathlib.Path): The file path or name.
+
+        Returns:
+            str: The sample name, or None if the filename does not end with any of `SAMPLE_SUFFIXES`.
+
+        Examples:
+            >>> ASPEN.get_sample_name("bam/S1.reads.bam.bai")
+            'S1'
         """
-        # get unique set of capture groups for all matches
-        return sorted(set(re.findall(cls.SAMPLES_PATTERN, tree_str)))
+        sample_name = None
+        filename = os.path.basename(path)
+        if filename.endswith(cls.SAMPLE_SUFFIXES):
+            for suffix in cls.SAMPLE_SUFFIXES:
+                prefix = filename[: -len(suffix)]
+                if (
+                    sample_name is None
+                    and filename.endswith(suffix)
+                    and cls.SAMPLE_NAME_PATTERN.fullmatch(prefix)
+                ):
+                    sample_name = prefix
+        return sample_name
 
 
 class ASPEN(Pipeline):
     SAMPLES_PATTERN = r'"name":"([a-zA-Z0-9_\-\.]*).reads.bam.bai"'
+    SAMPLE_SUFFIXES = (".reads.bam.bai",)
 
 
 class CARLISLE(Pipeline):
     SAMPLES_PATTERN = r'"name":"([a-zA-Z0-9_\-\.]*).no_dedup.bam.bai"'
+    SAMPLE_SUFFIXES = (".no_dedup.bam.bai",)
 
 
 class CHAMPAGNE(Pipeline):
     SAMPLES_PATTERN = r'"name":"([a-zA-Z0-9_\-\.]*).filtered.sorted.bam.bai"'
+    SAMPLE_SUFFIXES = (".filtered.sorted.bam.bai",)
 
 
 class CHARLIE(Pipeline):
     SAMPLES_PATTERN = r'"name":"([a-zA-Z0-9_\-\.]*).ciri.bam.csi"'
+    SAMPLE_SUFFIXES = (".ciri.bam.csi",)
 
 
 class CRISPIN(Pipeline):
     SAMPLES_PATTERN = r'"name":"([a-zA-Z0-9_\-\.]*).foldchange.txt"'
+    SAMPLE_SUFFIXES = (".foldchange.txt",)
 
 
 class ESCAPE(Pipeline):
     SAMPLES_PATTERN = r'"name":"([a-zA-Z0-9_\-\.]*).Aligned.out.filtered.bam"'
+    SAMPLE_SUFFIXES = (".Aligned.out.filtered.bam",)
 
 
 class LOGAN(Pipeline):
     SAMPLES_PATTERN = r'"name":"([a-zA-Z0-9_\-\.]*).bqsr.bam.bai"'
+    SAMPLE_SUFFIXES = (".bqsr.bam.bai",)
 
 
 class RENEE(Pipeline):
     SAMPLES_PATTERN = r'"name":"([a-zA-Z0-9_\-\.]*).Aligned.toTranscriptome.out.bam"'
+    SAMPLE_SUFFIXES = (".Aligned.toTranscriptome.out.bam",)
 
 
 class SINCLAIR(Pipeline):
     SAMPLES_PATTERN = r'"name":"([a-zA-Z0-9_\-\.]*)seurat_preprocess.rds"'
+    SAMPLE_SUFFIXES = ("seurat_preprocess.rds",)
 
 
 class XAVIER(Pipeline):
     SAMPLES_PATTERN = r'"name":"([a-zA-Z0-9_\-\.]*).input.bam"'
+    SAMPLE_SUFFIXES = (".input.bam",)
 
 
 PIPELINES = {
@@ -0,0 +1,365 @@
+"""
+Synthetic SLURM accounting data and pipeline logs for testing and benchmarking `jobby` without a cluster.
+
+ABOUT:
+    Every job is generated from its job ID and a seed, so the same job always gets the same rule,
+    state, resources and times. This lets the pieces below agree with each other without sharing state:
+
+    - [](`~ccbr_tools.sacct_fixtures.write_snakemake_log`) and [](`~ccbr_tools.sacct_fixtures.write_nextflow_log`)
+      write logs that submit the jobs, in the formats read by [](`~ccbr_tools.logscan.scan_log`).
+    - [](`~ccbr_tools.sacct_fixtures.write_sacct_fixture`) writes `sacct --parsable2` output for the jobs,
+      to replay with `jobby --replay` (see [](`~ccbr_tools.accounting.ReplayBackend`)).
+    - [](`~ccbr_tools.sacct_fixtures.write_sacct_stand_in`) writes a local `sacct` executable that answers
+      `sacct -j a,b,c --format=... --parsable2` calls with generated rows, so the real subprocess path of
+      `jobby` can be exercised. It generates only the requested jobs, so each call is cheap at any run size.
+
+    This module only uses the standard library, so the stand-in starts quickly.
+
+USAGE:
+    ```
+    python -m ccbr_tools.sacct_fixtures -j 50000000,50000001 --format=JobID,State,Elapsed --parsable2
+    ```
+
+EXAMPLES:
+    ```python
+    from ccbr_tools.sacct_fixtures import generate_job_ids, write_snakemake_log, write_sacct_stand_in
+    job_ids = generate_job_ids(1000)
+    write_snakemake_log("snakemake.log", job_ids)
+    write_sacct_stand_in("bin")  # then put bin/ first on PATH
+    ```
+"""
+
+import argparse
+import pathlib
+import random
+import stat
+import sys
+import time
+
+FIRST_JOBID = 50000000
+FIXTURE_START_TIME = 1735689600  # 2025-01-01T00:00:00 UTC
+SUBMIT_INTERVAL_SEC = 2  # time between consecutive submissions
+RULES = ("fastqc", "trim", "align", "sort_bam", "dedup", "call_peaks", "multiqc")
+STATE_WEIGHTS = {
+    "COMPLETED": 90,
+    "FAILED": 4,
+    "TIMEOUT": 2,
+    "OUT_OF_MEMORY": 1,
+    "CANCELLED": 1,
+    "RUNNING": 2,
+}
+EXIT_CODES = {
+    "COMPLETED": "0:0",
+    "FAILED": "1:0",
+    "TIMEOUT": "0:15",
+    "OUT_OF_MEMORY": "0:125",
+    "CANCELLED": "0:15",
+    "RUNNING": "0:0",
+}
+SACCT_FIXTURE_FIELDS = (
+    "JobID",
+    "JobName",
+    "State",
+    "Elapsed",
+    "AllocNodes",
+    "AllocCPUS",
+    "TotalCPU",
+    "ReqMem",
+    "MaxRSS",
+    "ExitCode",
+    "Timelimit",
+    "NodeList",
+    "Start",
+    "End",
+    "Submit",
+    "WorkDir",
+    "MaxDiskRead",
+    "MaxDiskWrite",
+    "AllocTRES",
+    "TRESUsageInMax",
+    "ConsumedEnergyRaw",
+)
+# log lines between submissions that jobby has to skip, as in real logs
+SMK_NOISE_LINES = (
+    "    input: results/{rule}/sample{task}.in",
+    "    output: results/{rule}/sample{task}.out",
+    "    log: logs/{rule}/sample{task}.log",
+    "    wildcards: sample=sample{task}",
+    "    resources: mem_mb=4000, disk_mb=1000, tmpdir=<TBD>",
+)
+NXF_NOISE_LINE = "{time} [Task monitor] DEBUG n.processor.TaskPollingMonitor - !! executor slurm > tasks to be completed: {task} -- submitted tasks are shown below"
+
+
+def generate_job_ids(n_jobs, first_jobid=FIRST_JOBID):
+    """Get `n_jobs` consecutive job IDs as strings."""
+    return [str(jobid) for jobid in range(first_jobid, first_jobid + n_jobs)]
+
+
+def format_slurm_time(seconds):
+    """Format seconds as a SLURM time like `1-02:03:04` or `02:03:04`."""
+    days, seconds = divmod(int(seconds), 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    clock = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    return f"{days}-{clock}" if days else clock
+
+
+def format_iso_time(epoch_seconds):
+    """Format seconds since the epoch as an ISO 8601 time in UTC, as sacct does."""
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(epoch_seconds))
+
+
+def generate_job(jobid, seed=0):
+    """
+    Generate the accounting data of one synthetic job.
+
+    Args:
+        jobid (str or int): The job ID. Jobs are submitted `SUBMIT_INTERVAL_SEC` apart from `FIRST_JOBID` on.
+        seed (int, optional): Seed for the generated values. Defaults to 0.
+
+    Returns:
+        dict: The job's `rule`, `task` number, `state`, `exit_code`, times in epoch seconds
+            (`submit`, `start`, `end`, with `end` None for running jobs) and resources.
+    """
+    rng = random.Random(f"{seed}:{jobid}")
+    task = int(jobid) - FIRST_JOBID + 1
+    state = rng.choices(list(STATE_WEIGHTS), weights=list(STATE_WEIGHTS.values()))[0]
+    cpus = rng.choice((1, 2, 4, 8, 16))
+    timelimit = rng.choice((3600, 4 * 3600, 24 * 3600, 2 * 86400))
+    submit = FIXTURE_START_TIME + (task - 1) * SUBMIT_INTERVAL_SEC
+    start = submit + int(rng.expovariate(1 / 120))
+    runtime = (
+        timelimit if state == "TIMEOUT" else int(rng.uniform(0.05, 0.9) * timelimit)
+    )
+    return {
+        "jobid": str(jobid),
+        "rule": RULES[rng.randrange(len(RULES))],
+        "task": task,
+        "state": state,
+        "exit_code": EXIT_CODES[state],
+        "submit": submit,
+        "start": start,
+        "end": None if state == "RUNNING" else start + runtime,
+        "runtime": runtime,
+        "timelimit": timelimit,
+        "cpus": cpus,
+        "cpu_sec": int(runtime * cpus * rng.uniform(0.1, 1.0)),
+        "req_mem_gb": rng.choice((2, 4, 8, 16, 32, 64)),
+        "mem_fraction": 1.0 if state == "OUT_OF_MEMORY" else rng.uniform(0.05, 0.95),
+        "disk_read": rng.randrange(1, 50 * 1024**3),
+        "disk_write": rng.randrange(1, 10 * 1024**3),
+        "energy": rng.randrange(100, 100000),
+        "node": f"cn{rng.randrange(1, 4000):04d}",
+    }
+
+
+def get_sacct_rows(job):
+    """
+    Get the `sacct` rows of a synthetic job: the job itself, its `.batch` step and its `.extern` step.
+
+    Running jobs have no end time yet, and their usage has not been recorded.
+
+    Args:
+        job (dict): A job from [](`~ccbr_tools.sacct_fixtures.generate_job`).
+
+    Returns:
+        list: The rows as dictionaries keyed by sacct field name.
+    """
+    running = job["end"] is None
+    end = "Unknown" if running else format_iso_time(job["end"])
+    common = {
+        "Elapsed": format_slurm_time(job["runtime"]),
+        "AllocNodes": "1",
+        "AllocCPUS": str(job["cpus"]),
+        "ExitCode": job["exit_code"],
+        "NodeList": job["node"],
+        "Start": format_iso_time(job["start"]),
+        "End": end,
+        "AllocTRES": f"billing={job['cpus']},cpu={job['cpus']},mem={job['req_mem_gb']}G,node=1",
+    }
+    max_rss = f"{round(job['req_mem_gb'] * job['mem_fraction'] * 1024 * 1024)}K"
+    return [
+        {
+            **common,
+            "JobID": job["jobid"],
+            "JobName": job["rule"],
+            "State": job["state"],
+            "TotalCPU": format_slurm_time(job["cpu_sec"]),
+            "ReqMem": f"{job['req_mem_gb']}G",
+            "Timelimit": format_slurm_time(job["timelimit"]),
+            "Submit": format_iso_time(job["submit"]),
+            "WorkDir": f"/data/project/run/{job['rule']}",
+        },
+        {
+            **common,
+            "JobID": f"{job['jobid']}.batch",
+            "JobName": "batch",
+            "State": job["state"],
+            "TotalCPU": format_slurm_time(job["cpu_sec"]),
+            "MaxRSS": "" if running else max_rss,
+            "Submit": format_iso_time(job["start"]),
+            "MaxDiskRead": "" if running else str(job["disk_read"]),
+            "MaxDiskWrite": "" if running else str(job["disk_write"]),
+            "TRESUsageInMax": (
+                ""
+                if running
+                else f"cpu={format_slurm_time(job['cpu_sec'])},mem={max_rss}"
+            ),
+            "ConsumedEnergyRaw": "" if running else str(job["energy"]),
+        },
+        {
+            **common,
+            "JobID": f"{job['jobid']}.extern",
+            "JobName": "extern",
+            "State": "RUNNING" if running else "COMPLETED",
+            "ExitCode": "0:0",
+            "TotalCPU": "00:00:00",
+            "MaxRSS": "" if running else "0",
+            "Submit": format_iso_time(job["start"]),
+        },
+    ]
+
+
+def format_sacct_output(job_ids, fields=SACCT_FIXTURE_FIELDS, seed=0):
+    """
+    Format `sacct --parsable2` output for synthetic jobs.
+
+    Args:
+        job_ids (list): Job IDs to include.
+        fields (list, optional): sacct fields to include, in order. Unknown fields are empty.
+            Defaults to `SACCT_FIXTURE_FIELDS`.
+        seed (int, optional): Seed for the generated values. Defaults to 0.
+
+    Returns:
+        str: The header and one line per job and job step.
+    """
+    lines = ["|".join(fields)]
+    for jobid in job_ids:
+        for row in get_sacct_rows(generate_job(jobid, seed=seed)):
+            lines.append("|".join(row.get(field, "") for field in fields))
+    return "\n".join(lines) + "\n"
+
+
+def write_sacct_fixture(path, job_ids, seed=0):
+    """Write `sacct --parsable2` output with all `SACCT_FIXTURE_FIELDS` for synthetic jobs to a file."""
+    pathlib.Path(path).write_text(format_sacct_output(job_ids, seed=seed))
+
+
+def format_smk_timestamp(epoch_seconds):
+    """Format seconds since the epoch as a Snakemake log timestamp, e.g. `[Wed Jan  1 00:00:00 2025]`."""
+    tm = time.gmtime(epoch_seconds)
+    return f"[{time.strftime('%a %b', tm)} {tm.tm_mday:2d} {time.strftime('%H:%M:%S %Y', tm)}]"
+
+
+def write_snakemake_log(path, job_ids, seed=0):
+    """
+    Write a Snakemake log that submits the synthetic jobs to SLURM, and reports the failed ones.
+
+    Args:
+        path (str or pathlib.Path): Path to write the log to.
+        job_ids (list): Job IDs to submit, in order.
+        seed (int, optional): Seed for the generated values. Defaults to 0.
+    """
+    with open(path, "w") as outfile:
+        outfile.write("Building DAG of jobs...\nUsing shell: /usr/bin/bash\n")
+        for jobid in job_ids:
+            job = generate_job(jobid, seed=seed)
+            noise = "\n".join(SMK_NOISE_LINES).format(**job)
+            outfile.write(
+                f"\n{format_smk_timestamp(job['submit'])}\nrule {job['rule']}:\n{noise}\n"
+                f"    jobid: {job['task']}\n\n"
+                f"Submitted job {job['task']} with external jobid '{jobid}'.\n"
+            )
+            if job["state"] not in ("COMPLETED", "RUNNING"):
+                outfile.write(
+                    f"{format_smk_timestamp(job['end'])}\nError in rule {job['rule']}:\n"
+                    f"    jobid: {job['task']}\n"
+                    f"    log: logs/{job['rule']}/sample{job['task']}.log (check log file(s) for error details)\n"
+                )
+
+
+def format_nxf_timestamp(epoch_seconds):
+    """Format seconds since the epoch as a Nextflow log timestamp, e.g. `Jan-01 00:00:00.000`."""
+    return time.strftime("%b-%d %H:%M:%S.000", time.gmtime(epoch_seconds))
+
+
+def write_nextflow_log(path, job_ids, seed=0):
+    """
+    Write a `.nextflow.log` that submits the synthetic jobs to SLURM, and reports each finished job.
+
+    Args:
+        path (str or pathlib.Path): Path to write the log to.
+        job_ids (list): Job IDs to submit, in order.
+        seed (int, optional): Seed for the generated values. Defaults to 0.
+    """
+    with open(path, "w") as outfile:
+        outfile.write(
+            f"{format_nxf_timestamp(FIXTURE_START_TIME)} [main] DEBUG nextflow.cli.Launcher - $> nextflow run main.nf\n"
+        )
+        for jobid in job_ids:
+            job = generate_job(jobid, seed=seed)
+            name = f"{job['rule'].upper()} (sample{job['task']})"
+            workdir = f"work/{int(jobid) % 256:02x}/{jobid}"
+            outfile.write(
+                f"{format_nxf_timestamp(job['submit'])} [Task submitter] DEBUG nextflow.executor.GridTaskHandler"
+                f" - [SLURM] submitted process {name} > jobId: {jobid}; workDir: {workdir}\n"
+                + NXF_NOISE_LINE.format(
+                    time=format_nxf_timestamp(job["submit"]), task=job["task"]
+                )
+                + "\n"
+            )
+            if job["end"] is not None:
+                exit_status = job["exit_code"].split(":")[0]
+                outfile.write(
+                    f"{format_nxf_timestamp(job['end'])} [Task monitor] DEBUG n.processor.TaskPollingMonitor"
+                    f" - Task completed > TaskHandler[jobId: {jobid}; id: {job['task']}; name: {name};"
+                    f" status: COMPLETED; exit: {exit_status}; error: -; workDir: {workdir}]\n"
+                )
+
+
+def write_sacct_stand_in(bin_dir, seed=0):
+    """
+    Write a `sacct` executable that answers queries with synthetic jobs.
+
+    Put `bin_dir` first on `PATH` to make `jobby` call it instead of SLURM's `sacct`.
+
+    Args:
+        bin_dir (str or pathlib.Path): Directory to write the executable to. Created if needed.
+        seed (int, optional): Seed for the generated values. Defaults to 0.
+
+    Returns:
+        pathlib.Path: Path to the executable.
+    """
+    bin_dir = pathlib.Path(bin_dir)
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    sacct_path = bin_dir / "sacct"
+    package_parent = pathlib.Path(__file__).resolve().parent.parent
+    sacct_path.write_text(
+        "#!/bin/sh\n"
+        f'PYTHONPATH="{package_parent}${{PYTHONPATH:+:$PYTHONPATH}}" '
+        f'exec "{sys.executable}" -m ccbr_tools.sacct_fixtures --seed {seed} "$@"\n'
+    )
+    sacct_path.chmod(
+        sacct_path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH
+    )
+    return sacct_path
+
+
+def main(argv=None):
+    """Answer a `sacct -j a,b,c --format=... --parsable2` call with synthetic jobs."""
+    parser = argparse.ArgumentParser(
+        description="Stand-in for sacct that reports synthetic jobs"
+    )
+    parser.add_argument("-j", "--jobs", required=True, help="comma separated job IDs")
+    parser.add_argument("-o", "--format", default=",".join(SACCT_FIXTURE_FIELDS))
+    parser.add_argument("--seed", type=int, default=0)
+    args, _ = parser.parse_known_args(argv)  # e.g. -P/--parsable2
+    sys.stdout.write(
+        format_sacct_output(
+            args.jobs.split(","), fields=args.format.split(","), seed=args.seed
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -9,20 +9,68 @@ Run `spooker --help` for more information.
 See [](`~ccbr_tools.spooker.spooker`) for the main function
 """
 
+import concurrent.futures
 import gzip
 import json
+import math
 import os
 import pathlib
+import shutil
+import tempfile
+import threading
+import time
+import warnings
 
 import click
 
 from .jobby import jobby
-from .paths import get_disk_usage, get_tree, glob_files, load_tree
-from .pipeline import count_pipeline_samples
+from .paths import get_disk_usage, glob_files, iter_tree_records
+from .pipeline import create_pipeline
 from .pipeline.hpc import Cluster, list_modules, parse_modules
 from .pkg_util import get_random_string, get_timestamp
 from .shell import get_groups, shell_run
 
+# layout of the metadata file: version 1 (no "metadata_version" key) had the nested
+# `tree -aJ --du` output under "outdir_tree", version 2 has flat records under "outdir_records"
+SPOOKER_METADATA_VERSION = 2
+# metadata stages run concurrently by RunMetadata, in the order they are reported
+SPOOKER_STAGES = ("ccbrpipeliner_module", "uid", "groups", "master_job_log", "jobby")
+# seconds to wait for each stage, counted from when the stages start
+SPOOKER_STAGE_TIMEOUTS = {
+    "ccbrpipeliner_module": 60,
+    "uid": 10,
+    "groups": 30,
+    "master_job_log": 120,
+    "jobby": 600,
+}
+
+
+def parse_stage_timeouts(values):
+    """
+    Parse `STAGE=SECONDS` values of the `--stage-timeout` option.
+
+    Args:
+        values (list): The option values, e.g. `["jobby=300"]`.
+
+    Returns:
+        dict: Seconds to wait for each stage, e.g. `{"jobby": 300.0}`.
+
+    Raises:
+        click.BadParameter: If a value is not `STAGE=SECONDS` or the stage is unknown.
+    """
+    stage_timeouts = {}
+    for value in values:
+        stage, _, seconds = value.partition("=")
+        if stage not in SPOOKER_STAGES:
+            raise click.BadParameter(
+                f"unknown stage {stage!r}, expected one of: {', '.join(SPOOKER_STAGES)}"
+            )
+        try:
+            stage_timeouts[stage] = float(seconds)
+        except ValueError as err:
+            raise click.BadParameter(f"expected STAGE=SECONDS, got {value!r}") from err
+    return stage_timeouts
+
 
 @click.command(context_settings={"help_option_names": ["-h", "--help"]})
 @click.option(
@@ -36,13 +84,48 @@ from .shell import get_groups, shell_run
 @click.option(
     "--path", type=click.Path(), default="", help="Path to the pipeline source"
 )
+@click.option(
+    "--tree-depth",
+    type=click.IntRange(min=0),
+    default=None,
+    help="Summarize directories this many levels below the output directory in the tree",
+)
+@click.option(
+    "--tree-max-entries",
+    type=click.IntRange(min=0),
+    default=None,
+    help="Summarize directories with more entries than this in the tree",
+)
+@click.option(
+    "--tree-exclude",
+    multiple=True,
+    help="Glob pattern of paths to leave out of the tree, e.g. 'work/??/*' for Nextflow task directories. Can be repeated.",
+)
+@click.option(
+    "--stage-timeout",
+    "stage_timeouts",
+    multiple=True,
+    metavar="STAGE=SECONDS",
+    callback=lambda ctx, param, value: parse_stage_timeouts(value),
+    help=f"Seconds to wait for a metadata stage before giving up on it. Stages: {', '.join(SPOOKER_STAGES)}. Can be repeated.",
+)
 @click.option(
     "--debug",
     default=None,
     help="Enable debug mode for the HPC cluster",
     hidden=True,
 )
-def cli(outdir, name, version, path, debug):
+def cli(
+    outdir,
+    name,
+    version,
+    path,
+    tree_depth,
+    tree_max_entries,
+    tree_exclude,
+    stage_timeouts,
+    debug,
+):
     """
     spooker 👻
 
@@ -55,6 +138,10 @@ def cli(outdir, name, version, path, debug):
         version,
         path,
         debug=debug,
+        tree_depth=tree_depth,
+        tree_max_entries=tree_max_entries,
+        tree_exclude=list(tree_exclude),
+        stage_timeouts=stage_timeouts,
     )
 
 
@@ -65,6 +152,10 @@ def spooker(
     pipeline_path: str,
     clean=True,
     debug=False,
+    tree_depth=None,
+    tree_max_entries=None,
+    tree_exclude=None,
+    stage_timeouts=None,
 ):
     """
     Processes a pipeline output directory to generate metadata, tree JSON, and SLURM job log JSON,
@@ -77,6 +168,12 @@ def spooker(
         pipeline_path (str): Path to the pipeline source code or configuration.
         clean (bool, optional): Whether to delete the generated metadata file after staging. Defaults to True.
         debug (bool, optional): Whether to enable debug mode for the HPC cluster. Defaults to False.
+        tree_depth (int, optional): Summarize directories this many levels below the output directory in the tree. Defaults to no limit.
+        tree_max_entries (int, optional): Summarize directories with more entries than this in the tree. Defaults to no limit.
+        tree_exclude (list, optional): Glob patterns of paths to leave out of the tree, e.g. `["work/??/*"]`.
+            See [](`~ccbr_tools.paths.iter_tree_records`).
+        stage_timeouts (dict, optional): Seconds to wait for each metadata stage, e.g. `{"jobby": 300}`.
+            Defaults to `SPOOKER_STAGE_TIMEOUTS`, see [](`~ccbr_tools.spooker.RunMetadata`).
 
     Returns:
         pathlib.Path: Path to the staged metadata file on the HPC cluster.
@@ -88,6 +185,10 @@ def spooker(
         - The function collects metadata, generates a tree JSON representation of the pipeline
           directory, and extracts job log information.
         - The metadata is written to a compressed JSON file and staged on an HPC cluster.
+          The tree is streamed to the file while walking, so memory use does not depend on the number of files.
+        - Summarized and excluded parts of the tree still count towards the output directory size and samples.
+        - The other metadata (modules, user, groups, job logs and `jobby`) is collected concurrently while the tree
+          is walked. The run time and status of each stage are saved under "spooker_stages".
         - If `clean` is True, the local metadata file is deleted after staging.
     """
     pipeline_outdir = (
@@ -99,15 +200,30 @@ def spooker(
         raise FileNotFoundError(
             f"Pipeline output directory does not exist: {pipeline_outdir}"
         )
-    metadata = get_spooker_dict(
-        pipeline_outdir, pipeline_name, pipeline_version, pipeline_path
+    run_metadata = RunMetadata(
+        pipeline_outdir,
+        pipeline_name,
+        pipeline_version,
+        pipeline_path,
+        stage_timeouts=stage_timeouts,
     )
-    timestamp = metadata["pipeline_metadata"]["date"]
+    timestamp = run_metadata.timestamp
 
-    # write metadata to json
+    # stream the tree and metadata to json, outside of the tree being walked,
+    # while the other metadata stages run in the background
     meta_outfilename = pipeline_outdir / f"{timestamp}.json.gz"
-    with gzip.open(meta_outfilename, "wt") as outfile:
-        json.dump(metadata, outfile, indent=4)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_filename = pathlib.Path(tmp_dir) / meta_outfilename.name
+        with gzip.open(tmp_filename, "wt") as outfile:
+            metadata = write_spooker_json(
+                outfile,
+                run_metadata,
+                pipeline_outdir,
+                max_depth=tree_depth,
+                max_entries=tree_max_entries,
+                exclude=tree_exclude,
+            )
+        shutil.move(tmp_filename, meta_outfilename)
     assert meta_outfilename.exists()
 
     # copy to staging directory
@@ -130,59 +246,351 @@ def get_spooker_dict(
     pipeline_name: str,
     pipeline_version: str,
     pipeline_path: str,
+    stage_timeouts=None,
+    **tree_kwargs,
 ):
     """
     Generates a metadata dictionary summarizing the state and logs of a pipeline run.
 
+    The metadata stages run in the background while the output directory is walked.
+    The whole output directory tree is held in memory; use [](`~ccbr_tools.spooker.write_spooker_json`)
+    to stream it to a file instead.
+
     Args:
         pipeline_outdir (pathlib.Path): Path to the pipeline output directory.
         pipeline_name (str): Name of the pipeline.
         pipeline_version (str): Version of the pipeline.
         pipeline_path (str): Path to the pipeline definition or script.
+        stage_timeouts (dict, optional): Seconds to wait for each stage, see [](`~ccbr_tools.spooker.RunMetadata`).
+        **tree_kwargs: Passed on to [](`~ccbr_tools.paths.iter_tree_records`), e.g. `max_depth`, `max_entries` and `exclude`.
 
     Returns:
         dict: A dictionary containing:
-            - "outdir_tree": String representation of the output directory tree.
+            - "metadata_version": The layout of the metadata, `SPOOKER_METADATA_VERSION`.
+            - "outdir_records": Records of the output directory tree from [](`~ccbr_tools.paths.iter_tree_records`).
             - "pipeline_metadata": Metadata about the pipeline run.
             - "jobby": JSON-formatted job log records.
             - "master_job_log": Contents of the main job log file.
-            - "failed_jobs": Logs of failed jobs.
-    """
-    metadata = {}
-
-    # tree json
-    tree_str = get_tree(pipeline_outdir)
-    tree_dict = load_tree(tree_str)
-    metadata["outdir_tree"] = tree_dict
-
-    # pipeline metadata
-    timestamp = get_timestamp()
-    nsamples, sample_names = count_pipeline_samples(tree_str, pipeline_name)
-    metadata["pipeline_metadata"] = {
-        "pipeline_name": pipeline_name,
-        "pipeline_path": str(pipeline_path),
-        "pipeline_outdir": str(pipeline_outdir),
-        "pipeline_outdir_size": get_disk_usage(tree_dict, pipeline_outdir),
-        "pipeline_version": pipeline_version,
-        "ccbrpipeliner_module": parse_modules(list_modules()).get(
-            "ccbrpipeliner", None
-        ),
-        "user": os.environ.get("USER"),
-        "uid": shell_run("echo $UID").strip(),
-        "groups": get_groups(),
-        "date": timestamp,
-        "nsamples": nsamples,
-        "sample_names": sample_names,
+            - "spooker_stages": Run time and status of each stage of collecting the metadata.
+    """
+    run_metadata = RunMetadata(
+        pipeline_outdir,
+        pipeline_name,
+        pipeline_version,
+        pipeline_path,
+        stage_timeouts=stage_timeouts,
+    )
+    tree_summary = TreeSummary(pipeline_name)
+    start = time.perf_counter()
+    tree_records = list(
+        iter_tree_records(pipeline_outdir, visit=tree_summary.add, **tree_kwargs)
+    )
+    tree_seconds = time.perf_counter() - start
+    tree_summary.report = tree_records[-1]
+    metadata = {
+        "metadata_version": SPOOKER_METADATA_VERSION,
+        "outdir_records": tree_records,
+        **run_metadata.result(),
+    }
+    metadata["pipeline_metadata"].update(tree_summary.get_metadata(pipeline_outdir))
+    metadata["spooker_stages"]["tree"] = {
+        "seconds": round(tree_seconds, 3),
+        "status": "ok",
     }
+    return metadata
+
+
+def get_run_metadata(
+    pipeline_outdir: pathlib.Path,
+    pipeline_name: str,
+    pipeline_version: str,
+    pipeline_path: str,
+    stage_timeouts=None,
+):
+    """
+    Collect the metadata of a pipeline run that does not depend on the output directory tree.
 
-    # job logs
+    Args:
+        pipeline_outdir (pathlib.Path): Path to the pipeline output directory.
+        pipeline_name (str): Name of the pipeline.
+        pipeline_version (str): Version of the pipeline.
+        pipeline_path (str): Path to the pipeline definition or script.
+        stage_timeouts (dict, optional): Seconds to wait for each stage, see [](`~ccbr_tools.spooker.RunMetadata`).
+
+    Returns:
+        dict: A dictionary containing "pipeline_metadata", "master_job_log", "jobby" and "spooker_stages",
+            as in [](`~ccbr_tools.spooker.get_spooker_dict`). The output directory size and samples in
+            "pipeline_metadata" are `None` until filled in from a [](`~ccbr_tools.spooker.TreeSummary`).
+    """
+    return RunMetadata(
+        pipeline_outdir,
+        pipeline_name,
+        pipeline_version,
+        pipeline_path,
+        stage_timeouts=stage_timeouts,
+    ).result()
+
+
+class RunMetadata:
+    """
+    Collect the metadata of a pipeline run in the background, running each stage in its own thread.
+
+    The stages (`SPOOKER_STAGES`) are independent, apart from `jobby` which reads the log found by
+    `master_job_log`, so they run concurrently with each other and with the walk of the output directory.
+    A stage that is still running after its timeout (counted from when the stages started) is given up:
+    its values are `None`, a warning is issued and the thread is left to finish in the background
+    without keeping the process alive. A stage that fails is reported the same way.
+
+    Attributes:
+        timestamp (str): When the stages were started, used as the date of the run metadata.
+        timeouts (dict): Seconds to wait for each stage.
+        futures (dict): The future of each stage.
+        seconds (dict): The run time of each finished stage.
+
+    Examples:
+        >>> run_metadata = RunMetadata("results", "champagne", "v1.0.0", "/opt/champagne")
+        >>> metadata = run_metadata.result()
+        >>> metadata["spooker_stages"]["jobby"]
+        {'seconds': 2.35, 'status': 'ok'}
+    """
+
+    def __init__(
+        self,
+        pipeline_outdir,
+        pipeline_name,
+        pipeline_version,
+        pipeline_path,
+        stage_timeouts=None,
+    ):
+        self.pipeline_outdir = pipeline_outdir
+        self.pipeline_name = pipeline_name
+        self.pipeline_version = pipeline_version
+        self.pipeline_path = pipeline_path
+        self.timeouts = {**SPOOKER_STAGE_TIMEOUTS, **(stage_timeouts or {})}
+        self.timestamp = get_timestamp()
+        self.seconds = {}
+        self.futures = {}
+        self.start = time.perf_counter()
+        stage_funcs = {
+            "ccbrpipeliner_module": get_ccbrpipeliner_module,
+            "uid": lambda: shell_run("echo $UID").strip(),
+            "groups": get_groups,
+            "master_job_log": lambda: read_master_job_log(self.pipeline_outdir),
+            "jobby": lambda: jobby(
+                [self.futures["master_job_log"].result()["path"]],
+                include_out_err=True,
+            ),
+        }
+        for stage in SPOOKER_STAGES:
+            self.futures[stage] = concurrent.futures.Future()
+        for stage in SPOOKER_STAGES:
+            threading.Thread(
+                target=self._run_stage,
+                args=(stage, stage_funcs[stage]),
+                name=f"spooker-{stage}",
+                daemon=True,
+            ).start()
+
+    def _run_stage(self, stage, func):
+        """Run a stage and set its future."""
+        future = self.futures[stage]
+        start = time.perf_counter()
+        try:
+            future.set_result(func())
+        except Exception as err:  # noqa: BLE001
+            future.set_exception(err)
+        finally:
+            self.seconds[stage] = time.perf_counter() - start
+
+    def get_stage(self, stage):
+        """
+        Wait for a stage until its timeout.
+
+        Args:
+            stage (str): One of `SPOOKER_STAGES`.
+
+        Returns:
+            tuple: The value of the stage (None if it timed out or failed) and its timing,
+                e.g. `{"seconds": 0.5, "status": "ok"}` with status `ok`, `timeout` or `error`.
+        """
+        future = self.futures[stage]
+        remaining = max(self.start + self.timeouts[stage] - time.perf_counter(), 0)
+        done, _ = concurrent.futures.wait([future], timeout=remaining)
+        value = None
+        if not done:
+            status = "timeout"
+            seconds = time.perf_counter() - self.start
+            warnings.warn(
+                f"⚠️ spooker stage {stage} did not finish within {self.timeouts[stage]} seconds"
+            )
+        elif future.exception():
+            status = "error"
+            seconds = self.seconds[stage]
+            warnings.warn(f"⚠️ spooker stage {stage} failed: {future.exception()!r}")
+        else:
+            status = "ok"
+            seconds = self.seconds[stage]
+            value = future.result()
+        return value, {"seconds": round(seconds, 3), "status": status}
+
+    def result(self):
+        """
+        Wait for all stages and assemble the run metadata.
+
+        Returns:
+            dict: See [](`~ccbr_tools.spooker.get_run_metadata`). The timing of each stage is under "spooker_stages".
+        """
+        values = {}
+        stage_timings = {}
+        for stage in SPOOKER_STAGES:
+            values[stage], stage_timings[stage] = self.get_stage(stage)
+        return {
+            "pipeline_metadata": {
+                "pipeline_name": self.pipeline_name,
+                "pipeline_path": str(self.pipeline_path),
+                "pipeline_outdir": str(self.pipeline_outdir),
+                "pipeline_outdir_size": None,
+                "pipeline_version": self.pipeline_version,
+                "ccbrpipeliner_module": values["ccbrpipeliner_module"],
+                "user": os.environ.get("USER"),
+                "uid": values["uid"],
+                "groups": values["groups"],
+                "date": self.timestamp,
+                "nsamples": None,
+                "sample_names": None,
+            },
+            "master_job_log": values["master_job_log"],
+            "jobby": values["jobby"],
+            "spooker_stages": stage_timings,
+        }
+
+
+def get_ccbrpipeliner_module():
+    """Get the version of the loaded `ccbrpipeliner` module, or None if it is not loaded."""
+    return parse_modules(list_modules()).get("ccbrpipeliner", None)
+
+
+def read_master_job_log(pipeline_outdir):
+    """
+    Read the main Snakemake or Nextflow log of a pipeline run.
+
+    Args:
+        pipeline_outdir (pathlib.Path): Path to the pipeline output directory.
+
+    Returns:
+        dict: The contents (`txt`) and `path` of the log.
+    """
     log_file = glob_files(
         pipeline_outdir, patterns=["snakemake.log", ".nextflow.log"]
     ).pop()
     with open(log_file, "r") as infile:
-        metadata["master_job_log"] = {"txt": infile.read(), "path": str(log_file)}
-    jobby_info = jobby([log_file], include_out_err=True)
-    metadata["jobby"] = jobby_info
+        log_txt = infile.read()
+    return {"txt": log_txt, "path": str(log_file)}
+
+
+class TreeSummary:
+    """
+    Accumulate the output directory size and sample names from tree records as they are walked.
+
+    Attributes:
+        pipeline (Pipeline): The pipeline class used to find samples, or None if the pipeline is not recognized.
+        report (dict): The report record of the tree, once the walk is done.
+        sample_names (set): The sample names found so far, from the `SAMPLE_SUFFIXES` of the pipeline.
+    """
+
+    def __init__(self, pipeline_name):
+        self.pipeline = create_pipeline(pipeline_name)
+        if not self.pipeline:
+            warnings.warn(
+                f"Pipeline {pipeline_name} not recognized. Cannot retrieve samples."
+            )
+        self.report = {}
+        self.sample_names = set()
+
+    def add(self, record):
+        """
+        Add an entry record to the summary, as the `visit` function of [](`~ccbr_tools.paths.iter_tree_records`).
+
+        Args:
+            record (dict): The record of a file, link or directory.
+        """
+        if self.pipeline:
+            sample_name = self.pipeline.get_sample_name(record["path"])
+            if sample_name is not None:
+                self.sample_names.add(sample_name)
+
+    def get_metadata(self, pipeline_outdir):
+        """
+        Get the output directory size and samples for the pipeline metadata.
+
+        Args:
+            pipeline_outdir (pathlib.Path): Path to the pipeline output directory, to use `du` if the tree has no report.
+
+        Returns:
+            dict: `pipeline_outdir_size`, `nsamples` and `sample_names`.
+        """
+        nsamples = math.nan
+        sample_names = []
+        if self.pipeline:
+            sample_names = sorted(self.sample_names)
+            nsamples = len(sample_names)
+        return {
+            "pipeline_outdir_size": get_disk_usage([self.report], pipeline_outdir),
+            "nsamples": nsamples,
+            "sample_names": sample_names,
+        }
+
+
+def write_spooker_json(outfile, metadata, pipeline_outdir, **tree_kwargs):
+    """
+    Write the spooker metadata as JSON, streaming the output directory tree.
+
+    The file starts with "metadata_version" (`SPOOKER_METADATA_VERSION`), followed by the tree records
+    under "outdir_records", written one per line while the directory is walked, so memory use does not
+    depend on the number of files. The output directory size and samples are filled in from the tree,
+    and the rest of the metadata is written after it. The time spent walking the tree is added to
+    "spooker_stages".
+
+    Args:
+        outfile (file): Text file to write to, e.g. from `gzip.open(filename, "wt")`.
+        metadata (dict or RunMetadata): Metadata from [](`~ccbr_tools.spooker.get_run_metadata`), or a
+            [](`~ccbr_tools.spooker.RunMetadata`) still collecting it while the tree is walked.
+            Its "pipeline_metadata" is updated with the size and samples.
+        pipeline_outdir (pathlib.Path): Path to the pipeline output directory.
+        **tree_kwargs: Passed on to [](`~ccbr_tools.paths.iter_tree_records`), e.g. `max_depth`, `max_entries` and `exclude`.
+
+    Returns:
+        dict: The metadata, without the tree.
+    """
+    pipeline_name = (
+        metadata.pipeline_name
+        if isinstance(metadata, RunMetadata)
+        else metadata["pipeline_metadata"]["pipeline_name"]
+    )
+    tree_summary = TreeSummary(pipeline_name)
+    start = time.perf_counter()
+    outfile.write(
+        f'{{\n"metadata_version": {SPOOKER_METADATA_VERSION},\n"outdir_records": ['
+    )
+    separator = "\n"
+    for record in iter_tree_records(
+        pipeline_outdir, visit=tree_summary.add, **tree_kwargs
+    ):
+        outfile.write(separator + json.dumps(record))
+        separator = ",\n"
+    tree_summary.report = record
+    outfile.write("\n]")
+    tree_seconds = time.perf_counter() - start
+    if isinstance(metadata, RunMetadata):
+        metadata = metadata.result()
+    metadata["pipeline_metadata"].update(tree_summary.get_metadata(pipeline_outdir))
+    metadata.setdefault("spooker_stages", {})["tree"] = {
+        "seconds": round(tree_seconds, 3),
+        "status": "ok",
+    }
+    for key, value in metadata.items():
+        outfile.write(f",\n{json.dumps(key)}: {json.dumps(value, indent=4)}")
+    outfile.write("\n}\n")
     return metadata
 
 
@@ -13,3 +13,11 @@ def data_dir():
 def data_dir_rel():
     """Return the relative path to the test data directory."""
     return pathlib.Path("tests") / "data"
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path, monkeypatch):
+    """Keep caches written during tests (e.g. the jobby sacct cache) out of the user's home."""
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache_dir))
+    return cache_dir
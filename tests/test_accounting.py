@@ -0,0 +1,129 @@
+import json
+import subprocess
+
+import numpy as np
+import pytest
+
+from ccbr_tools.accounting import (
+    DashboardBackend,
+    ReplayBackend,
+    SacctBackend,
+    chunk_job_ids,
+    extract_jobids,
+    parse_mems_to_gb,
+    parse_times_to_seconds,
+)
+
+SACCT_RECORDING = """JobID|JobName|State|Elapsed
+101|trim|COMPLETED|00:02:00
+101.batch|batch|COMPLETED|00:02:00
+102|align|FAILED|00:01:00
+103|call|RUNNING|00:00:30
+"""
+
+
+def test_sacct_backend(mocker):
+    """Test sacct backend."""
+    mock_sacct = mocker.patch(
+        "ccbr_tools.accounting.subprocess.check_output",
+        return_value="JobID|State\n101|COMPLETED\n",
+    )
+    lines = SacctBackend().fetch([101, "102"], ["JobID", "State"])
+    assert lines == ["JobID|State", "101|COMPLETED"]
+    assert mock_sacct.call_args.args[0] == [
+        "sacct",
+        "-j",
+        "101,102",
+        "--format=JobID,State",
+        "-P",
+        "--parsable2",
+    ]
+
+
+def test_dashboard_backend(mocker):
+    """Test dashboard backend."""
+
+    class DummyProc:
+        def __init__(self, returncode, stdout, stderr=""):
+            self.returncode = returncode
+            self.stdout = stdout
+            self.stderr = stderr
+
+    mock_run = mocker.patch(
+        "ccbr_tools.accounting.subprocess.run",
+        return_value=DummyProc(0, json.dumps([{"jobid": "1", "state": "FAILED"}])),
+    )
+    assert DashboardBackend().fetch(["1"], ["jobid", "state"]) == [
+        {"jobid": "1", "state": "FAILED"}
+    ]
+    assert mock_run.call_args.args[0][1:4] == ["jobs", "--joblist", "1"]
+    assert mock_run.call_args.args[0][-1] == "jobid,state"
+    mock_run.return_value = DummyProc(1, "", "invalid jobid")
+    with pytest.raises(subprocess.CalledProcessError) as exc_info:
+        DashboardBackend().fetch(["x"], ["jobid"])
+    assert exc_info.value.stderr == "invalid jobid"
+
+
+def test_replay_backend_sacct(tmp_path):
+    """Test replay backend with recorded sacct output."""
+    path = tmp_path / "sacct.txt"
+    path.write_text(SACCT_RECORDING)
+    backend = ReplayBackend(path)
+    assert backend.output_format == "sacct"
+    assert backend.fetch(["101", 103, "999"], ["JobID", "Elapsed", "MaxRSS"]) == [
+        "JobID|Elapsed|MaxRSS",
+        "101|00:02:00|",
+        "101.batch|00:02:00|",
+        "103|00:00:30|",
+    ]
+    assert backend.fetch(["999"], ["JobID"]) == ["JobID"]
+
+
+def test_replay_backend_json(tmp_path):
+    """Test replay backend with recorded dashboard_cli output."""
+    path = tmp_path / "jobs.json"
+    path.write_text(
+        json.dumps(
+            [
+                {"jobid": "1", "state": "COMPLETED", "mem": "1 GB"},
+                {"jobid": 2, "state": "FAILED", "mem": "2 GB"},
+            ]
+        )
+    )
+    backend = ReplayBackend(path)
+    assert backend.output_format == "json"
+    assert backend.fetch(["2", "3"], ["jobid", "state", "std_err"]) == [
+        {"jobid": 2, "state": "FAILED"}
+    ]
+
+
+def test_extract_jobids(tmp_path):
+    """Test extract jobids."""
+    log = tmp_path / "snakemake.log"
+    log.write_text(
+        "Submitted job 1 with external jobid '456'.\n"
+        "Submitted job 2 with external jobid '123'.\n"
+        "Submitted job 1 with external jobid '456'.\n"
+    )
+    assert extract_jobids(log) == ["123", "456"]
+
+
+def test_chunk_job_ids_max_chars():
+    """Test chunk job ids within the argument length limit."""
+    chunks = chunk_job_ids([str(jobid) for jobid in range(10000, 10100)], max_jobs=30)
+    assert [len(chunk) for chunk in chunks] == [30, 30, 30, 10]
+    assert all(len(",".join(chunk)) <= 30 * 6 for chunk in chunks)
+
+
+def test_parse_dashboard_values():
+    """Test parsing the time and memory formats of dashboard_cli."""
+    np.testing.assert_array_equal(
+        parse_mems_to_gb(["4.5 GB", "512 MB", "1048576 KB", "0", "-"], warn=False),
+        [4.5, 0.5, 1.0, 0.0, np.nan],
+    )
+    np.testing.assert_array_equal(
+        parse_times_to_seconds(["1-00:00:00", "03:04", "UNLIMITED"], warn=False),
+        [86400, 184, np.nan],
+    )
+    with pytest.warns(UserWarning, match="Invalid memory format in 2 value"):
+        parse_mems_to_gb(["-", "1G", "-"])
@@ -50,6 +50,13 @@ def test_help_jobby():
     assert "jobby <jobid1> [jobid2 ...] " in shell_run("jobby -h")
 
 
+def test_help_logscan():
+    """Test help logscan."""
+    assert "Scan a Snakemake or Nextflow log for SLURM job submissions" in shell_run(
+        "logscan -h"
+    )
+
+
 def test_help_jobinfo():
     """Test help jobinfo."""
     jobinfo_help = shell_run("jobinfo -h")
@@ -0,0 +1,61 @@
+import json
+
+import pandas as pd
+import pytest
+from click.testing import CliRunner
+
+from ccbr_tools.job_benchmark import (
+    BENCHMARK_STAGES,
+    cli,
+    compare_to_baseline,
+    run_benchmark,
+)
+
+
+@pytest.mark.parametrize(
+    "log_format,backend", [("snakemake", "exec"), ("nextflow", "replay")]
+)
+def test_run_benchmark(tmp_path, log_format, backend):
+    """Test run benchmark."""
+    result = run_benchmark(30, tmp_path, log_format=log_format, backend=backend)
+    assert result["n_found"] == result["n_records"] == 30
+    assert all(result[f"{stage}_sec"] >= 0 for stage in BENCHMARK_STAGES)
+    assert result["peak_rss_mb"] > 0
+
+
+def test_compare_to_baseline():
+    """Test compare to baseline."""
+    run = {"n_jobs": 1000, "log_format": "snakemake", "backend": "exec", "workers": 1}
+    times = {f"{stage}_sec": 1.0 for stage in (*BENCHMARK_STAGES, "total")}
+    baseline = pd.DataFrame([{**run, **times, "format_sec": 0.01}])
+    results = pd.DataFrame([{**run, **times, "sacct_sec": 2.0, "format_sec": 0.1}])
+    assert compare_to_baseline(results, baseline) == [
+        "1000 jobs: sacct 1.00s -> 2.00s (2.00x)"
+    ]
+    assert compare_to_baseline(results, baseline, tolerance=2.5) == []
+
+
+def test_cli(tmp_path):
+    """Test the benchmark CLI, with a regression against a fast baseline."""
+    runner = CliRunner()
+    result = runner.invoke(cli, ["--sizes", "20", "--backend", "replay", "--json"])
+    assert result.exit_code == 0
+    (row,) = json.loads(result.output)
+    assert row["n_jobs"] == 20
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps([{**row, "total_sec": 0.05, "sacct_sec": 0.0}]))
+    result = runner.invoke(
+        cli,
+        [
+            "--sizes",
+            "20",
+            "--backend",
+            "replay",
+            "--baseline",
+            str(baseline),
+            "--tolerance",
+            "0",
+        ],
+    )
+    assert result.exit_code == 1
+    assert "20 jobs: total 0.05s" in result.output
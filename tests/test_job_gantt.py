@@ -0,0 +1,130 @@
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+
+from ccbr_tools.job_gantt import (
+    STATE_COLORS,
+    assign_lanes,
+    format_elapsed,
+    get_gantt_grid,
+    get_state_keys,
+    get_time_ticks,
+    render_gantt_html,
+    render_gantt_svg,
+)
+
+
+def make_jobs(jobs):
+    """Make job records from (rule, state, start, end) with times in minutes after midnight."""
+    base = pd.Timestamp("2025-01-01T00:00:00")
+    return pd.DataFrame(
+        {
+            "JobId": [str(idx) for idx in range(len(jobs))],
+            "JobName": [rule for rule, _, _, _ in jobs],
+            "JobState": [state for _, state, _, _ in jobs],
+            "QueuedTime": base.isoformat(),
+            "StartTime": [
+                "Unknown"
+                if start is None
+                else (base + pd.Timedelta(minutes=start)).isoformat()
+                for _, _, start, _ in jobs
+            ],
+            "EndTime": [
+                "Unknown"
+                if end is None
+                else (base + pd.Timedelta(minutes=end)).isoformat()
+                for _, _, _, end in jobs
+            ],
+        }
+    )
+
+
+def test_get_state_keys():
+    """Test get state keys."""
+    assert get_state_keys(
+        pd.Series(["COMPLETED", "CANCELLED by 123", "REQUEUED", None])
+    ).tolist() == ["COMPLETED", "CANCELLED", "OTHER", "OTHER"]
+
+
+def test_assign_lanes():
+    """Test assign lanes."""
+    start = np.array([0.0, 0.0, 5.0, 10.0, 0.0])
+    end = np.array([5.0, 10.0, 10.0, 20.0, 1.0])
+    groups = np.array(["a", "a", "a", "a", "b"])
+    lanes, n_lanes = assign_lanes(start, end, groups)
+    assert lanes.tolist() == [0, 1, 0, 0, 0]
+    assert n_lanes == {"a": 2, "b": 1}
+
+
+def test_get_gantt_grid():
+    """Test get gantt grid."""
+    jobs = make_jobs(
+        [
+            ("align", "COMPLETED", 0, 50),
+            ("align", "FAILED", 0, 100),
+            ("trim", "RUNNING", 50, None),
+            ("trim", "PENDING", None, None),
+        ]
+    )
+    gantt = get_gantt_grid(jobs, width=10)
+    assert gantt["rules"] == [("align", 0, 2, 2), ("trim", 2, 1, 1)]
+    assert gantt["end"] - gantt["start"] == 6000
+    completed, failed, running = (
+        list(STATE_COLORS).index(state) for state in ("COMPLETED", "FAILED", "RUNNING")
+    )
+    assert gantt["grid"].tolist() == [
+        [completed] * 5 + [-1] * 5,
+        [failed] * 10,
+        [-1] * 5 + [running] * 5,
+    ]
+    # lanes are merged when there are too many, keeping the most severe state
+    gantt = get_gantt_grid(jobs, width=10, max_rows=1)
+    assert gantt["grid"].tolist()[0] == [failed] * 10
+    assert get_gantt_grid(jobs.iloc[:0], width=10)["grid"].shape == (0, 10)
+
+
+def test_get_time_ticks():
+    """Test get time ticks."""
+    assert get_time_ticks(3600) == [0, 900, 1800, 2700, 3600]
+    assert len(get_time_ticks(365 * 86400)) <= 13
+    assert format_elapsed(90061) == "1d 01:01"
+
+
+def test_render_gantt(tmp_path):
+    """Test render gantt."""
+    rng = np.random.default_rng(0)
+    n_jobs = 20000
+    starts = rng.uniform(0, 1000, n_jobs)
+    jobs = make_jobs(
+        [
+            (f"rule{idx % 7}", "FAILED" if idx == 5 else "COMPLETED", start, start + 10)
+            for idx, start in enumerate(starts.tolist())
+        ]
+    )
+    svg = render_gantt_svg(jobs, width=300, max_rows=50)
+    root = ET.fromstring(svg)
+    # one path per state, not one element per job
+    paths = root.findall("{http://www.w3.org/2000/svg}path")
+    assert [path.find("{http://www.w3.org/2000/svg}title").text for path in paths] == [
+        "FAILED",
+        "COMPLETED",
+    ]
+    assert len(list(root.iter())) < 200
+    html = render_gantt_html(jobs.assign(rule="<b>"), title="run & co")
+    assert "<title>run &amp; co</title>" in html
+    assert "&lt;b&gt;" in html and "<b>" not in html
+    assert "FAILED (1)" in html and "COMPLETED (19999)" in html
+
+
+def test_render_gantt_unfinished_jobs():
+    """Test render gantt with running and pending jobs among few finished jobs."""
+    jobs = make_jobs(
+        [("align", "COMPLETED", idx * 10, idx * 10 + 5) for idx in range(5)]
+        + [("call", "RUNNING", 60, None), ("call", "PENDING", None, None)]
+    )
+    html = render_gantt_html(jobs)
+    assert "RUNNING (1)" in html and "OTHER (1)" in html
+    assert html.count("<td>00:05</td>") == 5
+    assert format_elapsed(np.nan) == ""
+    assert format_elapsed(90061) == "1d 01:01"
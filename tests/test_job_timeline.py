@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+from ccbr_tools.job_timeline import (
+    get_bottleneck,
+    get_concurrency,
+    get_critical_path,
+    get_epoch_seconds,
+    summarize_timeline,
+)
+
+
+def make_jobs(times):
+    """Make job records from (submit, start, end) minutes after midnight."""
+    base = pd.Timestamp("2025-01-01T00:00:00")
+    return pd.DataFrame(
+        {
+            column: [
+                "Unknown"
+                if job[idx] is None
+                else (base + pd.Timedelta(minutes=job[idx])).isoformat()
+                for job in times
+            ]
+            for idx, column in enumerate(["QueuedTime", "StartTime", "EndTime"])
+        }
+    )
+
+
+def test_get_epoch_seconds():
+    """Test get epoch seconds."""
+    seconds = get_epoch_seconds(["1970-01-01T00:01:00", "Unknown", None])
+    assert seconds[0] == 60
+    assert np.isnan(seconds[1:]).all()
+
+
+def test_get_concurrency():
+    """Test get concurrency."""
+    start = np.array([0.0, 5.0, 10.0, 0.0, np.nan])
+    end = np.array([5.0, 10.0, 20.0, 15.0, np.nan])
+    concurrency = get_concurrency(start, end)
+    # back-to-back jobs are not counted twice
+    assert concurrency.values.tolist() == [
+        [0.0, 2],
+        [5.0, 2],
+        [10.0, 2],
+        [15.0, 1],
+        [20.0, 0],
+    ]
+    assert get_concurrency(np.array([]), np.array([])).empty
+
+
+def test_get_critical_path():
+    """Test get critical path."""
+    start = np.array([0.0, 5.0, 10.0, 0.0, np.nan, 2.0])
+    end = np.array([5.0, 10.0, 20.0, 15.0, np.nan, 3.0])
+    assert get_critical_path(start, end) == (20.0, [0, 1, 2])
+    # a long job beats a chain of short ones
+    assert get_critical_path(np.array([0.0, 0.0]), np.array([1.0, 30.0])) == (
+        30.0,
+        [1],
+    )
+    assert get_critical_path(np.array([]), np.array([])) == (0.0, [])
+
+
+def test_summarize_timeline():
+    """Test summarize timeline."""
+    # three independent jobs that waited long in the queue
+    summary = summarize_timeline(make_jobs([(0, 30, 40), (0, 30, 40), (0, 35, 40)]))
+    assert summary["makespan_sec"] == 2400.0
+    assert summary["sum_runtime_sec"] == 1500.0
+    assert summary["max_concurrency"] == 3
+    assert summary["queue_wait_p50_sec"] == 1800.0
+    assert summary["queue_wait_max_sec"] == 2100.0
+    assert summary["critical_path_jobs"] == 1
+    assert summary["bottleneck"] == "scheduling"
+    # jobs that ran one after another
+    summary = summarize_timeline(make_jobs([(0, 0, 10), (10, 10, 20), (0, None, None)]))
+    assert summary["n_jobs"] == 3
+    assert summary["n_finished"] == 2
+    assert summary["critical_path_fraction"] == 1.0
+    assert summary["bottleneck"] == "compute"
+    # two jobs at a time, for most of the run
+    summary = summarize_timeline(
+        make_jobs([(0, 0, 10), (0, 0, 10), (0, 10, 20), (0, 10, 20), (0, 20, 25)])
+    )
+    assert summary["saturation_fraction"] == 0.8
+    assert summary["bottleneck"] == "throttling"
+
+
+def test_get_bottleneck():
+    """Test get bottleneck."""
+    assert (
+        get_bottleneck(
+            {
+                "critical_path_fraction": np.nan,
+                "queue_wait_fraction": np.nan,
+                "saturation_fraction": np.nan,
+                "max_concurrency": 0,
+            }
+        )
+        == "mixed"
+    )
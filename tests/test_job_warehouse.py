@@ -0,0 +1,171 @@
+import json
+
+import pandas as pd
+import pytest
+
+from ccbr_tools.job_warehouse import (
+    JobWarehouse,
+    format_recommendations,
+    get_warehouse_path,
+    recommend_resources,
+    summarize_usage,
+)
+
+
+def make_jobs(rule, mem_used, n_jobs=3):
+    """Make normalized job records for one rule."""
+    return pd.DataFrame(
+        {
+            "JobId": [f"{rule}{idx}" for idx in range(n_jobs)],
+            "JobName": rule,
+            "JobState": ["COMPLETED"] * (n_jobs - 1) + ["CANCELLED by 123"],
+            "NumCPUs": 2,
+            "CPUEfficiency": [50.0, 60.0, 70.0][:n_jobs],
+            "ReqMemGB": 10.0,
+            "MaxMemUsedGB": mem_used,
+            "ExitCode": pd.array([0] * n_jobs, dtype="Int64"),
+            "ElapsedSec": 600.0,
+            "TimelimitSec": 3600.0,
+            "StartTime": [
+                "2025-01-01T00:00:00",
+                "2025-02-01T00:00:00",
+                "2025-03-01T00:00:00",
+            ][:n_jobs],
+            "log_err_txt": "ignored",
+        }
+    )
+
+
+def test_get_warehouse_path(monkeypatch, tmp_path):
+    """Test get warehouse path."""
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path))
+    assert get_warehouse_path() == tmp_path / "ccbr_tools" / "jobby_warehouse.sqlite"
+
+
+def test_job_warehouse(tmp_path):
+    """Test job warehouse."""
+    with JobWarehouse(tmp_path / "warehouse.sqlite") as warehouse:
+        assert (
+            warehouse.add_jobs(
+                make_jobs("align", [1.0, 2.0, 3.0]), "run1", "RENEE", "v1"
+            )
+            == 3
+        )
+        # ingesting the same run again does not add duplicates
+        assert (
+            warehouse.add_jobs(
+                make_jobs("align", [1.0, 2.0, 3.0]), "run1", "RENEE", "v1"
+            )
+            == 0
+        )
+        assert (
+            warehouse.add_jobs(
+                make_jobs("align", [4.0, 5.0, 6.0]), "run2", "RENEE", "v2"
+            )
+            == 3
+        )
+        assert (
+            warehouse.add_jobs(
+                make_jobs("trim", [9.0, 9.0], n_jobs=2), "run2", "CHAMPAGNE"
+            )
+            == 2
+        )
+    with JobWarehouse(tmp_path / "warehouse.sqlite") as warehouse:
+        jobs = warehouse.load_jobs()
+        assert len(jobs) == 8
+        assert set(jobs["rule"]) == {"align", "trim"}
+        assert jobs["ExitCode"].tolist() == [0] * 8
+        assert len(warehouse.load_jobs(pipeline="RENEE")) == 6
+        assert len(warehouse.load_jobs(state="CANCELLED")) == 3
+        assert len(warehouse.load_jobs(state="COMPLETED", since="2025-02-01")) == 2
+        # jobs that never started do not pass the since filter
+        warehouse.add_jobs(
+            make_jobs("call", [1.0], n_jobs=1).assign(StartTime="Unknown"),
+            "run3",
+            "RENEE",
+        )
+        assert len(warehouse.load_jobs(since="2025-02-01")) == 5
+        assert len(warehouse.load_jobs()) == 9
+        assert "log_err_txt" not in jobs.columns
+
+
+def test_summarize_usage(tmp_path):
+    """Test summarize usage."""
+    with JobWarehouse(tmp_path / "warehouse.sqlite") as warehouse:
+        warehouse.add_jobs(make_jobs("align", [1.0, 2.0, 3.0]), "run1", "RENEE")
+        warehouse.add_jobs(make_jobs("align", [4.0, 5.0, 6.0]), "run2", "RENEE")
+        warehouse.add_jobs(make_jobs("trim", [9.0, 9.0], n_jobs=2), "run2", "RENEE")
+        summary = summarize_usage(warehouse.load_jobs())
+    assert summary[["pipeline", "rule", "n_jobs", "n_runs"]].values.tolist() == [
+        ["RENEE", "align", 6, 2],
+        ["RENEE", "trim", 2, 1],
+    ]
+    assert summary["MaxMemUsedGB_p50"].tolist() == [3.5, 9.0]
+    assert summary["MaxMemUsedGB_p95"].tolist() == pytest.approx([5.75, 9.0])
+    assert summary["MemUsedFraction_p95"].tolist() == pytest.approx([0.57, 0.9])
+    assert summary["TimeUsedFraction_p50"].tolist() == pytest.approx([0.17, 0.17])
+    assert summarize_usage(
+        make_jobs("align", [1.0, 2.0, 3.0]).assign(run_id="x"), by=["JobState"]
+    )["n_jobs"].tolist() == [1, 2]
+
+
+def test_recommend_resources():
+    """Test recommend resources."""
+    jobs = pd.concat(
+        [
+            make_jobs("align", [1.0, 2.0, 3.0]).assign(
+                ElapsedSec=[600.0, 1200.0, 3000.0]
+            ),
+            make_jobs("trim", [9.0, 9.6], n_jobs=2).assign(
+                CPUEfficiency=[100.0, 100.0]
+            ),
+            pd.DataFrame({"JobId": ["x"], "rule": ["empty"], "NumCPUs": [None]}),
+        ]
+    )
+    jobs["rule"] = jobs["rule"].fillna(jobs["JobName"])
+    recs = recommend_resources(jobs)
+    assert recs["rule"].tolist() == ["align", "empty", "trim"]
+    # p95 of usage * 1.2, rounded up
+    assert recs["mem_gb"].tolist() == [4, pd.NA, 12]
+    # never more CPUs than requested
+    assert recs["cpus"].tolist() == [2, pd.NA, 2]
+    assert recs["time_min"].tolist() == [57, pd.NA, 12]
+    assert (
+        recommend_resources(jobs, quantile=0.5, headroom=1.0)["mem_gb"].tolist()[0] == 2
+    )
+
+
+def test_format_recommendations():
+    """Test format recommendations."""
+    recs = pd.DataFrame(
+        {
+            "rule": ["align", "empty"],
+            "mem_gb": pd.array([4, None], dtype="Int64"),
+            "cpus": pd.array([2, None], dtype="Int64"),
+            "time_min": pd.array([75, None], dtype="Int64"),
+        }
+    )
+    assert json.loads(format_recommendations(recs, "cluster-json")) == {
+        "align": {"mem": "4g", "threads": 2, "time": "1:15:00"},
+        "empty": {},
+    }
+    assert format_recommendations(recs, "snakemake-profile") == (
+        "set-resources:\n"
+        "  align:\n"
+        "    mem_mb: 4096\n"
+        "    runtime: 75\n"
+        "  empty:\n"
+        "set-threads:\n"
+        "  align: 2"
+    )
+    assert format_recommendations(recs.iloc[:1], "nextflow") == (
+        "process {\n"
+        "    withName: 'align' {\n"
+        "        cpus = 2\n"
+        "        memory = '4 GB'\n"
+        "        time = '75m'\n"
+        "    }\n"
+        "}"
+    )
+    with pytest.raises(ValueError):
+        format_recommendations(recs, "cwl")
@@ -1,21 +1,51 @@
 import gzip
+import io
+import json
 import os
 import pickle
 import pprint
+import subprocess
+import time
 
 import numpy as np
 import pandas as pd
 import pytest
 
+import ccbr_tools.jobby
+from ccbr_tools.accounting import ReplayBackend
 from ccbr_tools.jobby import (
+    JobLogIndex,
+    RateLimiter,
+    SacctCache,
+    chunk_job_ids,
     extract_jobids_from_file,
+    fetch_records,
     format_df,
+    gantt,
     get_job_logs,
+    get_sacct_cache_path,
+    get_sacct_info,
+    ingest,
+    iter_record_chunks,
     jobby,
     list_records,
+    merge_tres,
     parse_mem_to_gb,
+    parse_mems_to_gb,
+    parse_sacct_output,
+    parse_slurm_number,
     parse_time_to_seconds,
+    parse_times_to_seconds,
+    pop_option_value,
+    query_warehouse,
+    read_job_logs,
+    read_log_excerpt,
+    read_slurm_log,
     records_to_df,
+    rename_sacct_record,
+    set_column_dtypes,
+    timeline,
+    watch,
 )
 from ccbr_tools.pipeline.hpc import get_hpcname
 from ccbr_tools.shell import shell_run
@@ -177,8 +207,10 @@ def test_jobby_biowulf():
             "WorkDir": "/gpfs/gsfs12/users/sovacoolkl/renee_test_hg38-45",
             "log_err_path": None,
             "log_err_txt": None,
+            "log_err_size": None,
             "log_out_path": None,
             "log_out_txt": None,
+            "log_out_size": None,
         }
     ]
 
@@ -223,6 +255,35 @@ def test_parse_mem_to_gb():
     assert results[4]
 
 
+def test_parse_times_to_seconds():
+    """Test parse times to seconds."""
+    times = ["1-02:03:04", "02:03:04", "37:55.869", "55.869", "2.5", ""]
+    np.testing.assert_array_equal(
+        parse_times_to_seconds(times), [93784, 7384, 2276, 56, 2, np.nan]
+    )
+    with pytest.warns(UserWarning) as record:
+        seconds = parse_times_to_seconds(["invalid", "1-2-3", "00:01:00", "invalid"])
+    np.testing.assert_array_equal(seconds, [np.nan, np.nan, 60, np.nan])
+    assert len(record) == 1
+    assert "Invalid time format in 3 value(s), e.g. invalid, 1-2-3" in str(
+        record[0].message
+    )
+
+
+def test_parse_mems_to_gb():
+    """Test parse mems to gb."""
+    mems = ["4000M", "4G", "102400K", "1T", "1073741824", ""]
+    np.testing.assert_array_equal(
+        parse_mems_to_gb(mems),
+        [parse_mem_to_gb(mem) for mem in mems[:-1]] + [np.nan],
+    )
+    with pytest.warns(UserWarning) as record:
+        gigabytes = parse_mems_to_gb(pd.Series(["4Gn", "1G", None, "invalid"]))
+    np.testing.assert_array_equal(gigabytes, [np.nan, 1.0, np.nan, np.nan])
+    assert len(record) == 1
+    assert "Invalid memory format in 2 value(s)" in str(record[0].message)
+
+
 def test_assertions():
     """Test assertions."""
     with pytest.raises(AssertionError) as exc1:
@@ -344,6 +405,643 @@ def test_get_job_logs():
     assert get_job_logs("abc", "tests/data/pipeline/work") == {
         "log_out_path": "tests/data/pipeline/work/.command.out",
         "log_out_txt": "",
+        "log_out_size": 0,
         "log_err_path": "tests/data/pipeline/work/.command.err",
         "log_err_txt": "WARNING: Not virtualizing pid namespace by configuration\\nWARNING: While bind mounting '/gpfs:/gpfs': destination is already in the mount point list\\n",
+        "log_err_size": 148,
     }
+    assert get_job_logs("abc", "tests/data/pipeline/work", include_text=False) == {
+        "log_out_path": "tests/data/pipeline/work/.command.out",
+        "log_err_path": "tests/data/pipeline/work/.command.err",
+    }
+
+
+def test_job_log_index(mocker, tmp_path):
+    """Test job log index."""
+    for relpath in (
+        "logs/align.101.out",
+        "logs/align.101.err",
+        "logs/trim.1012.err",
+        "logs/slurm-102_3.err",
+        "logs/bwa_2_12347.out",
+        "logs/align.sample_1_12345.out",
+        "logs/nested/call.abc-1.err",
+        ".snakemake/log/103.err",
+        "task/.command.err",
+    ):
+        (tmp_path / relpath).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / relpath).touch()
+    scan_files = mocker.spy(ccbr_tools.jobby, "scan_files")
+    log_index = JobLogIndex()
+    assert log_index.get_files("101", tmp_path, "err") == [
+        tmp_path / "logs" / "align.101.err",
+        tmp_path / "task" / ".command.err",
+    ]
+    assert log_index.get_files("101", tmp_path, "out") == [
+        tmp_path / "logs" / "align.101.out"
+    ]
+    assert log_index.get_files("102", tmp_path, "err") == [
+        tmp_path / "logs" / "slurm-102_3.err",
+        tmp_path / "task" / ".command.err",
+    ]
+    assert log_index.get_files("102_3", tmp_path, "err")[0].name == "slurm-102_3.err"
+    # job IDs after a number in the rule or sample name
+    assert log_index.get_files("12347", tmp_path, "out") == [
+        tmp_path / "logs" / "bwa_2_12347.out"
+    ]
+    assert log_index.get_files("12345", tmp_path, "out") == [
+        tmp_path / "logs" / "align.sample_1_12345.out"
+    ]
+    assert log_index.get_files("1234", tmp_path, "out") == []
+    assert log_index.get_files("abc", tmp_path, "err")[0].name == "call.abc-1.err"
+    # hidden directories are not searched
+    assert log_index.get_files("103", tmp_path, "err") == [
+        tmp_path / "task" / ".command.err"
+    ]
+    assert log_index.get_files("101", tmp_path / "task", "out") == []
+    assert scan_files.call_count == 2
+
+
+def test_read_log_excerpt(tmp_path):
+    """Test read log excerpt."""
+    log = tmp_path / "job.err"
+    log.write_text("head\n" + "x" * 100 + "\ntail\n")
+    assert read_log_excerpt(log) == (log.read_text(), 111)
+    assert read_log_excerpt(log, head_bytes=5, tail_bytes=5) == (
+        "head\n\n... [101 bytes truncated by jobby] ...\ntail\n",
+        111,
+    )
+    assert read_log_excerpt(log, head_bytes=None) == (log.read_text(), 111)
+    assert read_slurm_log(log, head_bytes=5, tail_bytes=5) == (
+        "head\\n\\n... [101 bytes truncated by jobby] ...\\ntail\\n"
+    )
+
+
+def test_read_job_logs(tmp_path):
+    """Test read job logs."""
+    records = []
+    for jobid in range(10):
+        log = tmp_path / f"slurm-{jobid}.out"
+        log.write_text(f"job {jobid}\n" * 100)
+        records.append(
+            {"JobId": str(jobid), "log_out_path": str(log), "log_err_path": None}
+        )
+    assert read_job_logs(records, log_bytes=6, workers=4) is records
+    assert [record["log_out_txt"] for record in records[:2]] == [
+        "job 0\\n\\n... [588 bytes truncated by jobby] ...\\njob 0\\n",
+        "job 1\\n\\n... [588 bytes truncated by jobby] ...\\njob 1\\n",
+    ]
+    assert {record["log_out_size"] for record in records} == {600}
+    assert "log_err_txt" not in records[0]
+
+
+SACCT_OUTPUT_BATCH = """JobID|JobName|State|Elapsed|AllocNodes|AllocCPUS|TotalCPU|ReqMem|MaxRSS|ExitCode|Timelimit|NodeList|Start|End|Submit|WorkDir
+102|align|FAILED|00:01:00|1|2|00:01:30|4G||1:0|01:00:00|cn1|2025-01-01T00:01:00|2025-01-01T00:02:00|2025-01-01T00:00:00|/tmp
+102.batch|batch|FAILED|00:01:00|1|2|00:01:30||2048M|1:0||cn1|2025-01-01T00:01:00|2025-01-01T00:02:00|2025-01-01T00:01:00|
+101|trim|COMPLETED|00:02:00|1|1|00:01:00|2G||0:0|01:00:00|cn2|2025-01-01T00:01:00|2025-01-01T00:03:00|2025-01-01T00:00:00|/tmp
+101.batch|batch|COMPLETED|00:02:00|1|1|00:01:00||1024M|0:0||cn2|2025-01-01T00:01:00|2025-01-01T00:03:00|2025-01-01T00:01:00|
+101.extern|extern|COMPLETED|00:02:00|1|1|00:00:00||0|0:0||cn2|2025-01-01T00:01:00|2025-01-01T00:03:00|2025-01-01T00:01:00|
+"""
+
+
+def test_chunk_job_ids():
+    """Test chunk job ids."""
+    job_ids = [str(jobid) for jobid in range(1000, 1010)]
+    assert chunk_job_ids(job_ids, max_chars=14) == [
+        ["1000", "1001", "1002"],
+        ["1003", "1004", "1005"],
+        ["1006", "1007", "1008"],
+        ["1009"],
+    ]
+    assert chunk_job_ids(job_ids, max_jobs=4) == [
+        ["1000", "1001", "1002", "1003"],
+        ["1004", "1005", "1006", "1007"],
+        ["1008", "1009"],
+    ]
+    assert chunk_job_ids([]) == []
+    assert chunk_job_ids(["123456789"], max_chars=4) == [["123456789"]]
+
+
+def test_parse_sacct_output():
+    """Test parse sacct output."""
+    job_records = parse_sacct_output(SACCT_OUTPUT_BATCH.strip().split("\n"))
+    assert list(job_records.keys()) == ["102", "101"]
+    assert job_records["101"]["MaxRSS"] == "1024M"
+    assert job_records["102"]["MaxRSS"] == "2048M"
+    assert job_records["102"]["JobName"] == "align"
+
+
+def fake_sacct(cmd, **_kwargs):
+    """Mock sacct: return rows for the requested job IDs, fail for invalid ones."""
+    job_ids = cmd[2].split(",")
+    if "invalid" in job_ids:
+        raise subprocess.CalledProcessError(1, cmd)
+    header, *rows = SACCT_OUTPUT_BATCH.strip().split("\n")
+    return "\n".join(
+        [header] + [row for row in rows if row.split("|")[0].split(".")[0] in job_ids]
+    )
+
+
+SACCT_OUTPUT_EXTENDED = """JobID|JobName|State|Elapsed|AllocNodes|AllocCPUS|TotalCPU|ReqMem|MaxRSS|ExitCode|Timelimit|NodeList|Start|End|Submit|WorkDir|MaxDiskRead|MaxDiskWrite|AllocTRES|TRESUsageInMax|ConsumedEnergyRaw
+201|gpu_align|COMPLETED|00:10:00|1|4|00:20:00|16G||0:0|02:00:00|cn3|2025-01-01T00:01:00|2025-01-01T00:11:00|2025-01-01T00:00:00|/tmp|||billing=4,cpu=4,gres/gpu=2,mem=16G,node=1||
+201.batch|batch|COMPLETED|00:10:00|1|4|00:01:00||1024M|0:0||cn3|2025-01-01T00:01:00|2025-01-01T00:11:00|2025-01-01T00:01:00||2048|1M|cpu=4,gres/gpu=2,mem=16G,node=1|cpu=00:01:00,fs/disk=2048,mem=1024M|1200
+201.extern|extern|COMPLETED|00:10:00|1|4|00:00:00||0|0:0||cn3|2025-01-01T00:01:00|2025-01-01T00:11:00|2025-01-01T00:01:00||0|0|cpu=4,gres/gpu=2,mem=16G,node=1|cpu=00:00:00,mem=0|0
+201.0|bwa|COMPLETED|00:09:00|1|4|00:19:00||8G|0:0||cn3|2025-01-01T00:02:00|2025-01-01T00:11:00|2025-01-01T00:02:00||3G|512M|cpu=4,gres/gpu=2,mem=16G,node=1|cpu=00:19:00,fs/disk=3221225472,mem=8G|3400
+202|trim|COMPLETED|00:02:00|1|1|00:01:00|2G||0:0|01:00:00|cn2|2025-01-01T00:01:00|2025-01-01T00:03:00|2025-01-01T00:00:00|/tmp|||billing=1,cpu=1,mem=2G,node=1||
+202.batch|batch|COMPLETED|00:02:00|1|1|00:01:00||512M|0:0||cn2|2025-01-01T00:01:00|2025-01-01T00:03:00|2025-01-01T00:01:00||1073741824|2048|cpu=1,mem=2G,node=1|cpu=00:01:00,mem=512M|
+"""
+
+
+def test_parse_slurm_number():
+    """Test parse slurm number."""
+    assert parse_slurm_number("2048") == 2048
+    assert parse_slurm_number("1.5K") == 1536
+    assert parse_slurm_number("3G") == 3 * 1024**3
+    assert parse_slurm_number("01:00:05") == 3605
+    assert np.isnan(parse_slurm_number(""))
+    assert np.isnan(parse_slurm_number(None))
+
+
+def test_merge_tres():
+    """Test merge tres."""
+    assert (
+        merge_tres("cpu=00:01:00,mem=1024M", "cpu=00:19:00,fs/disk=2048,mem=512M")
+        == "cpu=00:19:00,mem=1024M,fs/disk=2048"
+    )
+    assert merge_tres(None, "mem=1G") == "mem=1G"
+
+
+def test_parse_sacct_output_extended():
+    """Test parse sacct output extended."""
+    output = SACCT_OUTPUT_EXTENDED.strip().split("\n")
+    job_records = parse_sacct_output(output, extended=True)
+    assert list(job_records.keys()) == ["201", "202"]
+    job = job_records["201"]
+    # max across all steps, not only the batch step
+    assert job["MaxRSS"] == "8G"
+    assert job["MaxDiskRead"] == "3G"
+    assert job["MaxDiskWrite"] == "512M"
+    assert job["Steps"] == "batch,extern,0"
+    assert job["TRESUsageInMax"] == "cpu=00:19:00,fs/disk=3221225472,mem=8G"
+    assert job["JobName"] == "gpu_align"
+    assert job_records["202"]["Steps"] == "batch"
+    # default mode only uses the batch step
+    assert parse_sacct_output(output)["201"]["MaxRSS"] == "1024M"
+
+
+def test_list_records_extended(mocker):
+    """Test list records extended."""
+    mock_sacct = mocker.patch(
+        "ccbr_tools.jobby.subprocess.check_output",
+        return_value=SACCT_OUTPUT_EXTENDED,
+    )
+    records = list_records(["201", "202"], extended=True)
+    assert "MaxDiskRead" in mock_sacct.call_args.args[0][3]
+    assert "TRESUsageInMax" in mock_sacct.call_args.args[0][3]
+    df = records_to_df(records)
+    assert df["NumGPUs"].tolist() == [2, 0]
+    assert df["MaxMemUsedGB"].tolist() == [8.0, 0.5]
+    assert df["MaxDiskReadGB"].tolist() == [3.0, 1.0]
+    assert df["MaxDiskWriteGB"].tolist() == [0.5, 0.0]
+    assert df["ConsumedEnergyJoules"][0] == 3400
+    assert pd.isna(df["ConsumedEnergyJoules"][1])
+    assert df["Steps"].tolist() == ["batch,extern,0", "batch"]
+    assert list(df.columns).index("NumGPUs") == list(df.columns).index("AllocTRES") - 1
+    assert "NumGPUs" not in records_to_df(list_records(["201"])).columns
+
+
+def test_list_records_extended_cache(mocker, tmp_path):
+    """Test list records extended cache."""
+    mock_sacct = mocker.patch(
+        "ccbr_tools.jobby.subprocess.check_output",
+        return_value=SACCT_OUTPUT_EXTENDED,
+    )
+    with SacctCache(tmp_path / "cache.sqlite") as cache:
+        basic = list_records(["201", "202"], cache=cache)
+        # cached basic records lack the extended columns, so they are queried again
+        extended = list_records(["201", "202"], cache=cache, extended=True)
+        assert mock_sacct.call_count == 2
+        assert extended[0]["MaxDiskReadGB"] == "3G"
+        # usage is aggregated differently, so extended records do not serve basic queries
+        assert list_records(["201", "202"], cache=cache) == basic
+        assert mock_sacct.call_count == 3
+        assert list_records(["201", "202"], cache=cache) == basic
+        assert mock_sacct.call_count == 3
+
+
+def test_list_records_batched(mocker):
+    """Test list records batched."""
+    mock_sacct = mocker.patch(
+        "ccbr_tools.jobby.subprocess.check_output", side_effect=fake_sacct
+    )
+    records = list_records(["101", "102"])
+    assert mock_sacct.call_count == 1
+    assert mock_sacct.call_args.args[0][:3] == ["sacct", "-j", "101,102"]
+    assert [record["JobId"] for record in records] == ["101", "102"]
+    assert [record["MaxMemUsedGB"] for record in records] == ["1024M", "2048M"]
+    assert records == list_records(["101", "102"], batched=False)
+    assert mock_sacct.call_count == 3
+
+
+def test_list_records_replay(mocker, tmp_path):
+    """Test list records from recorded sacct output."""
+    mocker.patch("ccbr_tools.jobby.subprocess.check_output", side_effect=fake_sacct)
+    replay_path = tmp_path / "sacct.txt"
+    replay_path.write_text(SACCT_OUTPUT_BATCH)
+    records = list_records(
+        ["101", "102", "999"], backend=ReplayBackend(replay_path), workers=2
+    )
+    assert records == list_records(["101", "102"])
+    assert jobby(
+        ["101", "102"], use_cache=False, backend=ReplayBackend(replay_path)
+    ) == jobby(["101", "102"], use_cache=False)
+
+
+def test_replay_skips_sacct_cache(mocker, tmp_path):
+    """Test that records from other backends than sacct are not cached."""
+    mocker.patch("ccbr_tools.jobby.subprocess.check_output", side_effect=fake_sacct)
+    replay_path = tmp_path / "sacct.txt"
+    replay_path.write_text(SACCT_OUTPUT_BATCH)
+    cache_path = tmp_path / "cache.sqlite"
+    records = fetch_records(
+        ["101", "102"], cache_path=cache_path, backend=ReplayBackend(replay_path)
+    )
+    assert [record["JobId"] for record in records] == ["101", "102"]
+    jobby(["101", "102"], cache_path=cache_path, backend=ReplayBackend(replay_path))
+    assert not cache_path.exists()
+    assert fetch_records(["101", "102"], cache_path=cache_path) == records
+    with SacctCache(cache_path) as cache:
+        assert sorted(cache.get_records(["101", "102"])) == ["101", "102"]
+
+
+def test_get_sacct_info_deprecated(mocker):
+    """Test that get_sacct_info is a deprecated alias of list_records."""
+    mocker.patch("ccbr_tools.jobby.subprocess.check_output", side_effect=fake_sacct)
+    with pytest.deprecated_call():
+        records = get_sacct_info("101")
+    assert records == list_records(["101"])
+
+
+def test_list_records_batched_fallback(mocker):
+    """Test list records batched fallback."""
+    mock_sacct = mocker.patch(
+        "ccbr_tools.jobby.subprocess.check_output", side_effect=fake_sacct
+    )
+    with pytest.warns(UserWarning) as record:
+        records = list_records(["invalid", "101"])
+    assert mock_sacct.call_count == 3
+    assert "Failed to fetch info for JobID invalid" in str(record[0].message)
+    assert [record["JobId"] for record in records] == ["101"]
+
+
+def test_list_records_workers(mocker):
+    """Test list records workers."""
+    mock_sacct = mocker.patch(
+        "ccbr_tools.jobby.subprocess.check_output", side_effect=fake_sacct
+    )
+    with pytest.warns(UserWarning) as record:
+        records = list_records(
+            ["102", "invalid", "101", "103"], batched=False, workers=3, sacct_rate=0
+        )
+    assert mock_sacct.call_count == 4
+    assert [record["JobId"] for record in records] == ["102", "101"]
+    assert [str(warning.message) for warning in record] == [
+        "❌ Failed to fetch info for JobID invalid"
+    ]
+
+
+def test_rate_limiter():
+    """Test rate limiter."""
+    limiter = RateLimiter(100)
+    start = time.monotonic()
+    for _ in range(5):
+        limiter.wait()
+    assert time.monotonic() - start >= 0.04
+    assert RateLimiter(0).interval == 0.0
+
+
+def test_pop_option_value():
+    """Test pop option value."""
+    args = ["snakemake.log", "--workers", "4", "--json"]
+    assert pop_option_value(args, "--workers", default=1, cast=int) == 4
+    assert args == ["snakemake.log", "--json"]
+    assert pop_option_value(args, "--sacct-rate", default=5.0, cast=float) == 5.0
+    with pytest.raises(ValueError) as exc_info:
+        pop_option_value(["--workers"], "--workers")
+    assert "--workers requires a value" in str(exc_info.value)
+
+
+SACCT_OUTPUT_RUNNING = """JobID|JobName|State|Elapsed|AllocNodes|AllocCPUS|TotalCPU|ReqMem|MaxRSS|ExitCode|Timelimit|NodeList|Start|End|Submit|WorkDir
+103|call|RUNNING|00:01:00|1|2|00:00:00|4G||0:0|01:00:00|cn3|2025-01-01T00:01:00|Unknown|2025-01-01T00:00:00|/tmp
+"""
+
+
+def test_sacct_cache_path(cache_home):
+    """Test sacct cache path."""
+    assert get_sacct_cache_path() == cache_home / "ccbr_tools" / "jobby_sacct.sqlite"
+
+
+def test_list_records_cache(mocker, tmp_path):
+    """Test list records cache."""
+
+    def fake_sacct_running(cmd, **kwargs):
+        """Mock sacct with one job still running."""
+        output = fake_sacct(cmd, **kwargs)
+        if "103" in cmd[2].split(","):
+            output += "\n" + SACCT_OUTPUT_RUNNING.strip().split("\n")[1]
+        return output
+
+    mock_sacct = mocker.patch(
+        "ccbr_tools.jobby.subprocess.check_output", side_effect=fake_sacct_running
+    )
+    with SacctCache(tmp_path / "sacct.sqlite") as cache:
+        records = list_records(["101", "102", "103"], cache=cache)
+        assert mock_sacct.call_count == 1
+        assert sorted(cache.get_records(["101", "102", "103"])) == ["101", "102"]
+        cached_records = list_records(["101", "102", "103"], cache=cache)
+    # only the running job is queried again
+    assert mock_sacct.call_count == 2
+    assert mock_sacct.call_args.args[0][2] == "103"
+    assert cached_records == records
+    with SacctCache(tmp_path / "sacct.sqlite") as cache:
+        assert list_records(["102", "101"], cache=cache) == records[1::-1]
+    assert mock_sacct.call_count == 2
+
+
+def test_sacct_cache_ttl(tmp_path):
+    """Test sacct cache ttl."""
+    records = [{"JobId": "101", "JobState": "CANCELLED by 123", "ExitCode": "0:0"}]
+    with SacctCache(tmp_path / "sacct.sqlite") as cache:
+        cache.put_records(records)
+        assert cache.get_records(["101"])["101"]["JobState"] == "CANCELLED by 123"
+    with SacctCache(tmp_path / "sacct.sqlite", ttl_days=0) as cache:
+        assert cache.get_records(["101"]) == {}
+
+
+def test_jobby_no_cache(mocker, cache_home):
+    """Test jobby no cache."""
+    mock_sacct = mocker.patch(
+        "ccbr_tools.jobby.subprocess.check_output", side_effect=fake_sacct
+    )
+    jobby(["101"], use_cache=False)
+    jobby(["101"], use_cache=False)
+    assert mock_sacct.call_count == 2
+    assert not get_sacct_cache_path().exists()
+    jobby(["101"])
+    jobby(["101"])
+    assert mock_sacct.call_count == 3
+    assert get_sacct_cache_path().exists()
+
+
+def test_jobby_incremental(mocker, tmp_path):
+    """Test jobby incremental."""
+
+    def fake_sacct_running(cmd, **kwargs):
+        """Mock sacct with job 103 still running."""
+        output = fake_sacct(cmd, **kwargs)
+        if "103" in cmd[2].split(","):
+            output += "\n" + SACCT_OUTPUT_RUNNING.strip().split("\n")[1]
+        return output
+
+    mock_sacct = mocker.patch(
+        "ccbr_tools.jobby.subprocess.check_output", side_effect=fake_sacct_running
+    )
+    log = tmp_path / "snakemake.log"
+    log.write_text(
+        "Submitted job 1 with external jobid '101'.\n"
+        "Submitted job 2 with external jobid '102'.\n"
+        "Submitted job 3 with external"  # still being written
+    )
+    checkpoint = tmp_path / "snakemake.log.checkpoint.json"
+
+    def poll():
+        """Run jobby in incremental mode and return the job IDs it queried and reported."""
+        calls_before = mock_sacct.call_count
+        out = jobby([str(log)], incremental=True, use_cache=False)
+        queried = [call.args[0][2] for call in mock_sacct.call_args_list[calls_before:]]
+        return queried, [record["JobId"] for record in out]
+
+    assert poll() == (["101,102"], ["101", "102"])
+    assert checkpoint.exists()
+    # nothing new
+    assert poll() == ([], [])
+    with open(log, "a") as outfile:
+        outfile.write(" jobid '103'.\n")
+    assert poll() == (["103"], ["103"])
+    # 103 is still running, so it is queried again
+    assert poll() == (["103"], ["103"])
+    # the log was replaced: it is scanned again, but finished jobs are not queried
+    log.unlink()
+    log.write_text("Submitted job 4 with external jobid '104'.\n")
+    assert poll() == (["103,104"], ["103"])
+
+
+def test_watch(mocker):
+    """Test watch."""
+    polls = []
+
+    def fake_sacct_finishing(cmd, **kwargs):
+        """Mock sacct with job 103 running during the first poll only."""
+        polls.append(cmd[2])
+        output = fake_sacct(cmd, **kwargs)
+        if "103" in cmd[2].split(","):
+            row = SACCT_OUTPUT_RUNNING.strip().split("\n")[1]
+            output += "\n" + (
+                row if len(polls) == 1 else row.replace("RUNNING", "COMPLETED")
+            )
+        return output
+
+    mocker.patch(
+        "ccbr_tools.jobby.subprocess.check_output", side_effect=fake_sacct_finishing
+    )
+    mocker.patch("ccbr_tools.jobby.time.sleep")
+    outfile = io.StringIO()
+    table = watch(
+        ["101", "103"], 1, output_format="json", outfile=outfile, use_cache=False
+    )
+    # stops by itself once every job has finished, and only re-queries the running job
+    assert polls == ["101,103", "103"]
+    assert table["103"]["JobState"] == "COMPLETED"
+    rows = [json.loads(line) for line in outfile.getvalue().splitlines()]
+    assert [(row["JobId"], row["JobState"]) for row in rows] == [
+        ("101", "COMPLETED"),
+        ("103", "RUNNING"),
+        ("103", "COMPLETED"),
+    ]
+    polls.clear()
+    outfile = io.StringIO()
+    watch(["101", "103"], 1, max_polls=1, outfile=outfile, use_cache=False)
+    assert outfile.getvalue().startswith(
+        "jobby --watch: 2 jobs (1 COMPLETED, 1 RUNNING)"
+    )
+    assert "| RUNNING " in outfile.getvalue()
+    with pytest.raises(ValueError):
+        watch(["101"], 1, output_format="tsv")
+
+
+def test_watch_missing_jobs(mocker):
+    """Test watch keeps querying jobs that sacct has not returned yet."""
+    polls = []
+
+    def fake_sacct_delayed(cmd, **kwargs):
+        """Mock sacct that only knows about job 103 from the second poll on."""
+        polls.append(cmd[2])
+        output = fake_sacct(cmd, **kwargs)
+        if len(polls) > 1 and "103" in cmd[2].split(","):
+            row = SACCT_OUTPUT_RUNNING.strip().split("\n")[1]
+            output += "\n" + row.replace("RUNNING", "COMPLETED")
+        return output
+
+    mocker.patch(
+        "ccbr_tools.jobby.subprocess.check_output", side_effect=fake_sacct_delayed
+    )
+    mocker.patch("ccbr_tools.jobby.time.sleep")
+    table = watch(["101", "103"], 1, outfile=io.StringIO(), use_cache=False)
+    assert polls == ["101,103", "103"]
+    assert table["103"]["JobState"] == "COMPLETED"
+    # a job that sacct never returns is not done
+    mocker.patch("ccbr_tools.jobby.subprocess.check_output", return_value="")
+    assert watch(["105"], 1, max_polls=3, outfile=io.StringIO(), use_cache=False) == {}
+    assert ccbr_tools.jobby.subprocess.check_output.call_count == 3
+
+
+def test_set_column_dtypes():
+    """Test set column dtypes."""
+    df = records_to_df(
+        [
+            rename_sacct_record(record)
+            for record in parse_sacct_output(
+                (SACCT_OUTPUT_BATCH + SACCT_OUTPUT_RUNNING.split("\n", 1)[1])
+                .strip()
+                .split("\n")
+            ).values()
+        ]
+    )
+    typed_df = set_column_dtypes(pd.DataFrame(df.to_dict(orient="records")))
+    assert typed_df["ExitCode"].dtype == "Int64"
+    assert typed_df["NumCPUs"].tolist() == [2, 1, 2]
+    assert typed_df["MaxMemUsedGB"].dtype == "float64"
+    assert typed_df["StartTime"][0] == pd.Timestamp("2025-01-01T00:01:00")
+    # running jobs have no end time yet
+    assert typed_df["EndTime"].isna().tolist() == [False, False, True]
+
+
+@pytest.mark.parametrize("output_format", ["parquet", "arrow"])
+def test_format_df_columnar(output_format):
+    """Test format df columnar."""
+    pytest.importorskip("pyarrow")
+    df = records_to_df(
+        [
+            rename_sacct_record(record)
+            for record in parse_sacct_output(
+                SACCT_OUTPUT_BATCH.strip().split("\n")
+            ).values()
+        ]
+    )
+    out = format_df(df, output_format)
+    assert isinstance(out, bytes)
+    read_df = (
+        pd.read_parquet(io.BytesIO(out))
+        if output_format == "parquet"
+        else pd.read_feather(io.BytesIO(out))
+    )
+    pd.testing.assert_frame_equal(read_df, set_column_dtypes(df), check_dtype=False)
+    assert read_df["ExitCode"].tolist() == [1, 0]
+    assert str(read_df["EndTime"].dtype).startswith("datetime64")
+
+
+def test_jobby_ndjson(mocker):
+    """Test jobby ndjson."""
+    mock_sacct = mocker.patch(
+        "ccbr_tools.jobby.subprocess.check_output", side_effect=fake_sacct
+    )
+    chunks = iter_record_chunks(["102", "invalid", "101"], batched=False)
+    assert [record["JobId"] for record in next(chunks)] == ["102"]
+    assert mock_sacct.call_count == 1
+    with pytest.warns(UserWarning, match="invalid"):
+        assert next(chunks) == []
+    assert [record["JobId"] for record in next(chunks)] == ["101"]
+
+    outfile = io.StringIO()
+    assert jobby(["102", "101"], use_cache=False, ndjson_file=outfile) == {}
+    rows = [json.loads(line) for line in outfile.getvalue().splitlines()]
+    expected = records_to_df(list_records(["102", "101"])).to_dict(orient="records")
+    assert rows == json.loads(pd.DataFrame(expected).to_json(orient="records"))
+
+
+def test_ingest_query(mocker, tmp_path):
+    """Test ingest and query."""
+
+    def fake_sacct_running(cmd, **kwargs):
+        """Mock sacct with job 103 still running."""
+        output = fake_sacct(cmd, **kwargs)
+        if "103" in cmd[2].split(","):
+            output += "\n" + SACCT_OUTPUT_RUNNING.strip().split("\n")[1]
+        return output
+
+    mocker.patch(
+        "ccbr_tools.jobby.subprocess.check_output", side_effect=fake_sacct_running
+    )
+    log = tmp_path / "snakemake.log"
+    log.write_text(
+        "Submitted job 2 with external jobid '101'.\n"
+        "rule bwa_align:\n"
+        "    jobid: 1\n"
+        "Submitted job 1 with external jobid '102'.\n"
+        "Submitted job 3 with external jobid '103'.\n"
+    )
+    warehouse = tmp_path / "warehouse.sqlite"
+    with pytest.warns(UserWarning, match="Skipping 1 jobs"):
+        assert ingest([str(log)], pipeline="RENEE", warehouse_path=warehouse) == 2
+    with pytest.warns(UserWarning, match="Skipping 1 jobs"):
+        assert ingest([str(log)], pipeline="RENEE", warehouse_path=warehouse) == 0
+    summary = query_warehouse(warehouse_path=warehouse)
+    # rule names come from the log, or fall back to the job name
+    assert summary["rule"].tolist() == ["bwa_align", "trim"]
+    assert summary["MaxMemUsedGB_p50"].tolist() == [2.0, 1.0]
+    assert summary["MemUsedFraction_p95"].tolist() == [0.5, 0.5]
+    assert summary["TimeUsedFraction_p50"].tolist() == [0.02, 0.03]
+    summary = query_warehouse(warehouse_path=warehouse, by=["JobState"], state="FAILED")
+    assert summary[["JobState", "n_jobs"]].values.tolist() == [["FAILED", 1]]
+
+
+def test_timeline(mocker):
+    """Test timeline."""
+    mocker.patch("ccbr_tools.jobby.subprocess.check_output", side_effect=fake_sacct)
+    summary = timeline(["101", "102"], use_cache=False)
+    assert summary.shape[0] == 1
+    assert summary[
+        ["makespan_sec", "sum_runtime_sec", "max_concurrency"]
+    ].values.tolist() == [[180.0, 180.0, 2]]
+    assert summary["critical_path_sec"][0] == 120.0
+    assert summary["bottleneck"][0] == "mixed"
+    concurrency = timeline(["101", "102"], concurrency=True, use_cache=False)
+    assert concurrency.values.tolist() == [
+        ["2025-01-01T00:01:00", 2],
+        ["2025-01-01T00:02:00", 1],
+        ["2025-01-01T00:03:00", 0],
+    ]
+    with pytest.warns(UserWarning, match="No job data found"):
+        assert timeline([], use_cache=False)["n_jobs"][0] == 0
+
+
+def test_gantt(mocker, tmp_path):
+    """Test gantt."""
+    mocker.patch("ccbr_tools.jobby.subprocess.check_output", side_effect=fake_sacct)
+    log = tmp_path / "snakemake.log"
+    log.write_text(
+        "Submitted job 2 with external jobid '101'.\n"
+        "rule bwa_align:\n"
+        "    jobid: 1\n"
+        "Submitted job 1 with external jobid '102'.\n"
+    )
+    html = gantt([str(log)], use_cache=False)
+    assert html.startswith("<!DOCTYPE html>")
+    assert f"Job timeline: {log}" in html
+    # rule names come from the log, or fall back to the job name
+    assert "bwa_align: 1 jobs" in html
+    assert "trim: 1 jobs" in html
+    svg = gantt(["101", "102"], svg=True, width=100, use_cache=False)
+    assert svg.startswith("<svg") and "align: 1 jobs" in svg
+    with pytest.warns(UserWarning, match="No job data found"):
+        assert "<svg" in gantt([], use_cache=False)
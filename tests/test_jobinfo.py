@@ -2,9 +2,19 @@ import argparse
 import json
 import sys
 
+import pandas as pd
 import pytest
 
-from ccbr_tools.jobinfo import check_host, get_jobinfo, mem2gb, time2sec
+from ccbr_tools.jobinfo import (
+    add_usage_columns,
+    check_host,
+    get_jobinfo,
+    mem2gb,
+    mems2gb,
+    query_dashboard,
+    time2sec,
+    times2sec,
+)
 from ccbr_tools.shell import shell_run
 
 
@@ -41,6 +51,53 @@ def test_time2sec():
     assert time2sec("0-00:01:00") == 60.0
 
 
+def test_times2sec():
+    """Test times2sec."""
+    times = pd.Series(["1-00:00:00", "0-00:01:00", "03:04", "05", "", "UNLIMITED"])
+    assert times2sec(times).iloc[:5].tolist() == [
+        time2sec(timestr) for timestr in times.iloc[:5]
+    ]
+    assert pd.isna(times2sec(times).iloc[5])
+
+
+def test_mems2gb():
+    """Test mems2gb."""
+    mems = pd.Series(
+        ["0", "3.5 GB", "1024 MB", "1048576 KB", "-"], index=[5, 4, 3, 2, 1]
+    )
+    assert mems2gb(mems).iloc[:4].tolist() == [mem2gb(mem) for mem in mems.iloc[:4]]
+    assert mems2gb(mems).index.tolist() == [5, 4, 3, 2, 1]
+    assert pd.isna(mems2gb(mems).iloc[4])
+
+
+def test_add_usage_columns():
+    """Test add usage columns."""
+    table = add_usage_columns(
+        pd.DataFrame(
+            {
+                "jobid": ["2", "1"],
+                "submit_time": ["2024-01-01T00:00:01", "2024-01-01T00:00:00"],
+                "queued_time": ["0-00:01:00", "00:05"],
+                "elapsed_time": ["0-00:02:00", "1-00:00:00"],
+                "timelimit": ["0-00:10:00", "UNLIMITED"],
+                "cpus": ["2", "4"],
+                "cpu_max": ["1.0", "-"],
+                "mem": ["1 GB", "2 GB"],
+                "mem_max": ["512 MB", "-"],
+            }
+        )
+    )
+    # sorted by submit time
+    assert table["jobid"].tolist() == ["1", "2"]
+    assert table["max_cpu_util"].tolist() == ["-", "50.00 %"]
+    assert table["max_mem_util"].tolist() == ["-", "50.00 %"]
+    assert table["queued_time_seconds"].tolist() == ["5", "60"]
+    assert table["elapsed_time_seconds"].tolist() == ["86400", "120"]
+    assert table["timelimit_seconds"].tolist() == ["-", "600"]
+    assert table["time_util"].tolist() == ["- %", "20.00 %"]
+    assert table["epochtime"].diff().iloc[1] == 1
+
+
 def test_get_jobinfo_parses_output(mocker, tmp_path):
     """Test get jobinfo parses output."""
     sample = [
@@ -96,3 +153,74 @@ def test_get_jobinfo_parses_output(mocker, tmp_path):
     assert "max_mem_util" in table.columns
     assert "time_util" in table.columns
     assert table.iloc[0]["time_util"] == "20.00 %"
+
+
+def test_query_dashboard(mocker, capsys):
+    """Test query dashboard with a failed chunk."""
+
+    class DummyProc:
+        def __init__(self, returncode, stdout, stderr=""):
+            self.returncode = returncode
+            self.stdout = stdout
+            self.stderr = stderr
+
+    def fake_run(cmd, **_kwargs):
+        """Mock dashboard_cli: fail for chunks with job 3."""
+        jobids = cmd[cmd.index("--joblist") + 1].split(",")
+        return (
+            DummyProc(1, "", "invalid jobid")
+            if "3" in jobids
+            else DummyProc(0, json.dumps([{"jobid": jobid} for jobid in jobids]))
+        )
+
+    mock_run = mocker.patch("ccbr_tools.jobinfo.subprocess.run", side_effect=fake_run)
+    records, failures = query_dashboard(
+        ["1", "2", "3", "4", "5"], chunk_size=2, workers=2
+    )
+    assert mock_run.call_count == 3
+    assert [record["jobid"] for record in records] == ["1", "2", "5"]
+    assert failures == [(["3", "4"], "exit code 1: invalid jobid")]
+
+    mocker.patch(
+        "ccbr_tools.jobinfo.add_usage_columns", side_effect=lambda table: table
+    )
+    table = get_jobinfo(
+        argparse.Namespace(
+            joblist=["1", "2", "3", "4", "5"], output=None, chunk_size=2, workers=2
+        )
+    )
+    assert table["jobid"].tolist() == ["1", "2", "5"]
+    assert table.attrs["failed_jobids"] == ["3", "4"]
+    assert "dashboard_cli failed for 2 of 5 jobs" in capsys.readouterr().err
+    # exit only when every chunk fails
+    with pytest.raises(SystemExit):
+        get_jobinfo(argparse.Namespace(joblist=["3"], output=None))
+
+
+def test_get_jobinfo_replay(tmp_path):
+    """Test get jobinfo with recorded dashboard_cli output."""
+    replay_path = tmp_path / "jobs.json"
+    replay_path.write_text(
+        json.dumps(
+            [
+                {
+                    "jobid": jobid,
+                    "submit_time": f"2024-01-01T00:00:0{jobid}",
+                    "queued_time": "00:05",
+                    "elapsed_time": "0-00:02:00",
+                    "timelimit": "0-00:10:00",
+                    "cpus": "2",
+                    "cpu_max": "1.0",
+                    "mem": "1 GB",
+                    "mem_max": "512 MB",
+                }
+                for jobid in ("1", "2", "3")
+            ]
+        )
+    )
+    table = get_jobinfo(
+        argparse.Namespace(joblist=["3", "1", "4"], output=None, replay=replay_path)
+    )
+    assert table["jobid"].tolist() == ["1", "3"]
+    assert table["time_util"].tolist() == ["20.00 %", "20.00 %"]
+    assert table["max_mem_util"].tolist() == ["50.00 %", "50.00 %"]
@@ -0,0 +1,130 @@
+import gzip
+import shutil
+
+from ccbr_tools.logscan import LogEvent, get_complete_size, scan_log
+from ccbr_tools.shell import shell_run
+
+SMK_FAILED_LOG = """[Wed Mar 12 16:54:48 2025]
+rule align:
+    input: sample1.fastq.gz
+    output: sample1.bam
+    jobid: 12
+    resources: mem_mb=4000
+
+Submitted job 12 with external jobid '1001'.
+
+[Wed Mar 12 16:54:50 2025]
+localrule report:
+    jobid: 13
+
+Submitted job 13 with external jobid '1002'.
+[Wed Mar 12 17:01:02 2025]
+Error in rule align:
+    jobid: 12
+    input: sample1.fastq.gz
+    output: sample1.bam
+
+Job failed, going on with independent jobs.
+"""
+
+NXF_FAILED_LOG = """May-01 10:00:00.000 [Task submitter] DEBUG nextflow.executor.GridTaskHandler - [SLURM] submitted process ALIGN (sample1) > jobId: 2001; workDir: work/aa/bb
+May-01 10:05:00.000 [Task monitor] DEBUG n.processor.TaskPollingMonitor - Task completed > TaskHandler[jobId: 2001; id: 3; name: ALIGN (sample1); status: COMPLETED; exit: 137; error: -; workDir: work/aa/bb started: 1; exited: 2; ]
+May-01 10:05:00.100 [Task monitor] ERROR nextflow.processor.TaskProcessor - Error executing process > 'ALIGN (sample1)'
+"""
+
+
+def test_scan_log_snakemake(data_dir_rel):
+    """Test scan log snakemake."""
+    events = list(scan_log(data_dir_rel / "jobby" / "snakemake.log"))
+    assert len(events) == 26
+    assert events[0] == LogEvent(
+        "submit", "50456412", "picard", "47", "Wed Mar 12 16:54:48 2025", 2828
+    )
+    assert {event.kind for event in events} == {"submit"}
+
+
+def test_scan_log_nextflow(data_dir_rel):
+    """Test scan log nextflow."""
+    events = list(scan_log(data_dir_rel / "jobby" / "nextflow.log"))
+    assert [event.jobid for event in events] == [
+        "55256481",
+        "55256959",
+        "55256962",
+        "55257214",
+        "55257465",
+        "55257468",
+        "55257469",
+        "55257648",
+        "55257961",
+    ]
+    assert events[1].name == "TRIM_COUNT:CUTADAPT"
+    assert events[1].time == "Apr-28 13:55:37.749"
+
+
+def test_scan_log_failures(tmp_path):
+    """Test scan log failures."""
+    smk_log = tmp_path / "snakemake.log"
+    smk_log.write_text(SMK_FAILED_LOG)
+    nxf_log = tmp_path / ".nextflow.log"
+    nxf_log.write_text(NXF_FAILED_LOG)
+    smk_events = list(scan_log(smk_log))
+    nxf_events = list(scan_log(nxf_log))
+    assert [(event.kind, event.jobid, event.name) for event in smk_events] == [
+        ("submit", "1001", "align"),
+        ("submit", "1002", "report"),
+        ("failure", "1001", "align"),
+    ]
+    assert smk_events[-1].time == "Wed Mar 12 17:01:02 2025"
+    assert [
+        (event.kind, event.jobid, event.name, event.task) for event in nxf_events
+    ] == [
+        ("submit", "2001", "ALIGN", None),
+        ("failure", "2001", "ALIGN", "3"),
+        ("failure", None, "ALIGN", None),
+    ]
+
+
+def test_scan_log_chunks_and_gzip(data_dir_rel, tmp_path):
+    """Test scan log with small chunks and gzipped logs."""
+    log = data_dir_rel / "jobby" / "snakemake.log"
+    gz_log = tmp_path / "snakemake.log.1.gz"
+    with open(log, "rb") as infile, gzip.open(gz_log, "wb") as outfile:
+        shutil.copyfileobj(infile, outfile)
+    events = list(scan_log(log))
+    assert list(scan_log(log, chunk_size=7)) == events
+    assert list(scan_log(gz_log, chunk_size=1000)) == events
+
+
+def test_get_complete_size(tmp_path):
+    """Test get complete size."""
+    log = tmp_path / "snakemake.log"
+    log.write_bytes(b"line 1\nline 2\npartial")
+    assert get_complete_size(log) == 14
+    assert get_complete_size(log, block_size=3) == 14
+    log.write_bytes(b"partial")
+    assert get_complete_size(log) == 0
+
+
+def test_scan_log_start_stop(tmp_path):
+    """Test scan log from a byte offset."""
+    log = tmp_path / "snakemake.log"
+    log.write_text(SMK_FAILED_LOG)
+    events = list(scan_log(log))
+    second = events[1]
+    assert list(scan_log(log, start=second.offset, chunk_size=5)) == [
+        second._replace(name=None, time=None),
+        events[2]._replace(jobid=None),
+    ]
+    assert list(scan_log(log, stop=second.offset)) == events[:1]
+
+
+def test_logscan_cli(data_dir_rel, tmp_path):
+    """Test logscan cli."""
+    jobids = shell_run(f"logscan {data_dir_rel / 'jobby' / 'nextflow.log'} --jobids")
+    assert jobids.split() == sorted(jobids.split())
+    assert len(jobids.split()) == 9
+    smk_log = tmp_path / "snakemake.log"
+    smk_log.write_text(SMK_FAILED_LOG)
+    assert shell_run(f"logscan {smk_log} --failed") == (
+        "failure\t1001\talign\t12\tWed Mar 12 17:01:02 2025\t332\n"
+    )
@@ -0,0 +1,168 @@
+import gzip
+import os
+
+import pytest
+
+from ccbr_tools.paths import get_disk_usage, get_tree, iter_tree_records, load_tree
+
+
+@pytest.fixture
+def outdir(tmp_path):
+    """A small pipeline output directory."""
+    (tmp_path / "results" / "sample1").mkdir(parents=True)
+    (tmp_path / "results" / "sample1" / "sample1.bam").write_text("x" * 100)
+    (tmp_path / "results" / "sample2").mkdir()
+    (tmp_path / "results" / "b.txt").write_text("y" * 10)
+    (tmp_path / ".snakemake").mkdir()
+    (tmp_path / "snakemake.log").write_text("z")
+    os.symlink(tmp_path / "results", tmp_path / "link")
+    return tmp_path
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_get_tree(outdir, workers):
+    """Test get tree."""
+    root, report = get_tree(outdir, workers=workers)
+    assert root["name"] == str(outdir)
+    assert [(node["type"], node["name"]) for node in root["contents"]] == [
+        ("directory", ".snakemake"),
+        ("link", "link"),
+        ("directory", "results"),
+        ("file", "snakemake.log"),
+    ]
+    results = root["contents"][2]
+    assert [node["name"] for node in results["contents"]] == [
+        "b.txt",
+        "sample1",
+        "sample2",
+    ]
+    sample1 = results["contents"][1]
+    assert sample1["contents"] == [{"type": "file", "name": "sample1.bam", "size": 100}]
+    assert sample1["size"] == os.lstat(outdir / "results" / "sample1").st_size + 100
+    assert root["contents"][1]["target"] == str(outdir / "results")
+    assert report["directories"] == 4
+    assert report["files"] == 4
+    assert report["size"] == root["size"]
+    assert (
+        root["size"]
+        == sum(
+            os.lstat(os.path.join(dirpath, name)).st_size
+            for dirpath, dirnames, filenames in os.walk(outdir)
+            for name in dirnames + filenames
+        )
+        + os.lstat(outdir).st_size
+    )
+    assert get_disk_usage([root, report], outdir) == root["size"]
+
+
+def test_get_tree_collapsed(outdir):
+    """Test get tree with collapsed directories."""
+    full_root, full_report = get_tree(outdir)
+    root, report = get_tree(outdir, max_depth=1)
+    results = root["contents"][2]
+    assert results["contents"] == []
+    assert results["summary"]["files"] == 2
+    assert results["size"] == full_root["contents"][2]["size"]
+    assert root["size"] == full_root["size"] == report["size"]
+    assert report == full_report
+
+
+def test_get_tree_missing(tmp_path):
+    """Test get tree on a missing directory."""
+    root, report = get_tree(tmp_path / "missing")
+    assert root["contents"] == []
+    assert report == {"type": "report", "size": 0, "directories": 0, "files": 0}
+
+
+def test_get_tree_matches_tree_json(outdir, data_dir):
+    """Test get tree nodes have the same keys as the JSON from the tree utility."""
+    tree_keys = {}
+
+    def collect_keys(node):
+        tree_keys.setdefault(node["type"], set(node))
+        for child in node.get("contents", []):
+            collect_keys(child)
+
+    with gzip.open(data_dir / "tree" / "renee.json.gz", "rt") as tree_file:
+        for node in load_tree(tree_file.read())[0]["contents"]:
+            collect_keys(node)
+    root = get_tree(outdir)[0]
+    nodes = {node["type"]: node for node in root["contents"]}
+    assert set(nodes) == {"directory", "file", "link"}
+    for node_type, node in nodes.items():
+        assert set(node) == tree_keys[node_type]
+    assert nodes["link"]["contents"] == []
+
+
+def test_load_tree():
+    """Test load tree with trailing commas from the tree utility."""
+    tree_str = '[{"type":"directory","name":"out","size":4096,"contents":[],},{"type":"report","size":4096,},]'
+    assert load_tree(tree_str)[1] == {"type": "report", "size": 4096}
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_iter_tree_records(outdir, workers):
+    """Test iter tree records."""
+    records = list(iter_tree_records(outdir, workers=workers))
+    assert records[0]["path"] == "."
+    assert [record.get("path") for record in records] == [
+        ".",
+        "link",
+        "snakemake.log",
+        ".snakemake",
+        "results",
+        "results/b.txt",
+        "results/sample1",
+        "results/sample1/sample1.bam",
+        "results/sample2",
+        None,
+    ]
+    by_path = {record.get("path"): record for record in records}
+    assert by_path["results/sample1/sample1.bam"] == {
+        "path": "results/sample1/sample1.bam",
+        "type": "file",
+        "size": 100,
+        "mtime": int(os.lstat(outdir / "results" / "sample1" / "sample1.bam").st_mtime),
+    }
+    assert by_path["link"]["type"] == "link"
+    assert by_path["link"]["target"] == str(outdir / "results")
+    assert records[-1] == get_tree(outdir)[1]
+
+
+def test_iter_tree_records_condensed(outdir):
+    """Test collapsing and excluding tree records."""
+    full_report = get_tree(outdir)[1]
+    visited = []
+    records = list(iter_tree_records(outdir, max_depth=1, visit=visited.append))
+    assert [record.get("path") for record in records] == [
+        ".",
+        "link",
+        "snakemake.log",
+        ".snakemake",
+        "results",
+        None,
+    ]
+    assert records[4]["summary"] == {
+        "size": full_report["size"] - sum(record["size"] for record in records[:-1]),
+        "directories": 2,
+        "files": 2,
+        "extensions": {".txt": 1, ".bam": 1},
+    }
+    assert records[-1] == full_report
+    assert len(visited) == 8
+    records = list(iter_tree_records(outdir, max_entries=3))
+    assert [record.get("path") for record in records] == [".", None]
+    assert records[0]["summary"]["directories"] == full_report["directories"]
+    assert records[0]["summary"]["files"] == full_report["files"]
+    records = list(iter_tree_records(outdir, exclude=["results/sample*", ".*"]))
+    assert [record.get("path") for record in records] == [
+        ".",
+        "link",
+        "snakemake.log",
+        "results",
+        "results/b.txt",
+        None,
+    ]
+    assert records[-1]["files"] == full_report["files"]
+    assert records[-1]["excluded"]["directories"] == 3
+    assert records[-1]["excluded"]["extensions"] == {".bam": 1}
@@ -0,0 +1,61 @@
+import gzip
+import math
+
+import pytest
+
+from ccbr_tools.paths import load_tree
+from ccbr_tools.pipeline import ASPEN, SINCLAIR, count_pipeline_samples
+
+
+def iter_tree_names(node):
+    """Yield the names of a node from `tree -J` and everything it contains."""
+    yield node["name"]
+    for child in node.get("contents", []):
+        yield from iter_tree_names(child)
+
+
+@pytest.mark.parametrize(
+    "pipeline_name",
+    [
+        "aspen",
+        "carlisle",
+        "champagne",
+        "charlie",
+        "crispin",
+        "escape",
+        "logan",
+        "renee",
+        "sinclair",
+        "xavier",
+    ],
+)
+def test_count_pipeline_samples_paths(data_dir, pipeline_name):
+    """Test that suffix rules find the same samples as the tree string patterns."""
+    with gzip.open(data_dir / "tree" / f"{pipeline_name}.json.gz", "rt") as infile:
+        tree_str = infile.read()
+    names = list(iter_tree_names(load_tree(tree_str)[0]))
+    nsamples, sample_names = count_pipeline_samples(names, pipeline_name)
+    assert nsamples > 0
+    assert (nsamples, sample_names) == count_pipeline_samples(
+        tree_str.replace('": "', '":"'), pipeline_name
+    )
+
+
+def test_get_sample_name():
+    """Test get sample name."""
+    assert ASPEN.get_sample_name("bam/S1.reads.bam.bai") == "S1"
+    assert ASPEN.get_sample_name("bam/S1.reads.bam") is None
+    assert ASPEN.get_sample_name("S 1.reads.bam.bai") is None
+    assert SINCLAIR.get_sample_name("rds/S2_seurat_preprocess.rds") == "S2_"
+    assert ASPEN.get_samples(["a/S2.reads.bam.bai", "S1.reads.bam.bai", "x.txt"]) == [
+        "S1",
+        "S2",
+    ]
+
+
+def test_count_pipeline_samples_unknown():
+    """Test count pipeline samples with an unknown pipeline."""
+    with pytest.warns(UserWarning, match="not recognized"):
+        nsamples, sample_names = count_pipeline_samples(["S1.bam"], "unknown")
+    assert math.isnan(nsamples)
+    assert sample_names == []
@@ -0,0 +1,93 @@
+import os
+import subprocess
+
+from ccbr_tools.accounting import ReplayBackend
+from ccbr_tools.jobby import extract_jobids_from_file, list_records
+from ccbr_tools.logscan import scan_log
+from ccbr_tools.sacct_fixtures import (
+    format_sacct_output,
+    format_slurm_time,
+    generate_job,
+    generate_job_ids,
+    write_nextflow_log,
+    write_sacct_fixture,
+    write_sacct_stand_in,
+    write_snakemake_log,
+)
+
+
+def test_format_slurm_time():
+    """Test format slurm time."""
+    assert format_slurm_time(59) == "00:00:59"
+    assert format_slurm_time(93784) == "1-02:03:04"
+
+
+def test_generate_job():
+    """Test generate job is deterministic per job ID and seed."""
+    assert generate_job("50000005") == generate_job(50000005)
+    assert generate_job("50000005") != generate_job("50000005", seed=1)
+    job = generate_job("50000005")
+    assert job["task"] == 6
+    assert (job["end"] is None) == (job["state"] == "RUNNING")
+
+
+def test_format_sacct_output():
+    """Test format sacct output."""
+    lines = format_sacct_output(["50000000"], fields=["JobID", "Unknown"]).split("\n")
+    assert lines == [
+        "JobID|Unknown",
+        "50000000|",
+        "50000000.batch|",
+        "50000000.extern|",
+        "",
+    ]
+
+
+def test_write_logs(tmp_path):
+    """Test the synthetic logs submit every job and report the failed ones."""
+    job_ids = generate_job_ids(50)
+    n_failed = sum(
+        generate_job(jobid)["state"] not in ("COMPLETED", "RUNNING")
+        for jobid in job_ids
+    )
+    for writer, name in (
+        (write_snakemake_log, "snakemake.log"),
+        (write_nextflow_log, ".nextflow.log"),
+    ):
+        writer(tmp_path / name, job_ids)
+        events = list(scan_log(tmp_path / name))
+        assert [event.jobid for event in events if event.kind == "submit"] == job_ids
+        assert len([event for event in events if event.kind == "failure"]) == n_failed
+        assert {event.name for event in events} <= {
+            generate_job(jobid)["rule"] for jobid in job_ids
+        } | {generate_job(jobid)["rule"].upper() for jobid in job_ids}
+
+
+def test_sacct_stand_in(tmp_path, mocker):
+    """Test the sacct stand-in agrees with the sacct fixture."""
+    job_ids = generate_job_ids(20)
+    sacct_path = write_sacct_stand_in(tmp_path / "bin")
+    output = subprocess.check_output(
+        [
+            sacct_path,
+            "-j",
+            ",".join(job_ids[:2]),
+            "--format=JobID,State",
+            "-P",
+            "--parsable2",
+        ],
+        text=True,
+    )
+    assert output == format_sacct_output(job_ids[:2], fields=["JobID", "State"])
+
+    write_snakemake_log(tmp_path / "snakemake.log", job_ids)
+    write_sacct_fixture(tmp_path / "sacct.txt", job_ids)
+    mocker.patch.dict(
+        os.environ, {"PATH": f"{sacct_path.parent}{os.pathsep}{os.environ['PATH']}"}
+    )
+    found_ids = extract_jobids_from_file(tmp_path / "snakemake.log")
+    records = list_records(found_ids, extended=True)
+    assert [record["JobId"] for record in records] == job_ids
+    assert records == list_records(
+        found_ids, extended=True, backend=ReplayBackend(tmp_path / "sacct.txt")
+    )
@@ -1,10 +1,18 @@
 import gzip
+import io
 import json
 import subprocess
+import threading
 
+import click
 import pytest
 
-from ccbr_tools.spooker import spooker
+from ccbr_tools.spooker import (
+    RunMetadata,
+    parse_stage_timeouts,
+    spooker,
+    write_spooker_json,
+)
 
 
 @pytest.mark.filterwarnings("ignore:UserWarning")
@@ -32,6 +40,15 @@ def test_spooker(data_dir_rel):
     }
     actual = {k: v for k, v in spook_dat["pipeline_metadata"].items() if k in expected}
     assert actual == expected
+    assert [record.get("path") for record in spook_dat["outdir_records"]] == [
+        ".",
+        "snakemake.log",
+        None,
+    ]
+    assert (
+        spook_dat["pipeline_metadata"]["pipeline_outdir_size"]
+        == spook_dat["outdir_records"][-1]["size"]
+    )
 
 
 def test_spooker_no_outdir(data_dir_rel):
@@ -75,11 +92,22 @@ def test_spooker_cli(data_dir_rel):
         k: v for k, v in spook_dat["pipeline_metadata"].items() if k in expected_meta
     }
     assert expected_meta == actual_meta
+    assert spook_dat["metadata_version"] == 2
     assert spook_dat.keys() == {
-        "outdir_tree",
+        "metadata_version",
+        "outdir_records",
         "pipeline_metadata",
         "jobby",
         "master_job_log",
+        "spooker_stages",
+    }
+    assert spook_dat["spooker_stages"].keys() == {
+        "ccbrpipeliner_module",
+        "uid",
+        "groups",
+        "master_job_log",
+        "jobby",
+        "tree",
     }
 
 
@@ -91,3 +119,76 @@ def test_spooker_help():
             "spooker --help", shell=True, capture_output=True, text=True, check=False
         ).stdout
     )
+
+
+def test_write_spooker_json(tmp_path):
+    """Test streaming the tree and sample names into the spooker json."""
+    (tmp_path / "bams").mkdir()
+    for sample in ("S1", "S2"):
+        (tmp_path / "bams" / f"{sample}.reads.bam.bai").write_text("bai")
+    metadata = {
+        "pipeline_metadata": {
+            "pipeline_name": "aspen",
+            "pipeline_outdir_size": None,
+            "nsamples": None,
+            "sample_names": None,
+        },
+        "jobby": [],
+    }
+    outfile = io.StringIO()
+    write_spooker_json(outfile, metadata, tmp_path)
+    spook_dat = json.loads(outfile.getvalue())
+    assert list(spook_dat) == [
+        "metadata_version",
+        "outdir_records",
+        "pipeline_metadata",
+        "jobby",
+        "spooker_stages",
+    ]
+    assert len(spook_dat["outdir_records"]) == 5
+    outfile = io.StringIO()
+    write_spooker_json(outfile, metadata, tmp_path, max_depth=0)
+    condensed_dat = json.loads(outfile.getvalue())
+    assert len(condensed_dat["outdir_records"]) == 2
+    assert condensed_dat["pipeline_metadata"] == spook_dat["pipeline_metadata"]
+    assert spook_dat["pipeline_metadata"] == {
+        "pipeline_name": "aspen",
+        "pipeline_outdir_size": spook_dat["outdir_records"][-1]["size"],
+        "nsamples": 2,
+        "sample_names": ["S1", "S2"],
+    }
+
+
+def test_run_metadata_stage_timeout(mocker, data_dir_rel):
+    """Test that slow and failing metadata stages are given up on."""
+    release = threading.Event()
+    mocker.patch("ccbr_tools.spooker.get_groups", side_effect=release.wait)
+    mocker.patch(
+        "ccbr_tools.spooker.get_ccbrpipeliner_module", side_effect=OSError("no module")
+    )
+    run_metadata = RunMetadata(
+        data_dir_rel / "pipeline_run",
+        "test_pipeline",
+        "0.1.0",
+        "unknown",
+        stage_timeouts={"groups": 0.2},
+    )
+    with pytest.warns(UserWarning, match="stage groups did not finish within 0.2"):
+        metadata = run_metadata.result()
+    release.set()
+    stages = metadata["spooker_stages"]
+    assert stages["groups"]["status"] == "timeout"
+    assert stages["groups"]["seconds"] >= 0.2
+    assert stages["ccbrpipeliner_module"]["status"] == "error"
+    assert stages["jobby"]["status"] == "ok"
+    assert metadata["pipeline_metadata"]["groups"] is None
+    assert metadata["master_job_log"]["path"].endswith("snakemake.log")
+
+
+def test_parse_stage_timeouts():
+    """Test parse stage timeouts."""
+    assert parse_stage_timeouts(["jobby=300", "uid=1.5"]) == {"jobby": 300, "uid": 1.5}
+    with pytest.raises(click.BadParameter, match="unknown stage"):
+        parse_stage_timeouts(["tree=10"])
+    with pytest.raises(click.BadParameter, match="expected STAGE=SECONDS"):
+        parse_stage_timeouts(["jobby"])